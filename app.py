@@ -7,9 +7,30 @@ Ceramic shell photography for crack detection after methylene blue test.
 import os
 import sys
 import time
+
+STARTUP_T0 = time.perf_counter()  # reference for time-to-menu / time-to-first-capture
+
+import errno
+import math
 import json
+import mmap
+import importlib
+import importlib.util
+import asyncio
+import functools
+import shutil
+import socket
+import hashlib
+import zipfile
+import zlib
+import warnings
+import itertools
 import threading
+import collections
+import queue
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
 from datetime import datetime
+import xml.etree.ElementTree as ElementTree
 
 # =============================================================================
 # CONFIGURATION
@@ -20,6 +41,32 @@ class Config:
     GPIO_DIRECTION = 27
     GPIO_ENABLE = 22
     
+    # STATIONS - one entry per turntable driven by this Pi (the Pi 5 has two CSI ports).
+    # The first station uses the pins above and the legacy storage/calibration files;
+    # others default to "<storage>_<name>" and "calibration_<name>.json".
+    STATIONS = [
+        {"name": "A", "gpio_pulse": GPIO_PULSE, "gpio_direction": GPIO_DIRECTION,
+         "gpio_enable": GPIO_ENABLE, "camera_index": 0},
+        # {"name": "B", "gpio_pulse": 5, "gpio_direction": 6, "gpio_enable": 13, "camera_index": 1},
+    ]
+    PIPELINE_WORKERS = 2  # shared overlay/encode/checksum workers for all stations
+    PIPELINE_NICE = 10  # pipeline threads run below the motor pulse threads
+    
+    # LOAD-AWARE SCHEDULING (background work backs off as the SoC heats up or throttles)
+    SCHEDULER_ENABLED = True
+    SCHEDULER_INTERVAL = 2.0  # seconds between temperature / throttle / CPU samples
+    SCHEDULER_SYS_ROOT = os.environ.get("TABLE_SYS_ROOT", "/")  # fake /sys + /proc tree for tests
+    SCHEDULER_TEMP_WARM = 72.0  # degrees C: shed background work
+    SCHEDULER_TEMP_HOT = 80.0  # degrees C: background work at its minimum (firmware caps at 85)
+    SCHEDULER_TEMP_HYSTERESIS = 3.0  # degrees C below a threshold before stepping back
+    SCHEDULER_CPU_HIGH = 0.85  # CPU busy fraction that counts as overloaded
+    SCHEDULER_CPU_LOW = 0.60  # ... and that allows stepping back
+    SCHEDULER_CAPTURE_BUDGET = 1.0  # seconds: mean recent capture phase above this = overloaded
+    # Per level (normal, warm, hot): pipeline workers and ingest transfer rate (bytes/s, 0 = unlimited)
+    SCHEDULER_PIPELINE_WORKERS = (PIPELINE_WORKERS, 1, 1)
+    SCHEDULER_TRANSFER_RATES = (0, 8 * 1024 * 1024, 2 * 1024 * 1024)
+    SCHEDULER_DEFER_REVIEW_LEVEL = 1  # from this level, review tiles wait for the end of the scan
+    
     # MOTOR SETTINGS
     STEPS_PER_REVOLUTION = 800
     DEGREES_PER_STEP = 360.0 / 800
@@ -28,22 +75,140 @@ class Config:
     PULSE_DELAY_US = 500
     STEP_DELAY_MS = 5
     CALIBRATION_FACTOR = 1.0
+    MOTION_CPUS = (3, 2)  # core each station's pulse thread is pinned to (A, B, ...); pipeline avoids them
+    MOTION_RT_PRIORITY = 50  # SCHED_FIFO priority of the pulse thread (needs CAP_SYS_NICE / root)
+    MOTION_SPIN_US = 150  # last part of each pulse wait is spun instead of slept
+    MOTION_SWITCH_INTERVAL = 0.0005  # sys.setswitchinterval while a move runs: process-wide (Python default 5 ms); None = leave it
+    ALTERNATE_SCAN_DIRECTION = True  # Next scan runs back the way the last one came
+    
+    # VISION CALIBRATION / SPEED TUNING (fiducial mark on the turntable rim)
+    FIDUCIAL_ROI = (0.0, 0.55, 1.0, 0.45)  # x, y, w, h fractions of the lores frame searched
+    FIDUCIAL_TEMPLATE = 32  # template size in lores pixels
+    FIDUCIAL_MIN_SCORE = 0.6  # normalised correlation below this = fiducial lost
+    FIDUCIAL_NUDGE = 2.0  # degrees moved at home to measure pixels per degree
+    FIDUCIAL_TOLERANCE = 0.25  # degrees; about half a microstep at 800 steps/rev
+    FIDUCIAL_SEARCH_STEP = 10.0  # degrees per move while looking for a lost fiducial
+    TUNE_MIN_PULSE_US = 50  # fastest pulse delay tried
+    TUNE_RESOLUTION_US = 10  # pulse delay search stops at this resolution
+    TUNE_MARGIN = 0.2  # tuned timings are this much slower than the fastest passing ones
+    TUNE_CONFIRM_TURNS = 2  # full verified turns at the tuned profile before it is kept
     
     # CAMERA SETTINGS
     CAMERA_RESOLUTION = (4608, 2592)
     CAMERA_PREVIEW_SIZE = (800, 600)
     CAMERA_QUALITY = 95
-    CAPTURE_DELAY = 0.5
+    CAMERA_MAIN_FORMAT = "BGR888"  # "YUV420": half the buffer memory, JPEG encoded from the planes
+    CAMERA_BUFFER_COUNT = 4  # more buffers = fewer dropped frames, more pinned memory
+    CAMERA_PIPELINE = "single"  # "single": one full-res mode; "video": binned fast preview, mode switch per still
+    VIDEO_MODE_SIZE = (2304, 1296)  # 2x2 binned sensor mode used by the "video" pipeline
+    VIDEO_MODE_FPS = 30
+    CAMERA_SETTLE_TIMEOUT = 2.0  # max wait for auto-exposure lock after camera start
+    PREWARM_IDLE_TIMEOUT = 120  # close a pre-warmed camera if no scan claims it
+    CAPTURE_DELAY = 0.5  # max settle time after a move
+    AF_TIMEOUT = 0.3  # max wait for AfState to leave Scanning after a trigger
+    SETTLE_FRAMES = 3  # consecutive frames with stable FocusFoM = table settled
+    SETTLE_FOM_TOLERANCE = 0.05  # relative FocusFoM spread allowed over SETTLE_FRAMES
+    METADATA_HISTORY = 120  # frames of metadata kept in the history ring (at least SETTLE_FRAMES)
+    
+    # BURST CAPTURE (parts deeper than the depth of field / wider than one exposure)
+    CAPTURE_MODE = "single"  # "single" | "focus_stack" | "hdr"
+    BURST_LENS_OFFSETS = (-0.6, 0.0, 0.6)  # dioptres around the autofocus position
+    BURST_LENS_TOLERANCE = 0.05  # reported LensPosition must be this close to the target
+    BURST_EV_STEPS = (-1.0, 0.0, 1.0)  # exposure brackets, in stops around auto-exposure
+    BURST_FRAME_TIMEOUT = 0.4  # max wait for a frame showing the new control value
+    BURST_FUSION_BLOCK = 16  # pixels per tile of the fusion weight map
+    BURST_SAVE_FRAMES = False  # also keep the individual burst frames
+    BURST_MAX_PENDING = 2  # bursts / YUV stills waiting to be developed before capture waits (RAM bound)
+    
+    # SPOOL CAPTURE (rush jobs: raw frames to a memory-mapped spool, developed while the station is idle)
+    SPOOL_CAPTURE = False
+    SPOOL_IDLE_DELAY = 5.0  # seconds without scans (running or queued) before developing starts
+    SPOOL_PAUSE_LEVEL = 2  # scheduler level (hot) at which developing waits
+    SPOOL_VIDEO_HOLD = 4  # video frames per angle in the spin video made from the developed stills
+    
+    # QUALITY GATE (checked before the table moves on; failed stills are re-shot)
+    QUALITY_GATE_ENABLED = True
+    QUALITY_ROI = (0.2, 0.15, 0.6, 0.7)  # x, y, w, h as fractions of the frame
+    QUALITY_WIDTH = 320  # ROI is resampled to this width, whatever the gate frame's resolution
+    QUALITY_MIN_SHARPNESS = 60.0  # absolute Laplacian-variance floor (simulator: ~150 in focus, ~42 at 1 dioptre off)
+    QUALITY_RELATIVE_SHARPNESS = 0.5  # fail below this fraction of the scan's median so far
+    QUALITY_MAX_CLIPPED = 0.02  # max fraction of blown highlights (>= 251) in the ROI
+    QUALITY_MEAN_RANGE = (40, 220)  # acceptable mean level of the ROI
+    QUALITY_RETRIES = 2  # re-shoots per angle
+    QUALITY_SCAN_RETRY_BUDGET = 6  # re-shoots per scan
+    
+    # AUTO ROI (pre-rotation on the lores stream, part bounding box applied as ScalerCrop)
+    AUTO_ROI_ENABLED = False
+    AUTO_ROI_VIEWS = 8  # lores frames taken around one turn before the scan
+    AUTO_ROI_MOTION = 25  # grey-level range across the views that marks the turning part
+    AUTO_ROI_CONTRAST = 60  # Lab distance from the border colour that marks the part
+    AUTO_ROI_BORDER = 0.04  # frame border (fraction) sampled as background
+    AUTO_ROI_MIN_AREA = 0.001  # blobs smaller than this fraction of the frame are noise
+    AUTO_ROI_MARGIN = 0.08  # added around the box, as a fraction of its size per side
+    AUTO_ROI_ALIGN = (64, 16)  # crop width / height multiples (stream stride friendly)
+    
+    # DISPLAY SETTINGS
+    DASHBOARD_MAX_FPS = 5  # cap on scan dashboard redraws per second
+    
+    # PREVIEW STREAMING (MJPEG over HTTP for remote viewers)
+    STREAM_ENABLED = True
+    STREAM_HOST = "127.0.0.1"  # unauthenticated: "0.0.0.0" only on a trusted network
+    STREAM_PORT = 8081
+    STREAM_MAX_FPS = 10  # encode cap; each frame is encoded once for all clients
+    STREAM_QUALITY = 70
+    
+    # CONTROL API (line integration: MES / PLC gateway)
+    CONTROL_ENABLED = True
+    # JSON lines over a Unix socket, in the user's private runtime directory when there is one
+    CONTROL_SOCKET = os.path.join(os.environ.get("XDG_RUNTIME_DIR") or "/tmp", "table_carapace.sock")
+    CONTROL_SOCKET_MODE = 0o600  # owner only; 0o660 lets the socket's group (e.g. a gateway user) in
+    CONTROL_HTTP_PORT = None  # e.g. 8750 to also serve HTTP on 127.0.0.1
     
     # STORAGE SETTINGS
     LOCAL_STORAGE_PATH = os.path.join(os.path.expanduser("~"), "Desktop", "test_table", "scans")
     FILE_PREFIX = "grappe"
     FILE_EXTENSION = "jpg"
     
+    # REVIEW EXPORT (DeepZoom tile pyramid per angle + spin sprite sheet, built while scanning)
+    REVIEW_ENABLED = True
+    REVIEW_TILE_SIZE = 254
+    REVIEW_TILE_OVERLAP = 1
+    REVIEW_TILE_QUALITY = 80
+    REVIEW_SPRITE_WIDTH = 320  # width of one spin-viewer frame in the sprite sheet
+    REVIEW_SPRITE_COLUMNS = 6
+    
+    # SCAN BUNDLE (one uncompressed zip per scan, appended while scanning)
+    BUNDLE_ENABLED = False
+    BUNDLE_NAME = "scan.zip"
+    BUNDLE_KEEP_FILES = False  # False: a finished scan folder keeps only the bundle, manifest and journal
+    
     # PIECE ID FORMAT - Change this pattern as needed
     # {:06d} = 6 digits zero-padded, P = suffix
     PIECE_ID_FORMAT = "{:06d}P"
     
+    # FLEET INGESTION (ship finished scans to the collector, see ingest.py)
+    INGEST_ENABLED = False
+    INGEST_DROP_DIR = "/mnt/nas/carapace_fleet"  # collector root (incoming/ + status.json), or
+    INGEST_SOCKET = None  # collector Unix socket, e.g. "/tmp/carapace_ingest.sock"
+    INGEST_RETRY_INTERVAL = 60  # seconds between backlog retries while the collector is busy
+    INGEST_STATUS_MAX_AGE = 30  # seconds; an older status.json means the collector is down
+    TABLE_ID = socket.gethostname()  # this table's name in the fleet index
+    
+    # HARDWARE SIMULATOR (run and measure the real pipeline without a Pi)
+    SIMULATOR = os.environ.get("TABLE_SIMULATOR") == "1"
+    SIM_REPLAY_DIR = None  # scan folder replayed by angle instead of the synthetic part
+    SIM_SEED = 1  # texture of the synthetic part (same seed = same frames)
+    SIM_STILL_FPS = 14.0  # full-resolution sensor mode frame rate
+    SIM_SWITCH_TIME = 0.25  # seconds per camera mode switch
+    SIM_CONTROL_LATENCY = 2  # frames before set_controls() values take effect
+    SIM_AF_FRAMES = 6  # frames an AF cycle scans before reporting Focused
+    SIM_LENS_SPEED = 0.5  # dioptres the lens moves per frame
+    SIM_DEFOCUS_BLUR = 6.0  # blur sigma in full-resolution pixels per dioptre of focus error
+    SIM_CALIBRATION_FACTOR = 1.0  # calibration factor the simulated mechanics really need
+    SIM_MIN_STEP_INTERVAL_US = 300  # pulses closer than this stall the motor (missed steps)
+    SIM_EDGE_HISTORY = 100000  # GPIO edges kept in memory
+    SIM_EDGE_LOG = None  # CSV file receiving every GPIO edge (seconds, pin, level)
+    
     # NAS SETTINGS (placeholder for future implementation)
     NAS_ENABLED = False
     NAS_MOUNT_POINT = "/mnt/nas"
@@ -56,16 +221,117 @@ class Config:
 
 CONFIG = Config()
 CALIBRATION_FILE = os.path.join(os.path.dirname(__file__), "calibration.json")
+MOTION_PROFILE_FILE = os.path.join(os.path.dirname(__file__), "motion_profile.json")
+POSITION_FILE = os.path.join(os.path.dirname(__file__), "position.json")
+
+
+class Station:
+    """One turntable driven by this Pi: pin map, CSI camera, storage root, calibration."""
+    
+    def __init__(self, name, gpio_pulse, gpio_direction, gpio_enable, camera_index=0,
+                 storage_path=None, calibration_file=None, position_file=None, profile_file=None):
+        self.name = name
+        self.gpio_pulse = gpio_pulse
+        self.gpio_direction = gpio_direction
+        self.gpio_enable = gpio_enable
+        self.camera_index = camera_index
+        self.storage_path = storage_path or CONFIG.LOCAL_STORAGE_PATH
+        self.calibration_file = calibration_file or CALIBRATION_FILE
+        self.position_file = position_file or POSITION_FILE
+        self.profile_file = profile_file or MOTION_PROFILE_FILE
+        self.calibration_factor = 1.0
+        # Tuned motor timings (motion profile); None = CONFIG defaults
+        self.pulse_delay_us = None
+        self.step_delay_ms = None
+        self.motion_stats = None  # pulse jitter of the last motor session (MotorController.jitter_summary)
+    
+    def speed(self):
+        """Effective (pulse delay us, step delay ms) for this station's motor."""
+        pulse = CONFIG.PULSE_DELAY_US if self.pulse_delay_us is None else self.pulse_delay_us
+        step = CONFIG.STEP_DELAY_MS if self.step_delay_ms is None else self.step_delay_ms
+        return pulse, step
+    
+    def executor(self, subsystem):
+        """AsyncCore executor name for this station's motor/camera/storage jobs."""
+        return f"{subsystem}.{self.name}"
+    
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'pins': [self.gpio_pulse, self.gpio_direction, self.gpio_enable],
+            'camera_index': self.camera_index,
+            'storage_path': self.storage_path,
+            'calibration_factor': self.calibration_factor,
+        }
+
+
+def build_stations():
+    """Station objects from CONFIG.STATIONS (first entry keeps the legacy file names)."""
+    stations = []
+    for i, spec in enumerate(CONFIG.STATIONS):
+        spec = dict(spec)
+        name = str(spec.pop("name", chr(ord("A") + i)))
+        if i > 0:
+            base = os.path.dirname(__file__)
+            spec.setdefault("storage_path", f"{CONFIG.LOCAL_STORAGE_PATH}_{name}")
+            spec.setdefault("calibration_file", os.path.join(base, f"calibration_{name}.json"))
+            spec.setdefault("position_file", os.path.join(base, f"position_{name}.json"))
+            spec.setdefault("profile_file", os.path.join(base, f"motion_profile_{name}.json"))
+        spec.setdefault("camera_index", i)
+        stations.append(Station(name, **spec))
+    return stations
+
+STATIONS = build_stations()
 
 # =============================================================================
 # HARDWARE IMPORTS
 # =============================================================================
+# Heavy libraries (gpiozero, Picamera2/libcamera, PIL, OpenCV) are imported on
+# first use, so the menu appears without waiting for them and only the
+# subsystem actually used gets loaded. Availability is probed with find_spec,
+# which locates a module without executing it.
+IMPORT_TIMINGS = {}   # module -> seconds spent importing it
+INIT_TIMINGS = {}     # subsystem -> seconds spent initialising it (last run)
+STARTUP_TIMINGS = {}  # milestone -> seconds since process start (first occurrence)
+
+def record_startup(milestone):
+    """Record the first time a startup milestone is reached."""
+    if milestone not in STARTUP_TIMINGS:
+        STARTUP_TIMINGS[milestone] = time.perf_counter() - STARTUP_T0
+
+def module_available(*names):
+    try:
+        return all(importlib.util.find_spec(name) is not None for name in names)
+    except (ImportError, ValueError):
+        return False
+
+class LazyModule:
+    """Stand-in for a module (or one of its attributes) imported on first use."""
+    
+    def __init__(self, name, attr=None):
+        self._name = name
+        self._attr = attr
+        self._target = None
+    
+    def _load(self):
+        if self._target is None:
+            start = time.perf_counter()
+            target = importlib.import_module(self._name)
+            IMPORT_TIMINGS.setdefault(self._name, time.perf_counter() - start)
+            self._target = getattr(target, self._attr) if self._attr else target
+        return self._target
+    
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+    
+    def __call__(self, *args, **kwargs):
+        return self._load()(*args, **kwargs)
+
 # Using gpiozero for Raspberry Pi 5 compatibility (RPi.GPIO does NOT work on Pi 5)
-try:
-    from gpiozero import OutputDevice
-    GPIO_AVAILABLE = True
-except ImportError:
-    GPIO_AVAILABLE = False
+GPIO_AVAILABLE = module_available("gpiozero")
+if GPIO_AVAILABLE:
+    OutputDevice = LazyModule("gpiozero", "OutputDevice")
+else:
     # Mock for development on non-Pi systems
     class OutputDevice:
         def __init__(self, pin, initial_value=False):
@@ -78,25 +344,455 @@ except ImportError:
         def close(self):
             pass
 
-try:
-    from picamera2 import Picamera2, Preview
-    from libcamera import controls
-    CAMERA_AVAILABLE = True
-except ImportError:
-    CAMERA_AVAILABLE = False
-    Preview = None
-
-try:
-    from PIL import Image
-    PIL_AVAILABLE = True
-except ImportError:
-    PIL_AVAILABLE = False
-
-try:
-    import cv2
-    CV2_AVAILABLE = True
-except ImportError:
-    CV2_AVAILABLE = False
+CAMERA_AVAILABLE = module_available("picamera2", "libcamera")
+Picamera2 = LazyModule("picamera2", "Picamera2")
+Preview = LazyModule("picamera2", "Preview") if CAMERA_AVAILABLE else None
+controls = LazyModule("libcamera", "controls")
+
+PIL_AVAILABLE = module_available("PIL")
+Image = LazyModule("PIL.Image")
+
+CV2_AVAILABLE = module_available("cv2")
+cv2 = LazyModule("cv2")
+
+NUMPY_AVAILABLE = module_available("numpy")
+np = LazyModule("numpy")
+
+# Ships with picamera2; encodes JPEG straight from YUV planes
+SIMPLEJPEG_AVAILABLE = module_available("simplejpeg")
+simplejpeg = LazyModule("simplejpeg")
+
+# =============================================================================
+# HARDWARE SIMULATOR
+# =============================================================================
+# With CONFIG.SIMULATOR (or TABLE_SIMULATOR=1) gpiozero and Picamera2 are
+# replaced by models, so the real motor, FrameHub and capture code runs on any
+# Linux machine. Every GPIO edge is recorded and moves a simulated table (too
+# fast a pulse train loses steps). The camera paces requests at the sensor frame
+# rate, applies controls a few frames late, runs AF cycles, and renders the part
+# at the table's physical angle, at the configured resolution and format. Frame
+# content depends only on the angle, the lens and the exposure, so runs are
+# repeatable.
+
+class SimTurntable:
+    """Physical table of one station, moved by edges on its pulse/direction/enable pins."""
+    
+    def __init__(self, station):
+        self.station = station
+        self._steps = None  # physical microsteps from home, read when first needed
+        self.forward = False
+        self.enabled = False
+        self.last_pulse = None
+        self.last_step = 0.0
+        self.pulses = 0
+        self.missed_steps = 0
+    
+    @property
+    def steps(self):
+        if self._steps is None:
+            # The table is physically where the last run left it
+            self._steps = load_position(self.station.position_file)['position_steps']
+        return self._steps
+    
+    @property
+    def angle(self):
+        return (self.steps * CONFIG.DEGREES_PER_STEP / CONFIG.SIM_CALIBRATION_FACTOR) % 360
+    
+    def edge(self, pin, level, now):
+        if pin == self.station.gpio_direction:
+            self.forward = bool(level)
+        elif pin == self.station.gpio_enable:
+            self.enabled = not level  # DM556 ENA is active LOW
+        elif pin == self.station.gpio_pulse and level:
+            self.pulses += 1
+            stalled = (self.last_pulse is not None
+                       and (now - self.last_pulse) * 1e6 < CONFIG.SIM_MIN_STEP_INTERVAL_US)
+            self.last_pulse = now
+            if not self.enabled:
+                return
+            if stalled:
+                self.missed_steps += 1
+                return
+            self._steps = self.steps + (1 if self.forward else -1)
+            self.last_step = now
+    
+    def moving(self, window):
+        return time.monotonic() - self.last_step < window
+
+
+class SimHardware:
+    """Edge log and turntables shared by every simulated device."""
+    
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self.lock = threading.Lock()
+        self.edges = collections.deque(maxlen=CONFIG.SIM_EDGE_HISTORY)
+        self.edge_count = 0
+        self.log = open(CONFIG.SIM_EDGE_LOG, 'a', buffering=1 << 16) if CONFIG.SIM_EDGE_LOG else None
+        self.tables = {station.name: SimTurntable(station) for station in STATIONS}
+        self._pins = {}
+        for table in self.tables.values():
+            station = table.station
+            for pin in (station.gpio_pulse, station.gpio_direction, station.gpio_enable):
+                self._pins[pin] = table
+        self.scene = None
+    
+    def edge(self, pin, level):
+        now = time.monotonic()
+        with self.lock:
+            self.edge_count += 1
+            self.edges.append((now - self.t0, pin, level))
+            if self.log is not None:
+                self.log.write(f"{now - self.t0:.6f},{pin},{level}\n")
+            table = self._pins.get(pin)
+            if table is not None:
+                table.edge(pin, level, now)
+    
+    def table_for_camera(self, camera_index):
+        for table in self.tables.values():
+            if table.station.camera_index == camera_index:
+                return table
+        return next(iter(self.tables.values()))
+    
+    def stats(self, station):
+        table = self.tables[station.name]
+        return {
+            'physical_angle': round(table.angle, 3),
+            'pulses': table.pulses,
+            'missed_steps': table.missed_steps,
+            'gpio_edges': self.edge_count,
+        }
+    
+    def close(self):
+        if self.log is not None:
+            self.log.close()
+            self.log = None
+
+
+class SimOutputDevice:
+    """gpiozero OutputDevice stand-in reporting every level change to the simulator."""
+    
+    def __init__(self, pin, initial_value=False):
+        self.pin = pin
+        self.value = 1 if initial_value else 0
+        SIM.edge(pin, self.value)
+    
+    def on(self):
+        self._set(1)
+    
+    def off(self):
+        self._set(0)
+    
+    def _set(self, value):
+        if value != self.value:
+            self.value = value
+            SIM.edge(self.pin, value)
+    
+    def close(self):
+        pass
+
+
+class SimControls:
+    """The libcamera control enums the app uses, with libcamera's values."""
+    
+    class AfModeEnum:
+        Manual, Auto, Continuous = 0, 1, 2
+    
+    class AfSpeedEnum:
+        Normal, Fast = 0, 1
+    
+    class AfStateEnum:
+        Idle, Scanning, Focused, Failed = 0, 1, 2, 3
+    
+    class AfTriggerEnum:
+        Start, Cancel = 0, 1
+
+
+class SimScene:
+    """Synthetic part on the turntable, or a stored scan replayed by angle.
+    
+    The synthetic part is a textured cylinder standing on the table rim, drawn
+    at a quarter of the sensor resolution. Both are 360-degree texture strips
+    sampled through the cylinder projection for the requested angle. The rim
+    carries 10-degree ticks and a fiducial at 0 degrees.
+    """
+    
+    PX_PER_DEGREE = 2
+    
+    def __init__(self, replay_dir=None):
+        self.replay = self._index(replay_dir) if replay_dir else None
+        self._cache = collections.OrderedDict()
+        if self.replay is None:
+            self._build()
+    
+    def _build(self):
+        rng = np.random.default_rng(CONFIG.SIM_SEED)
+        width, height = CONFIG.CAMERA_RESOLUTION[0] // 4, CONFIG.CAMERA_RESOLUTION[1] // 4
+        strip = 360 * self.PX_PER_DEGREE
+        ramp = np.linspace(70, 120, height, dtype=np.float32)[:, None, None]
+        self.background = np.broadcast_to(ramp, (height, width, 3)).astype(np.uint8)
+        self.part_rows = slice(int(0.12 * height), int(0.76 * height))
+        self.rim_rows = slice(int(0.80 * height), int(0.94 * height))
+        part = rng.random((self.part_rows.stop - self.part_rows.start, strip, 3)) * 255
+        part = cv2.GaussianBlur(part.astype(np.float32), (0, 0), 1.5)
+        part[::24] *= 0.6  # horizontal grooves
+        self.part = np.clip(part * [0.9, 0.8, 0.7] + 40, 0, 255).astype(np.uint8)
+        rim = np.full((self.rim_rows.stop - self.rim_rows.start, strip, 3), 150, np.uint8)
+        rim[:, ::10 * self.PX_PER_DEGREE] = 60
+        fiducial = slice(3 * rim.shape[0] // 8, 5 * rim.shape[0] // 8)  # fits in FIDUCIAL_TEMPLATE
+        rim[fiducial, :3 * self.PX_PER_DEGREE] = 10
+        self.rim = rim
+        self.part_columns = self._projection(width, 0.5 * width, 0.2 * width)
+        self.rim_columns = self._projection(width, 0.5 * width, 0.4 * width)
+    
+    @staticmethod
+    def _projection(width, centre, radius):
+        """Visible columns of a cylinder: their angle offset and Lambert shading."""
+        lo, hi = int(centre - radius), int(centre + radius)
+        u = (np.arange(lo, hi) + 0.5 - centre) / radius
+        return slice(lo, hi), np.degrees(np.arcsin(np.clip(u, -1, 1))), np.sqrt(1 - np.clip(u, -1, 1) ** 2)
+    
+    @staticmethod
+    def _index(folder):
+        """(angle, path) pairs of a stored scan, from its manifest or the "..._015deg.jpg" names."""
+        try:
+            with open(os.path.join(folder, "manifest.json"), 'r') as f:
+                images = json.load(f)['images']
+            return sorted((image['angle'], os.path.join(folder, image['file'])) for image in images)
+        except (OSError, ValueError, KeyError):
+            suffix = f"deg.{CONFIG.FILE_EXTENSION}"
+            return sorted((int(name[:-len(suffix)].rsplit("_", 1)[1]), os.path.join(folder, name))
+                          for name in os.listdir(folder)
+                          if name.endswith(suffix) and name[:-len(suffix)].rsplit("_", 1)[-1].isdigit())
+    
+    def image(self, angle):
+        """BGR image of the part at `angle` (cached, at the scene's own resolution)."""
+        if self.replay is not None:
+            key = min(self.replay, key=lambda item: abs((item[0] - angle + 180) % 360 - 180))[1]
+        else:
+            key = round(angle, 2)
+        if key in self._cache:
+            self._cache.move_to_end(key)
+            return self._cache[key]
+        image = cv2.imread(key) if self.replay is not None else self._draw(angle)
+        self._cache[key] = image
+        while len(self._cache) > 4:
+            self._cache.popitem(last=False)
+        return image
+    
+    def _draw(self, angle):
+        frame = self.background.copy()
+        for rows, strip, (cols, offset, shade) in ((self.part_rows, self.part, self.part_columns),
+                                                   (self.rim_rows, self.rim, self.rim_columns)):
+            # Blend neighbouring strip columns so the table turns smoothly, not in strip pixels
+            position = (angle + offset) * self.PX_PER_DEGREE
+            index = np.floor(position).astype(np.int64)
+            weight = (position - index)[None, :, None]
+            left, right = strip[:, index % strip.shape[1]], strip[:, (index + 1) % strip.shape[1]]
+            frame[rows, cols] = ((left * (1 - weight) + right * weight) * shade[None, :, None]).astype(np.uint8)
+        return frame
+    
+    def render(self, angle, size, fmt, blur=0.0, gain=1.0, crop=None):
+        """Frame of `size` in `fmt` with defocus blur (full-res pixels) and exposure gain.
+        
+        crop is a ScalerCrop rectangle in full-resolution pixels.
+        """
+        image = self.image(angle)
+        sensor_width = CONFIG.CAMERA_RESOLUTION[0]
+        if crop is not None:
+            k = image.shape[1] / sensor_width
+            x, y, w, h = crop
+            image = image[int(y * k):int(round((y + h) * k)), int(x * k):int(round((x + w) * k))]
+            sensor_width = w
+        if gain != 1.0:
+            image = cv2.convertScaleAbs(image, alpha=gain)
+        scale = size[0] / sensor_width
+        if size[0] <= image.shape[1]:
+            image = cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+            if blur * scale > 0.3:
+                image = cv2.GaussianBlur(image, (0, 0), blur * scale)
+        else:
+            source = blur * image.shape[1] / sensor_width
+            if source > 0.3:
+                image = cv2.GaussianBlur(image, (0, 0), source)
+            image = cv2.resize(image, size, interpolation=cv2.INTER_LINEAR)
+        if fmt == "YUV420":
+            return cv2.cvtColor(image, cv2.COLOR_BGR2YUV_I420)
+        # Like Picamera2, "BGR888" arrays are in R,G,B order
+        return np.ascontiguousarray(image[..., ::-1])
+
+
+class SimRequest:
+    """One simulated completed request: metadata plus lazily rendered streams."""
+    
+    def __init__(self, config, metadata, angle, blur, gain):
+        self.config = config
+        self.metadata = metadata
+        self.angle = angle
+        self.blur = blur
+        self.gain = gain
+        self.crop = config['controls'].get("ScalerCrop")
+    
+    def get_metadata(self):
+        return dict(self.metadata)
+    
+    def make_array(self, name):
+        stream = self.config[name]
+        return SIM.scene.render(self.angle, tuple(stream["size"]), stream["format"], self.blur, self.gain,
+                                self.crop)
+    
+    def save(self, name, filepath):
+        frame = self.make_array(name)
+        if self.config[name]["format"] == "YUV420":
+            return write_still_yuv420(filepath, frame)
+        return write_still(filepath, rgb_to_bgr(frame))
+    
+    def release(self):
+        pass
+
+
+class SimPicamera2:
+    """Picamera2 stand-in: frame-paced requests of the simulated table with AF/AE lag."""
+    
+    NOMINAL_EXPOSURE = 10000  # us; exposure at which the scene renders unchanged
+    
+    def __init__(self, camera_num=0):
+        self.table = SIM.table_for_camera(camera_num)
+        if SIM.scene is None:
+            SIM.scene = SimScene(CONFIG.SIM_REPLAY_DIR)
+        full = (0, 0, *CONFIG.CAMERA_RESOLUTION)
+        self.camera_controls = {"ScalerCrop": ((0, 0, 64, 64), full, full)}  # (min, max, default)
+        self.config = None
+        self.period = 1.0 / CONFIG.SIM_STILL_FPS
+        self.t0 = None
+        self.frame = 0  # last frame whose state has been simulated
+        self.base_frame = 0
+        self.pending = []  # (frame index, controls) not yet applied
+        self.state = {'AfMode': SimControls.AfModeEnum.Continuous, 'LensPosition': 1.0,
+                      'AeEnable': True, 'ExposureTime': self.NOMINAL_EXPOSURE, 'AnalogueGain': 1.0}
+        self.lens = 1.0
+        self.af_state = SimControls.AfStateEnum.Idle
+        self.af_done = None
+        self._lock = threading.Lock()
+        self._mode = threading.RLock()  # held across mode switches
+    
+    def create_still_configuration(self, main=None, lores=None, buffer_count=1, queue=True, controls=None):
+        return {'kind': "still", 'main': main, 'lores': lores, 'buffer_count': buffer_count,
+                'controls': dict(controls or {})}
+    
+    def create_video_configuration(self, main=None, lores=None, buffer_count=6, controls=None):
+        return {'kind': "video", 'main': main, 'lores': lores, 'buffer_count': buffer_count,
+                'controls': dict(controls or {})}
+    
+    def configure(self, config):
+        self.config = config
+        fps = config['controls'].get("FrameRate", CONFIG.VIDEO_MODE_FPS) if config['kind'] == "video" \
+            else CONFIG.SIM_STILL_FPS
+        self.period = 1.0 / fps
+    
+    def start(self):
+        self.t0 = time.monotonic()
+        self.base_frame = self.frame
+    
+    def stop(self):
+        self.t0 = None
+    
+    def close(self):
+        self.t0 = None
+    
+    def set_controls(self, values):
+        with self._lock:
+            self.pending.append((self.frame + CONFIG.SIM_CONTROL_LATENCY, dict(values)))
+    
+    def switch_mode(self, config):
+        with self._mode:
+            time.sleep(CONFIG.SIM_SWITCH_TIME)
+            self.configure(config)
+            self.start()
+        return config
+    
+    def switch_mode_and_capture_request(self, config):
+        with self._mode:
+            previous = self.config
+            self.switch_mode(config)
+            request = self.capture_request()
+            self.switch_mode(previous)
+        return request
+    
+    def capture_request(self):
+        with self._mode:
+            if self.t0 is None:
+                raise RuntimeError("camera not started")
+            period, t0, base = self.period, self.t0, self.base_frame
+        now = time.monotonic()
+        elapsed = int((now - t0) / period) + 1
+        time.sleep(max(0.0, t0 + elapsed * period - time.monotonic()))
+        return self._request(base + elapsed, t0 + elapsed * period)
+    
+    def _focus(self, angle):
+        """Lens position (dioptres) that focuses the part; it is not round, so it varies."""
+        return 2.0 + 0.3 * np.sin(np.radians(angle))
+    
+    def _advance(self, index, angle):
+        """Step the AF / AE state machines up to frame `index`."""
+        enums = SimControls
+        while self.frame < index:
+            self.frame += 1
+            due = [values for when, values in self.pending if when <= self.frame]
+            self.pending = [(when, values) for when, values in self.pending if when > self.frame]
+            for values in due:
+                if values.get("AfTrigger") == enums.AfTriggerEnum.Start:
+                    self.af_state = enums.AfStateEnum.Scanning
+                    self.af_done = self.frame + CONFIG.SIM_AF_FRAMES
+                self.state.update({key: value for key, value in values.items() if key in self.state})
+            mode = self.state['AfMode']
+            if self.af_done is not None:
+                # Triggered AF cycle: scan for SIM_AF_FRAMES, then land on focus
+                if self.frame >= self.af_done:
+                    self.lens = self._focus(angle)
+                    self.af_state = enums.AfStateEnum.Focused
+                    self.af_done = None
+            elif mode != enums.AfModeEnum.Auto:
+                target = self.state['LensPosition'] if mode == enums.AfModeEnum.Manual else self._focus(angle)
+                move = max(-CONFIG.SIM_LENS_SPEED, min(CONFIG.SIM_LENS_SPEED, target - self.lens))
+                self.lens += move
+                if mode == enums.AfModeEnum.Continuous:
+                    self.af_state = enums.AfStateEnum.Focused if abs(move) < 0.05 else enums.AfStateEnum.Scanning
+            if self.state['AeEnable']:
+                self.state['ExposureTime'] = self.NOMINAL_EXPOSURE
+                self.state['AnalogueGain'] = 1.0
+    
+    def _request(self, index, timestamp):
+        angle = self.table.angle
+        with self._lock:
+            self._advance(index, angle)
+            error = abs(self.lens - self._focus(angle))
+            gain = self.state['ExposureTime'] * self.state['AnalogueGain'] / self.NOMINAL_EXPOSURE
+            moving = self.table.moving(self.period)
+            metadata = {
+                "FocusFoM": int(2000 / (1 + (error / 0.3) ** 2) * (0.3 if moving else 1.0)),
+                "ExposureTime": int(self.state['ExposureTime']),
+                "AnalogueGain": float(self.state['AnalogueGain']),
+                "AfState": self.af_state,
+                "LensPosition": round(float(self.lens), 4),
+                "SensorTimestamp": int(timestamp * 1e9),
+                "AeLocked": self.frame - self.base_frame >= 3,
+            }
+        # Motion blur while the table turns, on top of defocus
+        blur = CONFIG.SIM_DEFOCUS_BLUR * error + (8.0 if moving else 0.0)
+        return SimRequest(self.config, metadata, angle, blur, gain)
+
+
+SIM = None
+if CONFIG.SIMULATOR:
+    if CV2_AVAILABLE and NUMPY_AVAILABLE:
+        SIM = SimHardware()
+        OutputDevice = SimOutputDevice
+        Picamera2 = SimPicamera2
+        controls = SimControls
+        GPIO_AVAILABLE = CAMERA_AVAILABLE = True
+    else:
+        print("  [SIM] The simulator needs OpenCV and NumPy - using the plain mocks")
 
 # =============================================================================
 # ASCII ART
@@ -157,8 +853,12 @@ LICENSE_TEXT = """
 # =============================================================================
 # UTILITY FUNCTIONS
 # =============================================================================
+HEADER_TEXT = PROJECT_TITLE + "\n" + LICENSE_TEXT
+
 def clear_screen():
-    os.system('cls' if os.name == 'nt' else 'clear')
+    """Clear the terminal with ANSI escapes (no subprocess)."""
+    sys.stdout.write("\033[2J\033[3J\033[H")
+    sys.stdout.flush()
 
 def progress_bar(current, total, prefix="Progress", length=50):
     percent = current / total if total > 0 else 0
@@ -168,22 +868,118 @@ def progress_bar(current, total, prefix="Progress", length=50):
     if current == total:
         print()
 
-def load_calibration():
+def timing_report():
+    """Lines describing import, init and startup milestone timings."""
+    lines = []
+    for title, timings in (("Imports", IMPORT_TIMINGS), ("Init", INIT_TIMINGS),
+                           ("Since start", STARTUP_TIMINGS)):
+        if timings:
+            lines.append(f"    {title + ':':<13}" + "  ".join(
+                f"{name} {seconds*1000:.0f}ms" for name, seconds in timings.items()))
+    return lines or ["    (nothing loaded yet)"]
+
+def display_available():
+    """True when a graphical display is attached (OpenCV windows can open)."""
+    return os.name == 'nt' or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+def file_sha256(filepath, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def file_crc32(filepath, chunk_size=1024 * 1024):
+    """CRC-32 of a file as zipfile records it, read in chunks."""
+    crc = 0
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            crc = zlib.crc32(chunk, crc)
+    return crc
+
+def load_calibration(station=None):
+    """Load a station's calibration factor (default: first station, mirrored in CONFIG)."""
+    station = station or STATIONS[0]
+    station.calibration_factor = 1.0
     try:
-        if os.path.exists(CALIBRATION_FILE):
-            with open(CALIBRATION_FILE, 'r') as f:
+        if os.path.exists(station.calibration_file):
+            with open(station.calibration_file, 'r') as f:
                 data = json.load(f)
-                CONFIG.CALIBRATION_FACTOR = data.get('calibration_factor', 1.0)
-                return CONFIG.CALIBRATION_FACTOR
+                station.calibration_factor = data.get('calibration_factor', 1.0)
     except Exception:
         pass
-    return 1.0
+    if station is STATIONS[0]:
+        CONFIG.CALIBRATION_FACTOR = station.calibration_factor
+    return station.calibration_factor
 
-def save_calibration(factor):
+def save_calibration(factor, station=None):
+    station = station or STATIONS[0]
     try:
-        with open(CALIBRATION_FILE, 'w') as f:
+        with open(station.calibration_file, 'w') as f:
             json.dump({'calibration_factor': factor}, f, indent=2)
-        CONFIG.CALIBRATION_FACTOR = factor
+        station.calibration_factor = factor
+        if station is STATIONS[0]:
+            CONFIG.CALIBRATION_FACTOR = factor
+        return True
+    except Exception:
+        return False
+
+def load_motion_profile(station=None):
+    """Apply a station's tuned motor timings from its motion profile, if any."""
+    station = station or STATIONS[0]
+    try:
+        if os.path.exists(station.profile_file):
+            with open(station.profile_file, 'r') as f:
+                profile = json.load(f)
+            station.pulse_delay_us = int(profile['pulse_delay_us'])
+            station.step_delay_ms = float(profile['step_delay_ms'])
+            return profile
+    except Exception:
+        pass
+    return None
+
+def save_motion_profile(profile, station=None):
+    station = station or STATIONS[0]
+    try:
+        with open(station.profile_file, 'w') as f:
+            json.dump(profile, f, indent=2)
+        station.pulse_delay_us = profile['pulse_delay_us']
+        station.step_delay_ms = profile['step_delay_ms']
+        return True
+    except Exception:
+        return False
+
+def load_position(path=None):
+    """Load persisted table position (absolute microsteps from home).
+    
+    'moving' is [from, to] when the last move never finished (power loss
+    mid-move): the table is somewhere between the two step positions.
+    """
+    path = path or POSITION_FILE
+    state = {'position_steps': 0, 'last_scan_clockwise': False, 'moving': None}
+    try:
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                data = json.load(f)
+                state['position_steps'] = int(data.get('position_steps', 0))
+                state['last_scan_clockwise'] = bool(data.get('last_scan_clockwise', False))
+                if data.get('moving'):
+                    state['moving'] = [int(steps) for steps in data['moving']]
+    except Exception:
+        pass
+    return state
+
+def save_position(state, path=None):
+    """Persist table position atomically so a crash never leaves a torn file."""
+    path = path or POSITION_FILE
+    try:
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
         return True
     except Exception:
         return False
@@ -191,18 +987,164 @@ def save_calibration(factor):
 # =============================================================================
 # MOTOR CONTROLLER
 # =============================================================================
+class MotionThread:
+    """Dedicated pulse thread for one motor; move commands arrive through a queue.
+    
+    On start the thread pins itself to one core and asks for SCHED_FIFO. Both
+    are Linux-only and FIFO needs CAP_SYS_NICE (or root); without them it runs
+    as a normal thread and `realtime` says so. While a command runs the GIL
+    switch interval of the whole process is shortened to MOTION_SWITCH_INTERVAL
+    (unless it is None), so Python threads busy with OpenCV or JPEG work hand
+    the interpreter back before the next pulse is due.
+    """
+    
+    _switch_lock = threading.Lock()
+    _active = 0
+    _saved_interval = None
+    
+    def __init__(self, name, cpu=None):
+        self.name = name
+        self.cpu = cpu
+        self.realtime = False
+        self.note = ""
+        self._queue = queue.Queue()
+        self._ready = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self._ready.wait(1.0)
+    
+    def _setup(self):
+        notes = []
+        if self.cpu is not None and hasattr(os, "sched_setaffinity"):
+            try:
+                if self.cpu in os.sched_getaffinity(0):
+                    os.sched_setaffinity(0, {self.cpu})
+                else:
+                    notes.append(f"CPU {self.cpu} not available")
+                    self.cpu = None
+            except OSError as e:
+                notes.append(f"affinity: {e.strerror}")
+                self.cpu = None
+        else:
+            self.cpu = None
+        if hasattr(os, "sched_setscheduler"):
+            try:
+                os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(CONFIG.MOTION_RT_PRIORITY))
+                self.realtime = True
+            except OSError as e:
+                notes.append(f"SCHED_FIFO: {e.strerror}")
+        self.note = "; ".join(notes)
+    
+    @classmethod
+    def _fast_switching(cls, enable):
+        with cls._switch_lock:
+            if enable:
+                if cls._active == 0:
+                    cls._saved_interval = sys.getswitchinterval()
+                    sys.setswitchinterval(CONFIG.MOTION_SWITCH_INTERVAL)
+                cls._active += 1
+            else:
+                cls._active -= 1
+                if cls._active == 0:
+                    sys.setswitchinterval(cls._saved_interval)
+    
+    def _run(self):
+        self._setup()
+        self._ready.set()
+        while True:
+            job = self._queue.get()
+            if job is None:
+                return
+            future, fn, args, kwargs = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            fast = CONFIG.MOTION_SWITCH_INTERVAL is not None
+            if fast:
+                self._fast_switching(True)
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                if fast:
+                    self._fast_switching(False)
+    
+    def call(self, fn, *args, **kwargs):
+        """Run fn on the pulse thread and wait for its result."""
+        if threading.current_thread() is self._thread or not self._thread.is_alive():
+            return fn(*args, **kwargs)
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future.result()
+    
+    def describe(self):
+        mode = f"SCHED_FIFO {CONFIG.MOTION_RT_PRIORITY}" if self.realtime else "normal priority"
+        where = f"CPU {self.cpu}" if self.cpu is not None else "any CPU"
+        return f"{mode} on {where}" + (f" ({self.note})" if self.note else "")
+    
+    def close(self):
+        self._queue.put(None)
+        self._thread.join(timeout=2.0)
+
+
+def wait_until(deadline_ns):
+    """Sleep until shortly before deadline_ns (perf_counter_ns), then spin to it."""
+    remaining = deadline_ns - time.perf_counter_ns() - CONFIG.MOTION_SPIN_US * 1000
+    if remaining > 0:
+        time.sleep(remaining / 1e9)
+    while time.perf_counter_ns() < deadline_ns:
+        pass
+
+
 class MotorController:
-    """Controls NEMA 23 stepper motor via DM556 driver using gpiozero (Pi 5 compatible)."""
+    """Controls NEMA 23 stepper motor via DM556 driver using gpiozero (Pi 5 compatible).
     
-    def __init__(self):
-        self.current_angle = 0.0
+    Position is tracked as an absolute integer number of microsteps from home
+    and persisted to the station's position file, so the table angle survives
+    restarts and per-move rounding never accumulates over a revolution.
+    """
+    
+    def __init__(self, station=None):
+        start = time.perf_counter()
+        self.station = station or STATIONS[0]
         self.is_enabled = False
+        # Set from another thread to stop a move between pulses (scan abort)
+        self.abort_event = threading.Event()
+        
+        state = load_position(self.station.position_file)
+        self.position_steps = state['position_steps']
+        self.last_scan_clockwise = state['last_scan_clockwise']
+        # [from, to] steps of a move cut short by a power loss; the position is not trusted
+        self.interrupted_move = state['moving']
+        if self.interrupted_move:
+            print(f"  [MOTOR] Last move ({self.interrupted_move[0]} -> {self.interrupted_move[1]} steps) "
+                  f"never finished - position uncertain, re-home or run the vision check")
+        # Commanded angle (unwrapped, degrees). Steps are always derived from
+        # this absolute target, so rounding error stays below one microstep.
+        self._target_degrees = self.position_steps / self.steps_per_degree()
         
         # Initialize GPIO pins using gpiozero OutputDevice
         # initial_value=False means pin starts LOW, True means HIGH
-        self.pulse_pin = OutputDevice(CONFIG.GPIO_PULSE, initial_value=False)
-        self.direction_pin = OutputDevice(CONFIG.GPIO_DIRECTION, initial_value=False)
-        self.enable_pin = OutputDevice(CONFIG.GPIO_ENABLE, initial_value=True)  # HIGH = disabled
+        self.pulse_pin = OutputDevice(self.station.gpio_pulse, initial_value=False)
+        self.direction_pin = OutputDevice(self.station.gpio_direction, initial_value=False)
+        self.enable_pin = OutputDevice(self.station.gpio_enable, initial_value=True)  # HIGH = disabled
+        
+        # Pulses are generated on a pinned (and, where permitted, SCHED_FIFO) thread
+        cpus = CONFIG.MOTION_CPUS
+        index = STATIONS.index(self.station) if self.station in STATIONS else 0
+        self.motion = MotionThread(f"motion-{self.station.name}", cpus[index % len(cpus)] if cpus else None)
+        self.jitter = collections.deque(maxlen=200)  # pulse-period stats per move
+        self.move_count = 0
+        INIT_TIMINGS["motor"] = time.perf_counter() - start
+    
+    def steps_per_degree(self):
+        """Microsteps per degree of table rotation, including station calibration."""
+        return self.station.calibration_factor / CONFIG.DEGREES_PER_STEP
+    
+    @property
+    def current_angle(self):
+        """Table angle in [0, 360) derived from the absolute step position."""
+        return (self.position_steps / self.steps_per_degree()) % 360
     
     def enable(self):
         """Enable motor driver (ENA is active LOW on DM556)."""
@@ -215,66 +1157,516 @@ class MotorController:
         self.enable_pin.on()  # HIGH = disabled
         self.is_enabled = False
     
-    def step(self, num_steps, delay_us=None):
-        """Execute step pulses."""
+    def step(self, num_steps, delay_us=None, direction=1):
+        """Execute step pulses on the motion thread, updating the absolute position per pulse."""
+        return self.motion.call(self._step, num_steps, delay_us, direction)
+    
+    def _step(self, num_steps, delay_us, direction):
+        pulse_us, step_ms = self.station.speed()
         if delay_us is None:
-            delay_us = CONFIG.PULSE_DELAY_US
-        delay_s = delay_us / 1_000_000
+            delay_us = pulse_us
+        high_ns = int(delay_us * 1000)
+        period_ns = 2 * high_ns + int(step_ms * 1_000_000)
+        edges = []
+        next_edge = time.perf_counter_ns()
         for _ in range(num_steps):
+            if self.abort_event.is_set():
+                break
+            wait_until(next_edge)
+            edge = time.perf_counter_ns()
             self.pulse_pin.on()
-            time.sleep(delay_s)
+            edges.append(edge)
+            wait_until(edge + high_ns)
             self.pulse_pin.off()
-            time.sleep(delay_s)
-            time.sleep(CONFIG.STEP_DELAY_MS / 1000)
+            self.position_steps += direction
+            # Paced from the actual edge: a late pulse never makes the next one early
+            next_edge = edge + period_ns
+        self._record_jitter(edges, period_ns)
+    
+    def _record_jitter(self, edges, period_ns):
+        """Pulse-period statistics (microseconds) of one move."""
+        if len(edges) < 2:
+            return
+        periods = sorted((b - a) / 1000 for a, b in zip(edges, edges[1:]))
+        self.move_count += 1
+        self.jitter.append({
+            'move': self.move_count,
+            'pulses': len(edges),
+            'expected_us': period_ns / 1000,
+            'min_us': round(periods[0], 1),
+            'mean_us': round(sum(periods) / len(periods), 1),
+            'p99_us': round(periods[min(len(periods) - 1, int(0.99 * len(periods)))], 1),
+            'max_us': round(periods[-1], 1),
+        })
+    
+    def jitter_summary(self, since=0):
+        """Worst-case pulse-period figures over the moves after move number `since`."""
+        moves = [move for move in self.jitter if move['move'] > since]
+        if not moves:
+            return None
+        return {
+            'thread': self.motion.describe(),
+            'moves': len(moves),
+            'expected_us': moves[-1]['expected_us'],
+            'min_us': min(move['min_us'] for move in moves),
+            'mean_us': round(sum(m['mean_us'] * m['pulses'] for m in moves) / sum(m['pulses'] for m in moves), 1),
+            'p99_us': max(move['p99_us'] for move in moves),
+            'max_us': max(move['max_us'] for move in moves),
+            'last': moves[-1],
+        }
     
     def rotate_degrees(self, degrees, clockwise=True):
         """Rotate motor by specified degrees."""
         if not self.is_enabled:
             self.enable()
-        calibrated = degrees * CONFIG.CALIBRATION_FACTOR
-        steps = round(calibrated / CONFIG.DEGREES_PER_STEP)
+        self._target_degrees += degrees if clockwise else -degrees
+        target_steps = round(self._target_degrees * self.steps_per_degree())
+        self._move_to_steps(target_steps)
+        return degrees
+    
+    def move_to(self, angle):
+        """Move to an absolute table angle, taking the shortest direction."""
+        current = self._target_degrees % 360
+        delta = (angle - current + 180) % 360 - 180
+        if delta:
+            self.rotate_degrees(abs(delta), clockwise=delta > 0)
+        return self.current_angle
+    
+    def move_to_steps(self, target_steps):
+        """Move to an absolute microstep position (e.g. a recorded scan position)."""
+        if not self.is_enabled:
+            self.enable()
+        self._target_degrees = target_steps / self.steps_per_degree()
+        self._move_to_steps(target_steps)
+        return self.current_angle
+    
+    def _move_to_steps(self, target_steps):
+        """Pulse the driver until position_steps reaches target_steps."""
+        steps = target_steps - self.position_steps
+        if steps == 0:
+            return
         
         # Set direction
-        if clockwise:
+        if steps > 0:
             self.direction_pin.on()
         else:
             self.direction_pin.off()
         time.sleep(0.001)
         
-        self.step(steps)
-        
-        if clockwise:
-            self.current_angle = (self.current_angle + degrees) % 360
-        else:
-            self.current_angle = (self.current_angle - degrees) % 360
-        return degrees
+        # Persisted before the first pulse: a power loss mid-move is detectable at the next start
+        self.save_state(moving=[self.position_steps, target_steps])
+        try:
+            self.step(abs(steps), direction=1 if steps > 0 else -1)
+        finally:
+            if self.position_steps != target_steps:
+                # Interrupted mid-move: re-anchor the target on where we stopped
+                self._target_degrees = self.position_steps / self.steps_per_degree()
+            self.save_state()
     
-    def rotate_increment(self):
+    def rotate_increment(self, clockwise=True):
         """Rotate by configured increment."""
-        self.rotate_degrees(CONFIG.ROTATION_INCREMENT, clockwise=True)
+        self.rotate_degrees(CONFIG.ROTATION_INCREMENT, clockwise=clockwise)
         return self.current_angle
     
     def reset_position(self):
-        """Reset angle tracking to zero."""
-        self.current_angle = 0.0
+        """Set home (zero) at the current physical table position."""
+        self.set_position_steps(0)
+    
+    def set_position_steps(self, steps):
+        """Declare the current physical position to be `steps` (re-home, missed-step recovery)."""
+        self.interrupted_move = None
+        self.position_steps = steps
+        self._target_degrees = steps / self.steps_per_degree()
+        self.save_state()
+    
+    def save_state(self, moving=None):
+        """Persist absolute position and last scan direction (moving = [from, to] of a move starting)."""
+        state = {
+            'position_steps': self.position_steps,
+            'last_scan_clockwise': self.last_scan_clockwise,
+        }
+        # An unresolved interrupted move stays on record until the table is re-homed
+        moving = moving or self.interrupted_move
+        if moving is not None:
+            state['moving'] = moving
+        return save_position(state, self.station.position_file)
     
     def cleanup(self):
         """Release GPIO resources."""
         self.disable()
+        self.save_state()
+        self.motion.close()
+        summary = self.jitter_summary()
+        if summary is not None:
+            self.station.motion_stats = summary
         self.pulse_pin.close()
         self.direction_pin.close()
         self.enable_pin.close()
 
+# =============================================================================
+# IMAGE FUSION
+# =============================================================================
+# Burst frames are merged with per-tile weights: each frame's score map is
+# averaged over BURST_FUSION_BLOCK tiles, smoothed, normalised across frames and
+# bilinearly upsampled band by band, so full-resolution float buffers never
+# exist for more than a band of rows at a time.
+
+def sharpness_score(frame):
+    """Laplacian energy of the green channel (focus measure)."""
+    g = frame[..., 1].astype(np.float32)
+    lap = np.zeros_like(g)
+    lap[1:-1, 1:-1] = 4 * g[1:-1, 1:-1] - g[:-2, 1:-1] - g[2:, 1:-1] - g[1:-1, :-2] - g[1:-1, 2:]
+    return lap * lap
+
+def exposure_score(frame):
+    """Well-exposedness: Gaussian around mid-grey of the green channel."""
+    luma = frame[..., 1].astype(np.float32) / 255.0
+    return np.exp(-((luma - 0.5) ** 2) / (2 * 0.2 ** 2))
+
+def _tile_means(score, block):
+    h, w = score.shape
+    h, w = max(h - h % block, block), max(w - w % block, block)
+    return score[:h, :w].reshape(h // block, block, w // block, block).mean(axis=(1, 3))
+
+def _box3(small):
+    padded = np.pad(small, 1, mode="edge")
+    h, w = small.shape
+    return sum(padded[dy:dy + h, dx:dx + w] for dy in range(3) for dx in range(3)) / 9.0
+
+def _interp_axis(size_out, size_in, block):
+    pos = np.clip((np.arange(size_out) + 0.5) / block - 0.5, 0, size_in - 1)
+    i0 = np.floor(pos).astype(np.int64)
+    i1 = np.minimum(i0 + 1, size_in - 1)
+    return i0, i1, (pos - i0).astype(np.float32)
+
+def fuse_frames(frames, score_fn, power=1.0, block=None, band=256):
+    """Weighted blend of same-size uint8 frames by per-tile score_fn weights."""
+    block = block or CONFIG.BURST_FUSION_BLOCK
+    small = np.stack([_box3(_tile_means(score_fn(frame), block)) for frame in frames])
+    small = small.astype(np.float32) ** power + 1e-6
+    small /= small.sum(axis=0, keepdims=True)
+    h, w = frames[0].shape[:2]
+    y0, y1, wy = _interp_axis(h, small.shape[1], block)
+    x0, x1, wx = _interp_axis(w, small.shape[2], block)
+    cols = small[:, :, x0] * (1 - wx) + small[:, :, x1] * wx
+    out = np.empty_like(frames[0])
+    for top in range(0, h, band):
+        rows = slice(top, min(top + band, h))
+        weight = cols[:, y0[rows]] * (1 - wy[rows, None]) + cols[:, y1[rows]] * wy[rows, None]
+        acc = sum(weight[i][..., None] * frames[i][rows] for i in range(len(frames)))
+        out[rows] = np.clip(acc + 0.5, 0, 255).astype(out.dtype)
+    return out
+
+def write_still(filepath, frame):
+    """Save a BGR still as JPEG at CAMERA_QUALITY."""
+    if CV2_AVAILABLE:
+        return bool(cv2.imwrite(filepath, frame, [cv2.IMWRITE_JPEG_QUALITY, CONFIG.CAMERA_QUALITY]))
+    Image.fromarray(frame[..., ::-1]).save(filepath, 'JPEG', quality=CONFIG.CAMERA_QUALITY)
+    return True
+
+def yuv420_planes(frame):
+    """Y, U, V views of a packed I420 array (height * 3/2 rows, as Picamera2 returns it)."""
+    h, w = frame.shape[0] * 2 // 3, frame.shape[1]
+    quarter = h // 4
+    return (frame[:h],
+            frame[h:h + quarter].reshape(h // 2, w // 2),
+            frame[h + quarter:h + 2 * quarter].reshape(h // 2, w // 2))
+
+def yuv420_to_bgr(frame):
+    return cv2.cvtColor(frame, cv2.COLOR_YUV2BGR_I420)
+
+def rgb_to_bgr(frame):
+    """Picamera2 "BGR888" arrays come out in R,G,B order (like the preview); swap for OpenCV."""
+    return np.ascontiguousarray(frame[..., ::-1])
+
+def write_still_yuv420(filepath, frame):
+    """Save an I420 still as JPEG without a BGR round trip when simplejpeg is available."""
+    if SIMPLEJPEG_AVAILABLE:
+        y, u, v = yuv420_planes(frame)
+        data = simplejpeg.encode_jpeg_yuv_planes(y, u, v, quality=CONFIG.CAMERA_QUALITY)
+        with open(filepath, 'wb') as f:
+            f.write(data)
+        return True
+    return write_still(filepath, yuv420_to_bgr(frame))
+
+def focus_stack(frames):
+    """All-in-focus still from frames taken at different lens positions."""
+    return fuse_frames(frames, sharpness_score, power=2.0)
+
+def exposure_fusion(frames):
+    """Single still from exposure brackets (no radiance map, no tone curve)."""
+    return fuse_frames(frames, exposure_score)
+
+# =============================================================================
+# QUALITY GATE
+# =============================================================================
+class QualityGate:
+    """Cheap sharpness / exposure check of each still, run before the table moves.
+    
+    Measures an ROI of the gate frame, resampled to QUALITY_WIDTH pixels:
+    Laplacian variance of the luma (green channel of a colour frame), mean
+    level and clipped fractions. The camera hands over the lores image of the
+    same request, or the middle frame of a burst, as luma at one scale
+    (CameraController._gate_input), so every capture path is judged alike.
+    Sharpness is judged against an absolute floor and against the median of
+    the frames passed so far in this scan, so it adapts to the part. A failed
+    frame may be re-shot QUALITY_RETRIES times per angle, within
+    QUALITY_SCAN_RETRY_BUDGET re-shoots per scan.
+    """
+    
+    def __init__(self):
+        self.passed_sharpness = []
+        self.retries_used = 0
+    
+    def measure(self, frame):
+        h, w = frame.shape[:2]
+        rx, ry, rw, rh = CONFIG.QUALITY_ROI
+        roi = frame[int(ry * h):int((ry + rh) * h), int(rx * w):int((rx + rw) * w)]
+        g = roi[..., 1] if roi.ndim == 3 else roi
+        width = CONFIG.QUALITY_WIDTH
+        if CV2_AVAILABLE:
+            size = (width, max(3, round(g.shape[0] * width / g.shape[1])))
+            g = cv2.resize(np.ascontiguousarray(g), size, interpolation=cv2.INTER_AREA)
+        else:
+            stride = max(1, g.shape[1] // width)
+            g = g[::stride, ::stride]
+        g = g.astype(np.float32)
+        lap = 4 * g[1:-1, 1:-1] - g[:-2, 1:-1] - g[2:, 1:-1] - g[1:-1, :-2] - g[1:-1, 2:]
+        return {
+            'sharpness': round(float(lap.var()), 2),
+            'mean': round(float(g.mean()), 1),
+            'clipped_low': round(float((g <= 4).mean()), 4),
+            'clipped_high': round(float((g >= 251).mean()), 4),
+        }
+    
+    def check(self, frame):
+        """Metrics and decision for one gate frame (passes when nothing can be measured)."""
+        if frame is None or not NUMPY_AVAILABLE:
+            return {'passed': True, 'skipped': True, 'reasons': []}
+        metrics = self.measure(frame)
+        reasons = []
+        if metrics['sharpness'] < CONFIG.QUALITY_MIN_SHARPNESS:
+            reasons.append("blurred")
+        if self.passed_sharpness:
+            median = sorted(self.passed_sharpness)[len(self.passed_sharpness) // 2]
+            metrics['reference'] = median
+            if metrics['sharpness'] < CONFIG.QUALITY_RELATIVE_SHARPNESS * median:
+                reasons.append("softer than scan")
+        low, high = CONFIG.QUALITY_MEAN_RANGE
+        if not low <= metrics['mean'] <= high:
+            reasons.append("underexposed" if metrics['mean'] < low else "overexposed")
+        if metrics['clipped_high'] > CONFIG.QUALITY_MAX_CLIPPED:
+            reasons.append("highlights clipped")
+        metrics['passed'] = not reasons
+        metrics['reasons'] = reasons
+        if metrics['passed']:
+            self.passed_sharpness.append(metrics['sharpness'])
+        return metrics
+    
+    def can_retry(self, attempt):
+        return attempt < CONFIG.QUALITY_RETRIES and self.retries_used < CONFIG.QUALITY_SCAN_RETRY_BUDGET
+
+# =============================================================================
+# AUTO ROI
+# =============================================================================
+def part_crop(frames, full_size):
+    """Crop (x, y, w, h) in full-resolution pixels holding the part in every view; None if not found.
+    
+    frames are lores BGR views from a pre-rotation. A pixel belongs to the part
+    if it changes across the views (the part turns, the backdrop does not) or
+    stands out from the median colour of the frame border. Blobs under
+    AUTO_ROI_MIN_AREA are dropped; the box gets AUTO_ROI_MARGIN per side,
+    is grown to the lores aspect on AUTO_ROI_ALIGN multiples and never shrinks
+    below the lores size. None when no such box fits the sensor.
+    """
+    grays = np.stack([cv2.cvtColor(cv2.GaussianBlur(frame, (5, 5), 0), cv2.COLOR_BGR2GRAY) for frame in frames])
+    mask = (grays.max(axis=0) - grays.min(axis=0)) > CONFIG.AUTO_ROI_MOTION
+    h, w = grays.shape[1:]
+    b = max(2, int(CONFIG.AUTO_ROI_BORDER * min(h, w)))
+    for frame in frames:
+        lab = cv2.cvtColor(cv2.GaussianBlur(frame, (5, 5), 0), cv2.COLOR_BGR2LAB).astype(np.float32)
+        border = np.concatenate([lab[:b].reshape(-1, 3), lab[-b:].reshape(-1, 3),
+                                 lab[:, :b].reshape(-1, 3), lab[:, -b:].reshape(-1, 3)])
+        mask |= np.linalg.norm(lab - np.median(border, axis=0), axis=2) > CONFIG.AUTO_ROI_CONTRAST
+    mask = cv2.morphologyEx(mask.astype(np.uint8), cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+    count, _, stats, _ = cv2.connectedComponentsWithStats(mask)
+    boxes = [stats[i, :4] for i in range(1, count)
+             if stats[i, cv2.CC_STAT_AREA] >= CONFIG.AUTO_ROI_MIN_AREA * h * w]
+    if not boxes:
+        return None
+    x0 = min(box[0] for box in boxes)
+    y0 = min(box[1] for box in boxes)
+    x1 = max(box[0] + box[2] for box in boxes)
+    y1 = max(box[1] + box[3] for box in boxes)
+    # Lores -> full resolution, plus margin
+    fw, fh = full_size
+    sx, sy = fw / w, fh / h
+    mx, my = CONFIG.AUTO_ROI_MARGIN * (x1 - x0) * sx, CONFIG.AUTO_ROI_MARGIN * (y1 - y0) * sy
+    left, top = x0 * sx - mx, y0 * sy - my
+    right, bottom = x1 * sx + mx, y1 * sy + my
+    # The lores stream keeps its size, so the crop takes its aspect (or preview and gate are stretched):
+    # width = a * unit * n, height = b * unit * n, with both sides on AUTO_ROI_ALIGN multiples
+    ax, ay = CONFIG.AUTO_ROI_ALIGN
+    pw, ph = CONFIG.CAMERA_PREVIEW_SIZE
+    a, b = pw // math.gcd(pw, ph), ph // math.gcd(pw, ph)
+    unit = math.lcm(ax // math.gcd(a, ax), ay // math.gcd(b, ay))
+    n = max(-(-max(right - left, pw) // (a * unit)), -(-max(bottom - top, ph) // (b * unit)))
+    if n > min(fw // (a * unit), fh // (b * unit)):
+        return None  # the part needs more than the largest preview-shaped crop
+    width, height = int(a * unit * n), int(b * unit * n)
+    # Keep the box centred, shifted back inside the frame
+    cx, cy = (left + right) / 2, (top + bottom) / 2
+    x = int(min(max(cx - width / 2, 0), fw - width)) & ~1
+    y = int(min(max(cy - height / 2, 0), fh - height)) & ~1
+    return (x, y, width, height)
+
 # =============================================================================
 # CAMERA CONTROLLER
 # =============================================================================
+FrameSample = collections.namedtuple("FrameSample", "seq timestamp metadata frame")
+
+
+class FrameHub:
+    """Single frame-acquisition loop shared by every camera consumer.
+    
+    One thread owns capture_request() and publishes each request's metadata
+    (and the lores frame, while someone wants it) as a FrameSample. Readers take
+    `latest` - a plain attribute swap, so no lock and no wait on the sensor - or
+    scan the `history` ring. wait_for() blocks only the caller, until a newer
+    sample satisfies a predicate.
+    """
+    
+    METADATA_KEYS = ("FocusFoM", "ExposureTime", "AnalogueGain", "AfState", "LensPosition",
+                     "SensorTimestamp", "AeLocked")
+    
+    def __init__(self, camera, history=None, log=print):
+        self.camera = camera
+        self.log = log
+        history = CONFIG.METADATA_HISTORY if history is None else history
+        self.latest = None
+        # wait_settled() compares the last SETTLE_FRAMES samples, so the ring is never shorter
+        self.history = collections.deque(maxlen=max(history, CONFIG.SETTLE_FRAMES, 1))
+        self.lores_consumers = 0
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._thread = None
+        self._grabs = []
+        self._grab_lock = threading.Lock()
+    
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="frame-hub", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+        self._thread = None
+    
+    def add_consumer(self):
+        """Register interest in lores frames (preview, recording, streaming)."""
+        self.lores_consumers += 1
+    
+    def remove_consumer(self):
+        self.lores_consumers = max(0, self.lores_consumers - 1)
+    
+    def _loop(self):
+        error_count = 0
+        while not self._stop.is_set():
+            try:
+                request = self.camera.capture_request()
+                try:
+                    metadata = request.get_metadata()
+                    frame = request.make_array("lores") if self.lores_consumers else None
+                    if self._grabs:
+                        self._serve_grabs(request, metadata)
+                finally:
+                    request.release()
+                error_count = 0
+            except Exception as e:
+                error_count += 1
+                if error_count >= 10:
+                    self.log(f"\n  [CAMERA] Frame loop stopped: {e}")
+                    break
+                time.sleep(0.1)
+                continue
+            self.publish({key: metadata.get(key) for key in self.METADATA_KEYS}, frame)
+    
+    def _serve_grabs(self, request, metadata):
+        summary = {key: metadata.get(key) for key in self.METADATA_KEYS}
+        with self._grab_lock:
+            for grab in list(self._grabs):
+                if grab['predicate'] is None or grab['predicate'](summary):
+                    grab['result'] = (summary, request.make_array(grab['stream']))
+                    self._grabs.remove(grab)
+                    grab['done'].set()
+    
+    def grab(self, predicate=None, stream="main", timeout=1.0):
+        """Copy `stream` from the next frame whose metadata matches predicate.
+        
+        The copy is taken inside the hub loop from the request it already
+        holds, so a burst needs no extra capture call or mode switch. The
+        predicate gets the metadata dict. Returns (metadata, array) or None.
+        """
+        grab = {'predicate': predicate, 'stream': stream, 'done': threading.Event(), 'result': None}
+        with self._grab_lock:
+            self._grabs.append(grab)
+        if not grab['done'].wait(timeout):
+            with self._grab_lock:
+                if grab in self._grabs:
+                    self._grabs.remove(grab)
+        return grab['result']
+    
+    def publish(self, metadata, frame=None):
+        """Make a new sample visible to readers and wake any waiters."""
+        self._seq += 1
+        sample = FrameSample(self._seq, time.monotonic(), metadata, frame)
+        self.latest = sample
+        self.history.append(sample._replace(frame=None))
+        with self._cond:
+            self._cond.notify_all()
+    
+    def wait_for(self, predicate=None, after_seq=0, timeout=1.0):
+        """Wait for a sample newer than after_seq matching predicate; None on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                sample = self.latest
+                if sample is not None and sample.seq > after_seq:
+                    if predicate is None or predicate(sample):
+                        return sample
+                    after_seq = sample.seq
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._stop.is_set():
+                    return None
+                self._cond.wait(remaining)
+    
+    def recent(self, count):
+        """Last `count` metadata samples from the history ring (oldest first)."""
+        if not self.history:
+            return []
+        return list(self.history)[-count:]
+    
+    def fps(self, window=2.0):
+        """Frame rate over the last `window` seconds of the history ring (0 if unknown)."""
+        if not self.history:
+            return 0.0
+        cutoff = time.monotonic() - window
+        stamps = [s.timestamp for s in list(self.history) if s.timestamp >= cutoff]
+        if len(stamps) < 2 or stamps[-1] == stamps[0]:
+            return 0.0
+        return (len(stamps) - 1) / (stamps[-1] - stamps[0])
+
+
 class CameraController:
     """Camera controller with live preview support via OpenCV or native Picamera2."""
     
     PREVIEW_WINDOW = "Camera Preview - Press Q to close"
     
     # Overlay settings
-    OVERLAY_FONT = cv2.FONT_HERSHEY_SIMPLEX if CV2_AVAILABLE else None
+    OVERLAY_FONT = "FONT_HERSHEY_SIMPLEX"  # cv2 attribute, resolved when drawing
     OVERLAY_FONT_SCALE_PREVIEW = 1.5
     OVERLAY_FONT_SCALE_STILL = 4.0
     OVERLAY_COLOR = (255, 255, 255)  # White
@@ -282,12 +1674,29 @@ class CameraController:
     OVERLAY_THICKNESS_PREVIEW = 2
     OVERLAY_THICKNESS_STILL = 8
     
-    def __init__(self):
+    def __init__(self, verbose=True, camera_index=0, pipeline=None, open_camera=True):
         self.camera = None
+        self.verbose = verbose
+        self.log = print  # a scan routes camera messages to its job log instead of the console
+        self.camera_index = camera_index
+        self.capture_mode = CONFIG.CAPTURE_MODE
+        self.main_format = CONFIG.CAMERA_MAIN_FORMAT
+        self.pipeline = pipeline or CONFIG.CAMERA_PIPELINE
+        self.video_config = None
+        self.still_config = None  # "video" pipeline: full-res mode switched to for each still
+        self.crop = None  # {'rect', 'scaler_crop', 'fraction'} while set_crop() is in effect
+        self.switch_times = collections.deque(maxlen=50)
+        self.last_switch = None
+        self.pending_bursts = {}  # filepath -> (mode, frames) awaiting develop()
+        self.spool = None  # FrameSpool of a spool-capture scan: frames go there instead of pending_bursts
+        self.last_burst = None
+        self.gate_frame = None  # luma of the last still at the QualityGate's scale (see _gate_input)
         self.is_initialized = False
         self.preview_active = False
         self.preview_thread = None
+        self.preview_headless = False
         self.stop_preview_flag = False
+        self.frame_hub = None
         
         # Video recording state
         self.video_writer = None
@@ -295,41 +1704,131 @@ class CameraController:
         self.video_frame_count = 0
         self.current_angle = 0
         
-        if CAMERA_AVAILABLE:
+        if CAMERA_AVAILABLE and open_camera:
             self._initialize()
     
     def _initialize(self):
+        start = time.perf_counter()
         try:
-            self.camera = Picamera2()
-            # Single configuration with both streams from SAME sensor mode:
-            # - main: full resolution for capture (what you save)
-            # - lores: scaled down for preview (exact same framing/colors)
-            # Using BGR888 for both since OpenCV expects BGR
-            config = self.camera.create_still_configuration(
-                main={"size": CONFIG.CAMERA_RESOLUTION, "format": "BGR888"},
-                lores={"size": CONFIG.CAMERA_PREVIEW_SIZE, "format": "BGR888"},
-                buffer_count=4,
-                queue=True,  # Enable frame queueing for smoother preview
-            )
-            self.camera.configure(config)
-            self.camera.set_controls({
-                "AfMode": controls.AfModeEnum.Continuous,
-                "AfSpeed": controls.AfSpeedEnum.Normal,
-                "AwbEnable": True,
-            })
+            self.camera = Picamera2(self.camera_index)
+            self._configure()
             self.camera.start()
-            # Wait for AWB/AEC to stabilize
-            print("  [CAMERA] Waiting for auto-exposure to stabilize...")
-            time.sleep(2)
+            self.frame_hub = FrameHub(self.camera, log=lambda message: self.log(message))
+            self.frame_hub.start()
+            # Wait for AWB/AEC to stabilize (AeLocked), at most CAMERA_SETTLE_TIMEOUT
+            if self.verbose:
+                self.log("  [CAMERA] Waiting for auto-exposure to stabilize...")
+            self.frame_hub.wait_for(lambda s: s.metadata.get("AeLocked"),
+                                    timeout=CONFIG.CAMERA_SETTLE_TIMEOUT)
+            if self.verbose:
+                w, h = CONFIG.VIDEO_MODE_SIZE if self.video_config else CONFIG.CAMERA_RESOLUTION
+                main_format = "YUV420" if self.video_config else self.main_format
+                per_buffer = w * h * (1.5 if main_format == "YUV420" else 3) / 1e6
+                self.log(f"  [CAMERA] {self.pipeline.capitalize()} pipeline, main {w}x{h} {main_format}, "
+                      f"{CONFIG.CAMERA_BUFFER_COUNT} buffers ({per_buffer * CONFIG.CAMERA_BUFFER_COUNT:.0f} MB)")
             self.is_initialized = True
         except Exception as e:
-            print(f"  [CAMERA] Init failed: {e}")
+            if self.verbose:
+                self.log(f"  [CAMERA] Init failed: {e}")
             self.camera = None
+        INIT_TIMINGS["camera"] = time.perf_counter() - start
     
-    def start_preview(self):
-        """Start live video preview window using OpenCV or native preview."""
+    def _configure(self, scaler_crop=None, size=None):
+        """Configure the streams, optionally cropped to a sensor rectangle with a main stream of size."""
+        size = tuple(size) if size else CONFIG.CAMERA_RESOLUTION
+        crop_controls = {"ScalerCrop": tuple(scaler_crop)} if scaler_crop else {}
+        # Single configuration with both streams from SAME sensor mode:
+        # - main: full resolution for capture (what you save)
+        # - lores: scaled down for preview (exact same framing/colors)
+        # lores is BGR888 since OpenCV expects BGR; main may be YUV420 to halve
+        # the buffer memory (stills are then encoded from the YUV planes)
+        config = self.camera.create_still_configuration(
+            main={"size": size, "format": self.main_format},
+            lores={"size": CONFIG.CAMERA_PREVIEW_SIZE, "format": "BGR888"},
+            buffer_count=CONFIG.CAMERA_BUFFER_COUNT,
+            queue=True,  # Enable frame queueing for smoother preview
+            controls=crop_controls,
+        )
+        if self.pipeline == "video":
+            # Preview and recording run in a binned high-fps mode; each still
+            # switches to the full-resolution mode for one request. The lores
+            # stream is identical in both, so the FrameHub does not notice.
+            self.still_config = self.camera.create_still_configuration(
+                main={"size": size, "format": self.main_format},
+                lores={"size": CONFIG.CAMERA_PREVIEW_SIZE, "format": "BGR888"},
+                buffer_count=2,  # allocated on every switch, so keep it small
+                controls=crop_controls,
+            )
+            config = self.camera.create_video_configuration(
+                main={"size": CONFIG.VIDEO_MODE_SIZE, "format": "YUV420"},
+                lores={"size": CONFIG.CAMERA_PREVIEW_SIZE, "format": "BGR888"},
+                buffer_count=CONFIG.CAMERA_BUFFER_COUNT,
+                controls={"FrameRate": CONFIG.VIDEO_MODE_FPS, **crop_controls},
+            )
+            self.video_config = config
+        self.camera.configure(config)
+        self.camera.set_controls({
+            "AfMode": controls.AfModeEnum.Continuous,
+            "AfSpeed": controls.AfSpeedEnum.Normal,
+            "AwbEnable": True,
+        })
+    
+    def set_crop(self, rect):
+        """Crop the sensor to rect = (x, y, w, h) in full-resolution pixels (None = full frame).
+        
+        Applied as ScalerCrop with a main stream of the crop's size, so the ISP
+        reads, scales and the encoder compresses only the crop. Restarts the
+        camera (about a second), so it is meant to be called once per scan.
+        Returns the crop description stored in the manifest.
+        """
+        if not self.is_initialized:
+            return None
+        scaler_crop = None
+        if rect is not None:
+            # ScalerCrop is in sensor pixel-array coordinates
+            mx, my, mw, mh = self.camera.camera_controls["ScalerCrop"][1]
+            fw, fh = CONFIG.CAMERA_RESOLUTION
+            x, y, w, h = rect
+            scaler_crop = (mx + round(x * mw / fw), my + round(y * mh / fh), round(w * mw / fw), round(h * mh / fh))
+        self.frame_hub.stop()
+        self.camera.stop()
+        try:
+            self._configure(scaler_crop, rect[2:] if rect is not None else None)
+            self.crop = None if rect is None else {
+                'rect': list(rect),
+                'scaler_crop': list(scaler_crop),
+                'fraction': round(rect[2] * rect[3] / (CONFIG.CAMERA_RESOLUTION[0] * CONFIG.CAMERA_RESOLUTION[1]), 4),
+            }
+        finally:
+            self.camera.start()
+            self.frame_hub.start()
+        self.frame_hub.wait_for(lambda s: s.metadata.get("AeLocked"), timeout=CONFIG.CAMERA_SETTLE_TIMEOUT)
+        if self.verbose:
+            if rect is None:
+                self.log("  [CAMERA] Sensor crop cleared (full frame)")
+            else:
+                self.log(f"  [CAMERA] Sensor crop {rect[2]}x{rect[3]} at ({rect[0]}, {rect[1]}): "
+                         f"{self.crop['fraction']:.0%} of the full frame")
+        return self.crop
+    
+    def lores_frame(self, timeout=2.0):
+        """BGR lores frame exposed after the table settled (None without a frame loop)."""
+        if self.frame_hub is None:
+            return None
+        self.frame_hub.add_consumer()
+        try:
+            self.wait_settled()
+            seq = self.frame_hub.latest.seq if self.frame_hub.latest else 0
+            # Skip the frame in flight, it may have been exposed while moving
+            sample = self.frame_hub.wait_for(lambda s: s.frame is not None, after_seq=seq + 1, timeout=timeout)
+        finally:
+            self.frame_hub.remove_consumer()
+        return rgb_to_bgr(sample.frame) if sample is not None else None
+    
+    def start_preview(self):
+        """Start live video preview window using OpenCV or native preview."""
         if not CAMERA_AVAILABLE or not self.is_initialized:
-            print("  [CAMERA] Not available - running in mock mode")
+            self.log("  [CAMERA] Not available - running in mock mode")
             return False
         
         # Prefer OpenCV for reliable cross-platform preview
@@ -340,8 +1839,13 @@ class CameraController:
         return self._start_native_preview()
     
     def _start_opencv_preview(self):
-        """Start preview using OpenCV window (non-blocking via thread)."""
+        """Start preview using OpenCV window (non-blocking via thread).
+        
+        Without a display the loop still runs headless - video recording and
+        remote streaming keep working, only the local window is skipped.
+        """
         self.stop_preview_flag = False
+        self.preview_headless = not display_available()
         self.preview_thread = threading.Thread(target=self._opencv_preview_loop, daemon=True)
         self.preview_thread.start()
         self.preview_active = True
@@ -349,36 +1853,42 @@ class CameraController:
     
     def _opencv_preview_loop(self):
         """OpenCV preview loop running in separate thread."""
-        try:
-            # Destroy any stale window with same name first
-            cv2.destroyWindow(self.PREVIEW_WINDOW)
-            cv2.waitKey(1)
-        except Exception:
-            pass
-        
-        try:
-            cv2.namedWindow(self.PREVIEW_WINDOW, cv2.WINDOW_NORMAL)
-            cv2.resizeWindow(self.PREVIEW_WINDOW, 800, 600)
-            cv2.waitKey(1)  # Flush window creation
-        except Exception as e:
-            print(f"  [CAMERA] Failed to create preview window: {e}")
-            return
+        show_window = not self.preview_headless
+        if show_window:
+            try:
+                # Destroy any stale window with same name first
+                cv2.destroyWindow(self.PREVIEW_WINDOW)
+                cv2.waitKey(1)
+            except Exception:
+                pass
+            
+            try:
+                cv2.namedWindow(self.PREVIEW_WINDOW, cv2.WINDOW_NORMAL)
+                cv2.resizeWindow(self.PREVIEW_WINDOW, 800, 600)
+                cv2.waitKey(1)  # Flush window creation
+            except Exception as e:
+                self.log(f"  [CAMERA] Failed to create preview window: {e}")
+                return
         
         frame_count = 0
         error_count = 0
         max_errors = 10  # Stop after consecutive errors
+        last_seq = 0
+        self.frame_hub.add_consumer()
         
         while not self.stop_preview_flag:
             try:
-                # Capture from lores stream - same framing as main, just scaled down
-                frame = self.camera.capture_array("lores")
+                # lores frames come from the shared FrameHub - same framing as main, just scaled down
+                sample = self.frame_hub.wait_for(lambda s: s.frame is not None, after_seq=last_seq)
                 
-                if frame is None:
+                if sample is None:
                     error_count += 1
                     if error_count >= max_errors:
-                        print(f"\n  [CAMERA] Too many frame errors, stopping preview")
+                        self.log(f"\n  [CAMERA] Too many frame errors, stopping preview")
                         break
                     continue
+                last_seq = sample.seq
+                frame = sample.frame
                 
                 # Picamera2 lores often outputs RGB despite BGR888 setting - convert to BGR for OpenCV
                 frame_bgr = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
@@ -390,22 +1900,29 @@ class CameraController:
                 if self.video_recording:
                     self.record_frame(frame_bgr)
                 
+                if not show_window:
+                    continue
+                
                 # Add angle overlay to preview display
                 display_frame = self.add_angle_overlay(frame_bgr.copy(), self.current_angle, is_still=False)
                 cv2.imshow(self.PREVIEW_WINDOW, display_frame)
                 
-                # 16ms = ~60fps max, but actual fps limited by camera
-                key = cv2.waitKey(16) & 0xFF
+                # Frame pacing comes from the hub; just pump the window events
+                key = cv2.waitKey(1) & 0xFF
                 if key == ord('q'):
                     break
                     
             except Exception as e:
                 error_count += 1
                 if error_count >= max_errors:
-                    print(f"\n  [CAMERA] Preview error: {e}")
+                    self.log(f"\n  [CAMERA] Preview error: {e}")
                     break
                 time.sleep(0.1)  # Brief pause before retry
         
+        self.frame_hub.remove_consumer()
+        if not show_window:
+            return
+        
         # Properly destroy window and flush event queue
         try:
             cv2.destroyWindow(self.PREVIEW_WINDOW)
@@ -437,7 +1954,7 @@ class CameraController:
             except RuntimeError as e:
                 if "event loop" in str(e).lower():
                     # Event loop conflict - skip all Qt-based previews
-                    print(f"  [CAMERA] {name} preview skipped: event loop conflict")
+                    self.log(f"  [CAMERA] {name} preview skipped: event loop conflict")
                     if name in ("QT", "QTGL"):
                         continue
                 continue
@@ -445,7 +1962,7 @@ class CameraController:
                 continue
         
         # All previews failed
-        print("  [CAMERA] Preview window not available - running without preview")
+        self.log("  [CAMERA] Preview window not available - running without preview")
         return False
     
     def stop_preview(self):
@@ -455,7 +1972,7 @@ class CameraController:
         if self.preview_thread and self.preview_thread.is_alive():
             self.preview_thread.join(timeout=2.0)
         
-        if CV2_AVAILABLE:
+        if CV2_AVAILABLE and not self.preview_headless:
             try:
                 # Destroy specific window and flush event queue
                 cv2.destroyWindow(self.PREVIEW_WINDOW)
@@ -476,19 +1993,48 @@ class CameraController:
         self.preview_active = False
         self.preview_thread = None
     
-    def capture(self, filepath, angle=None):
-        """Capture and save a high-resolution image with angle overlay."""
+    def capture(self, filepath, angle=None, overlay=True):
+        """Capture and save a high-resolution image with angle overlay.
+        
+        With overlay=False the overlay is left to apply_overlay(), so it can
+        run on another executor while the table moves on.
+        """
+        if not overlay:
+            angle = None
+        self.last_burst = None
+        self.last_switch = None
+        self.gate_frame = None
         if not CAMERA_AVAILABLE:
             return self._mock_capture(filepath, angle)
         if not self.is_initialized:
             return False
+        if self.capture_mode in ("focus_stack", "hdr") and NUMPY_AVAILABLE and self.frame_hub is not None:
+            return self._capture_burst(filepath, self.capture_mode)
         try:
             os.makedirs(os.path.dirname(filepath), exist_ok=True)
-            # Trigger autofocus
-            self.camera.set_controls({"AfTrigger": controls.AfTriggerEnum.Start})
-            time.sleep(0.3)
-            # Direct capture from main stream - same config as preview, just full resolution
-            self.camera.capture_file(filepath, name="main")
+            # Trigger autofocus and wait (on cached metadata) for the scan to finish
+            self.trigger_autofocus()
+            # Direct capture from main stream - same config as preview, just full resolution.
+            # The lores image of the same request feeds the quality gate.
+            request = self._still_request()
+            try:
+                if self.main_format == "YUV420" or self.spool is not None:
+                    # Copy the frame and release the buffer; develop() encodes it
+                    self._hold(filepath, "yuv420" if self.main_format == "YUV420" else "frame",
+                               [request.make_array("main")])
+                else:
+                    request.save("main", filepath)
+                if CONFIG.QUALITY_GATE_ENABLED:
+                    self.gate_frame = self._gate_input(request.make_array("lores"), "rgb")
+            finally:
+                request.release()
+            
+            if self.spool is not None:
+                return True
+            if filepath in self.pending_bursts:
+                if overlay:
+                    self.develop(filepath, angle)
+                return True
             
             # Add angle overlay to saved image
             if angle is not None and CV2_AVAILABLE and os.path.exists(filepath):
@@ -496,8 +2042,175 @@ class CameraController:
             
             return os.path.exists(filepath)
         except Exception as e:
-            print(f"  [CAMERA] Capture error: {e}")
+            self.log(f"  [CAMERA] Capture error: {e}")
+            return False
+    
+    def _hold(self, filepath, mode, frames):
+        """Keep captured frames for develop(): in RAM, or raw in the scan's FrameSpool."""
+        if self.spool is not None:
+            self.spool.put(os.path.basename(filepath), mode, self.main_format, frames, angle=self.current_angle)
+        else:
+            self.pending_bursts[filepath] = (mode, frames)
+    
+    def still_bytes(self):
+        """Bytes of one main-stream frame at the current crop (what a spool slot holds)."""
+        w, h = self.crop['rect'][2:] if self.crop else CONFIG.CAMERA_RESOLUTION
+        return int(w * h * (1.5 if self.main_format == "YUV420" else 3))
+    
+    def _still_request(self):
+        """A full-resolution request: from the running stream, or through a timed mode switch."""
+        if self.still_config is None:
+            return self.camera.capture_request()
+        start = time.perf_counter()
+        # Switches to the still mode, captures one request and switches back
+        request = self.camera.switch_mode_and_capture_request(self.still_config)
+        self._record_switch(time.perf_counter() - start)
+        return request
+    
+    def _record_switch(self, seconds):
+        self.last_switch = round(seconds, 4)
+        self.switch_times.append(seconds)
+    
+    def _capture_burst(self, filepath, mode):
+        """Grab a bracketed burst from the running stream; develop() merges it.
+        
+        Each bracket is a set_controls() on the live camera followed by a grab
+        of the first frame whose metadata reports the new value - no mode
+        switch and no fixed sleeps. Brackets are visited in ascending order so
+        the lens (or exposure) only ever moves one way.
+        """
+        start = time.monotonic()
+        try:
+            self.trigger_autofocus()
+            if self.still_config is not None:
+                # The whole bracket is shot in the full-resolution mode
+                switch_start = time.perf_counter()
+                self.camera.switch_mode(self.still_config)
+                self._record_switch(time.perf_counter() - switch_start)
+            latest = self.latest_metadata()
+            if mode == "focus_stack":
+                base = latest.get("LensPosition") or 0.0
+                targets = [max(0.0, base + offset) for offset in sorted(CONFIG.BURST_LENS_OFFSETS)]
+                restore = {"AfMode": controls.AfModeEnum.Continuous}
+                
+                def _controls(target):
+                    return {"AfMode": controls.AfModeEnum.Manual, "LensPosition": target}
+                
+                def _reached(target):
+                    return lambda m: (m.get("LensPosition") is not None
+                                      and abs(m["LensPosition"] - target) <= CONFIG.BURST_LENS_TOLERANCE)
+            else:
+                exposure = latest.get("ExposureTime") or 10000
+                gain = latest.get("AnalogueGain") or 1.0
+                targets = [int(exposure * 2 ** ev) for ev in sorted(CONFIG.BURST_EV_STEPS)]
+                restore = {"AeEnable": True}
+                
+                def _controls(target):
+                    return {"AeEnable": False, "ExposureTime": target, "AnalogueGain": gain}
+                
+                def _reached(target):
+                    return lambda m: m.get("ExposureTime") and abs(m["ExposureTime"] - target) <= 0.05 * target
+            
+            frames, info = [], []
+            try:
+                for target in targets:
+                    requested = time.monotonic()
+                    self.camera.set_controls(_controls(target))
+                    grabbed = self.frame_hub.grab(_reached(target), timeout=CONFIG.BURST_FRAME_TIMEOUT)
+                    settled = grabbed is not None
+                    if grabbed is None:
+                        grabbed = self.frame_hub.grab(timeout=CONFIG.BURST_FRAME_TIMEOUT)
+                    if grabbed is None:
+                        raise RuntimeError("no frame from camera during burst")
+                    metadata, frame = grabbed
+                    frames.append(frame if self.main_format == "YUV420" else rgb_to_bgr(frame))
+                    info.append({
+                        'target': target,
+                        'lens_position': metadata.get("LensPosition"),
+                        'exposure_time': metadata.get("ExposureTime"),
+                        'settled': settled,
+                        'wait': round(time.monotonic() - requested, 4),
+                    })
+            finally:
+                self.camera.set_controls(restore)
+                if self.still_config is not None:
+                    self.camera.switch_mode(self.video_config)
+            self._hold(filepath, mode, frames)
+            middle = frames[len(frames) // 2]
+            self.gate_frame = self._gate_input(middle, "yuv420" if self.main_format == "YUV420" else "bgr")
+            self.last_burst = {'mode': mode, 'frames': info, 'elapsed': round(time.monotonic() - start, 4)}
+            return True
+        except Exception as e:
+            self.log(f"  [CAMERA] Burst capture error: {e}")
+            return False
+    
+    def _gate_input(self, frame, layout):
+        """Luma of a still at one scale for the QualityGate, whichever stream it came from.
+        
+        layout is "rgb" (a Picamera2 "BGR888" array, e.g. lores), "bgr" or
+        "yuv420". The frame is resampled to square pixels of the scene (sensor
+        or crop) with QUALITY_ROI exactly QUALITY_WIDTH wide, so a lores image,
+        a full-resolution burst frame and a Y plane score alike.
+        """
+        if layout == "yuv420":
+            # Studio-range Y (16-235), as yuv420_to_bgr() decodes it: stretch to the BGR luma range
+            luma = yuv420_planes(frame)[0]
+            luma = np.clip((luma.astype(np.float32) - 16) * (255 / 219), 0, 255).astype(np.uint8)
+        elif CV2_AVAILABLE:
+            luma = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY if layout == "rgb" else cv2.COLOR_BGR2GRAY)
+        else:
+            luma = frame[..., 1]
+        w, h = self.crop['rect'][2:] if self.crop else CONFIG.CAMERA_RESOLUTION
+        width = round(CONFIG.QUALITY_WIDTH / CONFIG.QUALITY_ROI[2])
+        size = (width, round(width * h / w))
+        if not CV2_AVAILABLE:
+            return np.ascontiguousarray(luma[::max(1, luma.shape[0] // size[1]), ::max(1, luma.shape[1] // size[0])])
+        return cv2.resize(np.ascontiguousarray(luma), size, interpolation=cv2.INTER_AREA)
+    
+    def develop(self, filepath, angle=None, on_frame=None):
+        """Encode a pending YUV still or merge a pending burst, with overlay; False if none is pending.
+        
+        Runs on the storage executor, off the capture path. on_frame, if given,
+        receives the developed BGR frame before it is released.
+        """
+        burst = self.pending_bursts.pop(filepath, None)
+        if burst is None:
             return False
+        mode, frames = burst
+        if mode == "frame":
+            # Spooled "BGR888" still, kept in the camera's R,G,B order until now
+            frame = rgb_to_bgr(frames[0])
+            if angle is not None:
+                frame = self.add_angle_overlay(frame, angle, is_still=True)
+            if on_frame is not None:
+                on_frame(frame)
+            return write_still(filepath, frame)
+        if mode == "yuv420":
+            frame = frames[0]
+            if angle is not None and CV2_AVAILABLE:
+                self._overlay_yuv420(frame, angle)
+            if on_frame is not None:
+                on_frame(yuv420_to_bgr(frame))
+            return write_still_yuv420(filepath, frame)
+        if self.main_format == "YUV420":
+            frames = [yuv420_to_bgr(frame) for frame in frames]
+        if CONFIG.BURST_SAVE_FRAMES:
+            stem, ext = os.path.splitext(filepath)
+            for i, frame in enumerate(frames):
+                write_still(f"{stem}_b{i}{ext}", frame)
+        merged = focus_stack(frames) if mode == "focus_stack" else exposure_fusion(frames)
+        del frames
+        if angle is not None:
+            merged = self.add_angle_overlay(merged, angle, is_still=True)
+        if on_frame is not None:
+            on_frame(merged)
+        return write_still(filepath, merged)
+    
+    def apply_overlay(self, filepath, angle):
+        """Burn the angle overlay into an already captured file; returns the decoded frame."""
+        if CV2_AVAILABLE and os.path.exists(filepath):
+            return self._add_overlay_to_file(filepath, angle)
+        return None
     
     def _add_overlay_to_file(self, filepath, angle):
         """Add angle overlay to an existing image file."""
@@ -506,8 +2219,35 @@ class CameraController:
             if img is not None:
                 img = self.add_angle_overlay(img, angle, is_still=True)
                 cv2.imwrite(filepath, img, [cv2.IMWRITE_JPEG_QUALITY, CONFIG.CAMERA_QUALITY])
+            return img
         except Exception as e:
-            print(f"  [CAMERA] Overlay error: {e}")
+            self.log(f"  [CAMERA] Overlay error: {e}")
+            return None
+    
+    def _overlay_yuv420(self, frame, angle):
+        """Burn the angle overlay into an I420 frame, converting only the text corner to BGR."""
+        font = getattr(cv2, self.OVERLAY_FONT)
+        text = f"{int(angle):03d} deg"
+        thickness = self.OVERLAY_THICKNESS_STILL
+        (text_w, text_h), baseline = cv2.getTextSize(text, font, self.OVERLAY_FONT_SCALE_STILL, thickness)
+        y_plane, u_plane, v_plane = yuv420_planes(frame)
+        # Corner box holding text, shadow and stroke: x even, height a multiple of 4 (I420 packing)
+        margin = 60 + thickness + 4
+        x0 = max(0, y_plane.shape[1] - text_w - 2 * margin) & ~1
+        rows = min(y_plane.shape[0], text_h + baseline + 2 * margin + 3) & ~3
+        width = y_plane.shape[1] - x0
+        quarter = rows * width // 4
+        corner = np.empty((rows * 3 // 2, width), dtype=frame.dtype)
+        corner[:rows] = y_plane[:rows, x0:]
+        corner[rows:].reshape(-1)[:quarter] = u_plane[:rows // 2, x0 // 2:].reshape(-1)
+        corner[rows:].reshape(-1)[quarter:] = v_plane[:rows // 2, x0 // 2:].reshape(-1)
+        # add_angle_overlay places text from the right edge, which the corner shares with the frame
+        bgr = self.add_angle_overlay(yuv420_to_bgr(corner), angle, is_still=True)
+        corner = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420)
+        y_plane[:rows, x0:] = corner[:rows]
+        u_plane[:rows // 2, x0 // 2:] = corner[rows:].reshape(-1)[:quarter].reshape(rows // 2, width // 2)
+        v_plane[:rows // 2, x0 // 2:] = corner[rows:].reshape(-1)[quarter:].reshape(rows // 2, width // 2)
+        return frame
     
     def _mock_capture(self, filepath, angle=None):
         """Create mock image for testing without camera."""
@@ -539,8 +2279,10 @@ class CameraController:
         font_scale = self.OVERLAY_FONT_SCALE_STILL if is_still else self.OVERLAY_FONT_SCALE_PREVIEW
         thickness = self.OVERLAY_THICKNESS_STILL if is_still else self.OVERLAY_THICKNESS_PREVIEW
         
+        font = getattr(cv2, self.OVERLAY_FONT)
+        
         # Get text size to position in top-right
-        (text_w, text_h), baseline = cv2.getTextSize(text, self.OVERLAY_FONT, font_scale, thickness)
+        (text_w, text_h), baseline = cv2.getTextSize(text, font, font_scale, thickness)
         
         # Position: top-right with padding
         padding = 20 if not is_still else 60
@@ -548,10 +2290,10 @@ class CameraController:
         y = text_h + padding
         
         # Draw shadow for readability
-        cv2.putText(frame, text, (x + 2, y + 2), self.OVERLAY_FONT, font_scale, 
+        cv2.putText(frame, text, (x + 2, y + 2), font, font_scale, 
                     self.OVERLAY_SHADOW_COLOR, thickness + 2, cv2.LINE_AA)
         # Draw main text
-        cv2.putText(frame, text, (x, y), self.OVERLAY_FONT, font_scale,
+        cv2.putText(frame, text, (x, y), font, font_scale,
                     self.OVERLAY_COLOR, thickness, cv2.LINE_AA)
         
         return frame
@@ -573,15 +2315,15 @@ class CameraController:
                 if self.video_writer.isOpened():
                     self.video_recording = True
                     self.video_frame_count = 0
-                    print(f"  [VIDEO] Using codec: {codec}")
+                    self.log(f"  [VIDEO] Using codec: {codec}")
                     return True
                 self.video_writer.release()
             
-            print("  [VIDEO] No compatible codec found")
+            self.log("  [VIDEO] No compatible codec found")
             self.video_writer = None
             return False
         except Exception as e:
-            print(f"  [VIDEO] Failed to start recording: {e}")
+            self.log(f"  [VIDEO] Failed to start recording: {e}")
             return False
     
     def record_frame(self, frame):
@@ -616,19 +2358,77 @@ class CameraController:
                 pass
             self.video_writer = None
         if was_recording:
-            print(f"  [VIDEO] Recorded {frame_count} frames")
+            self.log(f"  [VIDEO] Recorded {frame_count} frames")
+    
+    def latest_metadata(self):
+        """Most recent frame metadata from the FrameHub cache (never blocks)."""
+        if self.frame_hub is None or self.frame_hub.latest is None:
+            return {}
+        return self.frame_hub.latest.metadata
+    
+    def trigger_autofocus(self):
+        """Start an AF cycle and wait until AfState leaves Scanning (or AF_TIMEOUT)."""
+        if self.frame_hub is None:
+            return False
+        seq = self.frame_hub.latest.seq if self.frame_hub.latest else 0
+        self.camera.set_controls({"AfTrigger": controls.AfTriggerEnum.Start})
+        scanning = controls.AfStateEnum.Scanning
+        # Skip the frame in flight when the trigger was issued
+        result = self.frame_hub.wait_for(lambda s: s.metadata.get("AfState") != scanning,
+                                         after_seq=seq + 1, timeout=CONFIG.AF_TIMEOUT)
+        return result is not None
+    
+    def wait_settled(self, timeout=None):
+        """Wait until FocusFoM is stable over SETTLE_FRAMES frames (table stopped moving).
+        
+        Falls back to a plain CAPTURE_DELAY sleep without a frame loop.
+        """
+        if timeout is None:
+            timeout = CONFIG.CAPTURE_DELAY
+        if self.frame_hub is None:
+            time.sleep(timeout)
+            return False
+        
+        def _stable(_sample):
+            values = [s.metadata.get("FocusFoM") for s in self.frame_hub.recent(CONFIG.SETTLE_FRAMES)]
+            if len(values) < CONFIG.SETTLE_FRAMES or None in values:
+                return False
+            return (max(values) - min(values)) <= CONFIG.SETTLE_FOM_TOLERANCE * max(values)
+        
+        seq = self.frame_hub.latest.seq if self.frame_hub.latest else 0
+        # Only count frames exposed after the move finished
+        return self.frame_hub.wait_for(_stable, after_seq=seq + CONFIG.SETTLE_FRAMES - 1,
+                                       timeout=timeout) is not None
     
     def get_status(self):
-        """Get current camera status info."""
+        """Get current camera status info from the metadata cache."""
         if not CAMERA_AVAILABLE or not self.is_initialized:
             return "MOCK MODE"
-        try:
-            metadata = self.camera.capture_metadata()
-            focus = metadata.get("FocusFoM", "N/A")
-            exposure = metadata.get("ExposureTime", "N/A")
-            return f"Focus: {focus} | Exp: {exposure}us"
-        except Exception:
+        metadata = self.latest_metadata()
+        if not metadata:
             return "Active"
+        focus = metadata.get("FocusFoM", "N/A")
+        exposure = metadata.get("ExposureTime", "N/A")
+        return f"Focus: {focus} | Exp: {exposure}us | {self.frame_hub.fps():.0f} fps"
+    
+    def benchmark(self, stills=3, window=2.0):
+        """Preview frame rate and full-resolution still latency of this pipeline."""
+        time.sleep(window)
+        fps = self.frame_hub.fps(window)
+        latencies = []
+        for _ in range(stills):
+            start = time.perf_counter()
+            self._still_request().release()
+            latencies.append(time.perf_counter() - start)
+            # Let the preview mode run again between stills
+            time.sleep(0.2)
+        switches = list(self.switch_times)[-stills:] if self.still_config is not None else []
+        return {
+            'pipeline': self.pipeline,
+            'preview_fps': round(fps, 1),
+            'still_latency': round(sum(latencies) / len(latencies), 3),
+            'mode_switch': round(sum(switches) / len(switches), 3) if switches else None,
+        }
     
     def cleanup(self):
         """Clean up camera resources - must fully release for re-initialization."""
@@ -638,6 +2438,11 @@ class CameraController:
         # Stop preview and wait for thread to fully terminate
         self.stop_preview()
         
+        # Stop the frame loop before the camera goes away
+        if self.frame_hub is not None:
+            self.frame_hub.stop()
+            self.frame_hub = None
+        
         # Fully release camera
         if self.camera:
             try:
@@ -650,81 +2455,3196 @@ class CameraController:
                 pass
             self.camera = None
         
-        # Reset all state
-        self.is_initialized = False
-        self.preview_active = False
-        self.preview_thread = None
-        self.stop_preview_flag = False
-        self.video_writer = None
-        self.video_recording = False
-        self.video_frame_count = 0
-        self.current_angle = 0
+        # Reset all state
+        self.is_initialized = False
+        self.preview_active = False
+        self.preview_thread = None
+        self.stop_preview_flag = False
+        self.video_writer = None
+        self.video_recording = False
+        self.video_frame_count = 0
+        self.current_angle = 0
+        
+        # Force garbage collection to release camera resources
+        import gc
+        gc.collect()
+        time.sleep(0.5)  # Brief pause to let hardware release
+
+# =============================================================================
+# ROTATION VERIFICATION
+# =============================================================================
+class RotationVerifier:
+    """Measures real table rotation by tracking a fiducial in the lores stream.
+    
+    The fiducial is any small high-contrast mark on the turntable rim inside
+    FIDUCIAL_ROI. At home the most distinctive patch of the ROI becomes the
+    template, and a FIDUCIAL_NUDGE move gives its pixel motion per degree;
+    after a full turn the template's displacement from home is the rotation
+    error. A slow reference turn also records the ROI at every increment, and
+    verified turns phase-correlate each move against it, so a missed step is
+    caught at the move where it happened. Needs OpenCV and a running camera.
+    """
+    
+    def __init__(self, camera, motor, log=print):
+        self.camera = camera
+        self.motor = motor
+        self.station = motor.station
+        self.log = log
+        self.template = None
+        self.home = None
+        self.direction = None  # unit pixel vector of +1 degree (clockwise) at home
+        self.px_per_degree = None
+        self.signatures = []
+        self.safe_speed = self.station.speed()
+        self.camera.frame_hub.add_consumer()
+    
+    def close(self):
+        self.camera.frame_hub.remove_consumer()
+    
+    def _frame(self):
+        """Grayscale lores frame taken after the table has settled."""
+        self.camera.wait_settled()
+        hub = self.camera.frame_hub
+        seq = hub.latest.seq if hub.latest else 0
+        # Skip the frame in flight, it may have been exposed while moving
+        sample = hub.wait_for(lambda s: s.frame is not None, after_seq=seq + 1, timeout=2.0)
+        if sample is None:
+            raise RuntimeError("no preview frame from camera")
+        return cv2.cvtColor(sample.frame, cv2.COLOR_RGB2GRAY)
+    
+    def _roi(self, gray):
+        h, w = gray.shape
+        rx, ry, rw, rh = CONFIG.FIDUCIAL_ROI
+        x, y = int(rx * w), int(ry * h)
+        return gray[y:y + int(rh * h), x:x + int(rw * w)], (x, y)
+    
+    def reference(self):
+        """Take the template at home and measure pixels per degree."""
+        roi, _ = self._roi(self._frame())
+        size = CONFIG.FIDUCIAL_TEMPLATE
+        g = roi.astype(np.float32)
+        # Local variance over template-sized windows: the most textured patch wins
+        mean = cv2.blur(g, (size, size))
+        variance = cv2.blur(g * g, (size, size)) - mean * mean
+        half = size // 2
+        variance[:half, :] = variance[-half:, :] = 0
+        variance[:, :half] = variance[:, -half:] = 0
+        cy, cx = np.unravel_index(int(np.argmax(variance)), variance.shape)
+        self.template = roi[cy - half:cy - half + size, cx - half:cx - half + size].copy()
+        self.home, _ = self.locate()
+        start = self.motor.position_steps
+        self.motor.rotate_degrees(CONFIG.FIDUCIAL_NUDGE, clockwise=True)
+        # The nudge is rounded to whole steps; use the angle actually commanded
+        nudged = (self.motor.position_steps - start) / self.motor.steps_per_degree()
+        moved, score = self.locate()
+        self.motor.rotate_degrees(CONFIG.FIDUCIAL_NUDGE, clockwise=False)
+        shift = moved - self.home
+        distance = float(np.hypot(*shift))
+        if score < CONFIG.FIDUCIAL_MIN_SCORE or distance < 1.0 or nudged <= 0:
+            raise RuntimeError("fiducial not found or not moving with the table - check FIDUCIAL_ROI")
+        self.direction = shift / distance
+        self.px_per_degree = distance / nudged
+        self.log(f"  [VISION] Fiducial at ({self.home[0]:.1f}, {self.home[1]:.1f}) px, "
+                 f"{self.px_per_degree:.2f} px/deg")
+    
+    def locate(self):
+        """Sub-pixel template position in frame coordinates and its match score."""
+        roi, (ox, oy) = self._roi(self._frame())
+        result = cv2.matchTemplate(roi, self.template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (x, y) = cv2.minMaxLoc(result)
+        
+        def _peak(minus, centre, plus):
+            denom = minus - 2 * centre + plus
+            return 0.0 if denom == 0 else 0.5 * (minus - plus) / denom
+        
+        dx = _peak(result[y, x - 1], result[y, x], result[y, x + 1]) if 0 < x < result.shape[1] - 1 else 0.0
+        dy = _peak(result[y - 1, x], result[y, x], result[y + 1, x]) if 0 < y < result.shape[0] - 1 else 0.0
+        half = CONFIG.FIDUCIAL_TEMPLATE / 2
+        return np.array([ox + x + dx + half, oy + y + dy + half]), float(score)
+    
+    def error_degrees(self):
+        """Signed angle between the table and home (+ = clockwise); None if the fiducial is lost."""
+        position, score = self.locate()
+        offset = position - self.home
+        # A match off the line the fiducial moves along is some other feature
+        across = abs(float(offset[0] * self.direction[1] - offset[1] * self.direction[0]))
+        if score < CONFIG.FIDUCIAL_MIN_SCORE or across > CONFIG.FIDUCIAL_TEMPLATE / 2:
+            return None
+        return float(np.dot(offset, self.direction)) / self.px_per_degree
+    
+    def _signature(self):
+        roi, _ = self._roi(self._frame())
+        return roi.astype(np.float32)
+    
+    def turn(self, increment, record=False, verify=False):
+        """One full clockwise turn in `increment` moves; returns per-move checks.
+        
+        record=True stores the ROI at each position as the reference;
+        verify=True compares each move with it and stops checking (but still
+        finishes the turn at the safe speed) at the first mismatch.
+        """
+        moves = int(round(360 / increment))
+        tolerance_px = max(0.5, CONFIG.FIDUCIAL_TOLERANCE * self.px_per_degree)
+        checks = []
+        if record:
+            self.signatures = []
+        window = None
+        for k in range(moves):
+            self.motor.rotate_degrees(increment, clockwise=True)
+            if record:
+                self.signatures.append(self._signature())
+            elif verify and self.signatures:
+                current = self._signature()
+                if window is None:
+                    window = cv2.createHanningWindow(current.shape[::-1], cv2.CV_32F)
+                (sx, sy), response = cv2.phaseCorrelate(self.signatures[k], current, window)
+                shift = float(np.hypot(sx, sy))
+                checks.append({'move': k + 1, 'angle': round((k + 1) * increment % 360, 2),
+                               'shift_px': round(shift, 2), 'response': round(float(response), 3),
+                               'ok': shift <= tolerance_px})
+                if shift > tolerance_px:
+                    verify = False
+                    self.station.pulse_delay_us, self.station.step_delay_ms = self.safe_speed
+        return checks
+    
+    def calibrate(self, increment=None, iterations=3):
+        """Iterate full turns, correcting the calibration factor from the residual error."""
+        increment = increment or CONFIG.ROTATION_INCREMENT
+        factor = self.station.calibration_factor
+        history = []
+        for _ in range(iterations):
+            self.turn(increment)
+            error = self.error_degrees()
+            if error is None:
+                raise RuntimeError("fiducial lost after a turn - the factor is far off, set it manually first")
+            history.append({'factor': factor, 'error': round(error, 4)})
+            self.log(f"  [VISION] Factor {factor:.6f}: turn error {error:+.3f} deg")
+            if abs(error) <= CONFIG.FIDUCIAL_TOLERANCE / 2:
+                break
+            # Commanded 360 deg, table actually turned 360 + error
+            factor *= 360.0 / (360.0 + error)
+            self.station.calibration_factor = factor
+            self.recover()
+        return factor, history
+    
+    def recover(self, attempts=3):
+        """Bring the table back onto the fiducial at the safe speed, keeping the logical position."""
+        logical = self.motor.position_steps
+        swept = 0.0
+        # Missed steps only ever leave the table behind, so look further clockwise
+        while self.error_degrees() is None:
+            if swept >= 360:
+                raise RuntimeError("fiducial lost - re-home the table manually")
+            self.motor.rotate_degrees(CONFIG.FIDUCIAL_SEARCH_STEP, clockwise=True)
+            swept += CONFIG.FIDUCIAL_SEARCH_STEP
+        for _ in range(attempts):
+            error = self.error_degrees()
+            if error is None:
+                raise RuntimeError("fiducial lost - re-home the table manually")
+            if abs(error) <= CONFIG.FIDUCIAL_TOLERANCE / 2:
+                break
+            self.motor.rotate_degrees(abs(error), clockwise=error < 0)
+        self.motor.set_position_steps(logical)
+    
+    def trial(self, pulse_us, step_ms, increment):
+        """One verified turn at the given timings (recovers position if it fails)."""
+        self.station.pulse_delay_us, self.station.step_delay_ms = pulse_us, step_ms
+        start = time.monotonic()
+        checks = self.turn(increment, verify=True)
+        elapsed = time.monotonic() - start
+        self.station.pulse_delay_us, self.station.step_delay_ms = self.safe_speed
+        error = self.error_degrees()
+        ok = (all(check['ok'] for check in checks) and error is not None
+              and abs(error) <= CONFIG.FIDUCIAL_TOLERANCE)
+        result = {'pulse_delay_us': pulse_us, 'step_delay_ms': step_ms, 'ok': ok,
+                  'final_error': None if error is None else round(error, 4),
+                  'failed_move': next((c['move'] for c in checks if not c['ok']), None),
+                  'turn_time': round(elapsed, 2)}
+        self.log(f"  [TUNE] pulse={pulse_us}us step={step_ms}ms -> {'OK' if ok else 'MISSED STEPS'}"
+                 f" (error {result['final_error']}, {elapsed:.1f}s)")
+        if not ok:
+            self.recover()
+        return result
+    
+    def tune_speed(self, increment=None):
+        """Search the fastest pulse / step delays with no missed steps; returns the profile."""
+        increment = increment or CONFIG.ROTATION_INCREMENT
+        self.safe_speed = self.station.speed()
+        safe_pulse, safe_step = self.safe_speed
+        self.log("  [TUNE] Reference turn at the current speed...")
+        self.turn(increment, record=True)
+        error = self.error_degrees()
+        if error is None or abs(error) > CONFIG.FIDUCIAL_TOLERANCE:
+            raise RuntimeError("the current speed already misses steps (or calibration is off)")
+        trials = []
+        
+        # Pulse delay: binary search between the floor and the known-good value
+        low, high = CONFIG.TUNE_MIN_PULSE_US, safe_pulse
+        trials.append(self.trial(low, safe_step, increment))
+        if trials[-1]['ok']:
+            high = low
+        while high - low > CONFIG.TUNE_RESOLUTION_US:
+            middle = (low + high) // 2
+            trials.append(self.trial(middle, safe_step, increment))
+            if trials[-1]['ok']:
+                high = middle
+            else:
+                low = middle
+        pulse = high
+        
+        # Step delay (whole ms) at that pulse delay
+        low, high = 0, int(safe_step)
+        while low < high:
+            middle = (low + high) // 2
+            trials.append(self.trial(pulse, middle, increment))
+            if trials[-1]['ok']:
+                high = middle
+            else:
+                low = middle + 1
+        step = high
+        
+        # Keep a margin, then confirm before adopting the profile
+        pulse = min(safe_pulse, int(round(pulse * (1 + CONFIG.TUNE_MARGIN))))
+        step = min(safe_step, int(np.ceil(step * (1 + CONFIG.TUNE_MARGIN))))
+        confirmed = all(self.trial(pulse, step, increment)['ok'] for _ in range(CONFIG.TUNE_CONFIRM_TURNS))
+        if not confirmed:
+            self.log("  [TUNE] Tuned profile failed confirmation - keeping the current speed")
+            pulse, step = safe_pulse, safe_step
+        self.station.pulse_delay_us, self.station.step_delay_ms = self.safe_speed
+        return {
+            'pulse_delay_us': pulse,
+            'step_delay_ms': step,
+            'confirmed': confirmed,
+            'calibration_factor': self.station.calibration_factor,
+            'px_per_degree': round(self.px_per_degree, 3),
+            'increment': increment,
+            'trials': trials,
+            'tuned': datetime.now().isoformat(timespec="seconds"),
+        }
+
+# =============================================================================
+# STORAGE MANAGER
+# =============================================================================
+class StorageManager:
+    def __init__(self, root=None):
+        self.local_path = root or CONFIG.LOCAL_STORAGE_PATH
+        self.current_piece_number = None
+        self.current_piece_id = None
+        self.current_folder = None
+        self.video_part = None  # suffix for videos of resumed scans
+        self.bundle = None  # ScanBundle being written for the current scan
+        os.makedirs(self.local_path, exist_ok=True)
+    
+    def set_piece_id(self, piece_number):
+        self.current_piece_number = int(piece_number)
+        self.current_piece_id = CONFIG.PIECE_ID_FORMAT.format(int(piece_number))
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.current_folder = os.path.join(self.local_path, f"{self.current_piece_id}_{timestamp}")
+        os.makedirs(self.current_folder, exist_ok=True)
+        return self.current_piece_id
+    
+    def open_folder(self, folder, piece_id, piece_number=None):
+        """Continue writing into an existing scan folder (resume)."""
+        self.current_piece_number = piece_number
+        self.current_piece_id = piece_id
+        self.current_folder = folder
+        os.makedirs(self.current_folder, exist_ok=True)
+        return self.current_piece_id
+    
+    def get_filepath(self, angle):
+        if not self.current_piece_id:
+            raise ValueError("Piece ID not set")
+        filename = f"{CONFIG.FILE_PREFIX}_{self.current_piece_id}_{int(angle):03d}deg.{CONFIG.FILE_EXTENSION}"
+        return os.path.join(self.current_folder, filename)
+    
+    def get_video_filepath(self):
+        """Get filepath for scan video."""
+        if not self.current_piece_id:
+            raise ValueError("Piece ID not set")
+        suffix = f"_{self.video_part}" if self.video_part else ""
+        filename = f"{CONFIG.FILE_PREFIX}_{self.current_piece_id}_scan{suffix}.mp4"
+        return os.path.join(self.current_folder, filename)
+    
+    def get_manifest_path(self):
+        """Get filepath for the scan manifest."""
+        if not self.current_folder:
+            raise ValueError("Piece ID not set")
+        return os.path.join(self.current_folder, "manifest.json")
+    
+    def open_bundle(self, log=print):
+        """Start (or continue) the scan bundle of the current folder."""
+        self.bundle = ScanBundle(self.current_folder, log) if CONFIG.BUNDLE_ENABLED else None
+        return self.bundle
+    
+    def close_bundle(self):
+        """Complete the bundle after the manifest is written; prune a finished scan's loose files."""
+        if self.bundle is None:
+            return None
+        journal_path = os.path.join(self.current_folder, ScanJournal.FILENAME)
+        finished = (not os.path.exists(journal_path)
+                    or ScanJournal.load(self.current_folder)['status'] not in ScanJournal.RESUMABLE)
+        path = self.bundle.close(prune=finished and not CONFIG.BUNDLE_KEEP_FILES)
+        self.bundle = None
+        return path
+    
+    def write_manifest(self, manifest):
+        """Write the scan manifest atomically into the scan folder."""
+        path = self.get_manifest_path()
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=2, default=str)
+        os.replace(tmp_path, path)
+        return path
+    
+    def find_last_manifest(self):
+        """Load the most recent manifest under the storage root (None if none)."""
+        latest = None
+        try:
+            for name in os.listdir(self.local_path):
+                path = os.path.join(self.local_path, name, "manifest.json")
+                if os.path.exists(path) and (latest is None or os.path.getmtime(path) > os.path.getmtime(latest)):
+                    latest = path
+            if latest:
+                with open(latest, 'r') as f:
+                    return json.load(f)
+        except Exception:
+            pass
+        return None
+    
+    def get_image_count(self):
+        if not self.current_folder or not os.path.exists(self.current_folder):
+            return 0
+        return len([f for f in os.listdir(self.current_folder) if f.endswith(f".{CONFIG.FILE_EXTENSION}")])
+    
+    def pending_transfers(self):
+        """Finished scan folders not yet shipped to the collector, oldest first.
+        
+        A scan is finished once its journal is closed (complete / aborted /
+        abandoned) and no spooled frames are left; interrupted or failed
+        scans wait for resume. A folder whose
+        manifest changed since it was shipped (resumed later) is shipped again.
+        """
+        pending = []
+        try:
+            names = sorted(os.listdir(self.local_path))
+        except OSError:
+            return pending
+        for name in names:
+            folder = os.path.join(self.local_path, name)
+            manifest_path = os.path.join(folder, "manifest.json")
+            if not os.path.exists(manifest_path):
+                continue
+            journal_path = os.path.join(folder, ScanJournal.FILENAME)
+            if os.path.exists(journal_path) and ScanJournal.load(folder)['status'] in ScanJournal.RESUMABLE:
+                continue
+            if FrameSpool.exists(folder):
+                continue  # stills not developed yet
+            marker = os.path.join(folder, IngestClient.MARKER)
+            if os.path.exists(marker):
+                try:
+                    with open(marker, 'r') as f:
+                        shipped = json.load(f).get('manifest_sha256')
+                except ValueError:
+                    shipped = None
+                if shipped == file_sha256(manifest_path):
+                    continue
+            pending.append(folder)
+        return pending
+    
+    def transfer_backlog(self):
+        """Number of scans waiting to be transferred off the station."""
+        return len(self.pending_transfers())
+    
+    def transfer_pending(self, client):
+        """Ship the backlog to the collector, oldest first.
+        
+        Stops at the first refusal (collector busy or unreachable): the rest
+        stays buffered locally and is retried later. Returns scans shipped.
+        """
+        shipped = 0
+        for folder in self.pending_transfers():
+            manifest_sha256 = file_sha256(os.path.join(folder, "manifest.json"))
+            result = client.send(folder, manifest_sha256)
+            if result not in ("stored", "duplicate"):
+                break
+            marker = {
+                'manifest_sha256': manifest_sha256,
+                'result': result,
+                'target': client.target,
+                'time': datetime.now().isoformat(timespec="seconds"),
+            }
+            with open(os.path.join(folder, IngestClient.MARKER), 'w') as f:
+                json.dump(marker, f, indent=2)
+            shipped += 1
+        return shipped
+    
+    def transfer_to_nas(self):
+        # TODO: Implement NAS transfer when configured
+        if CONFIG.NAS_ENABLED:
+            print("  [STORAGE] NAS transfer not yet implemented")
+        return False
+
+# =============================================================================
+# SCAN BUNDLE
+# =============================================================================
+class ScanBundle:
+    """A scan as one uncompressed zip (BUNDLE_NAME) inside its folder.
+    
+    Files are appended as the scan produces them (each still once it is
+    final), so the bundle grows sequentially and nothing is recompressed;
+    close() appends whatever else the folder holds and writes the central
+    index. Members are STORED, so any angle can be read in place through the
+    index, and the whole scan ships as one sequential read. A file that
+    changed since it was added (manifest, journal of a resumed scan) is
+    appended again; readers and export() take the last copy.
+    """
+    
+    KEEP_LOOSE = ("manifest.json", "scan_journal.jsonl")  # station-side bookkeeping reads these
+    KEEP_LOOSE_DIRS = ("review",)  # manifest['review'] opens review/index.html from the folder
+    
+    def __init__(self, folder, log=print):
+        self.folder = folder
+        self.path = os.path.join(folder, CONFIG.BUNDLE_NAME)
+        self.log = log
+        self._lock = threading.Lock()
+        self._added = {}  # arcname -> (size, mtime_ns, inode) of the file as this process added it
+        # Mode 'a' does not fail on a zip torn by a crash before close(): it would
+        # write a second archive after the orphaned members, so probe first
+        torn = os.path.exists(self.path) and not zipfile.is_zipfile(self.path)
+        try:
+            if not torn:
+                self._zip = zipfile.ZipFile(self.path, 'a', zipfile.ZIP_STORED)
+        except zipfile.BadZipFile:
+            torn = True
+        if torn:
+            # Start again: close() re-adds the loose files
+            self.log(f"  [BUNDLE] {CONFIG.BUNDLE_NAME} has no index (interrupted scan) - rebuilding")
+            self._zip = zipfile.ZipFile(self.path, 'w', zipfile.ZIP_STORED)
+    
+    def add(self, filepath, arcname=None):
+        """Append one file unless the bundle already holds this exact content."""
+        arcname = arcname or os.path.relpath(filepath, self.folder).replace(os.sep, "/")
+        with self._lock:
+            stat = os.stat(filepath)
+            key = (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+            info = self._zip.NameToInfo.get(arcname)
+            if info is not None and info.file_size == stat.st_size:
+                # Unchanged since this process added it; otherwise (same size,
+                # e.g. a rewritten manifest or a bundle reopened on resume) compare CRCs
+                if self._added.get(arcname) == key or info.CRC == file_crc32(filepath):
+                    self._added[arcname] = key
+                    return False
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")  # "Duplicate name": the newer copy wins
+                self._zip.write(filepath, arcname)
+            self._added[arcname] = key
+            return True
+    
+    def close(self, prune=False):
+        """Append the rest of the folder, write the index; prune=True drops the loose copies."""
+        added = []
+        for name in IngestClient.bundle_files(self.folder):
+            if name != CONFIG.BUNDLE_NAME:
+                self.add(os.path.join(self.folder, name), name.replace(os.sep, "/"))
+                added.append(name)
+        with self._lock:
+            self._zip.close()
+        if prune:
+            for name in added:
+                if name not in self.KEEP_LOOSE and name.split(os.sep)[0] not in self.KEEP_LOOSE_DIRS:
+                    os.remove(os.path.join(self.folder, name))
+            for dirpath, _, _ in sorted(os.walk(self.folder), reverse=True):
+                if dirpath != self.folder and not os.listdir(dirpath):
+                    os.rmdir(dirpath)
+        return self.path
+    
+    @staticmethod
+    def read(path, name):
+        """Bytes of one member, read in place through the index."""
+        with zipfile.ZipFile(path) as bundle:
+            return bundle.read(name)
+    
+    @classmethod
+    def read_angle(cls, path, angle):
+        """(file name, JPEG bytes) of the still taken at `angle`."""
+        manifest = json.loads(cls.read(path, "manifest.json"))
+        for image in manifest['images']:
+            if image['angle'] == angle:
+                return image['file'], cls.read(path, image['file'])
+        raise KeyError(f"no image at {angle} deg in {path}")
+    
+    @staticmethod
+    def export(path, destination):
+        """Restore the folder layout of a bundle into destination."""
+        os.makedirs(destination, exist_ok=True)
+        with zipfile.ZipFile(path) as bundle:
+            bundle.extractall(destination)  # later duplicates overwrite earlier ones
+            return len({info.filename for info in bundle.infolist()})
+
+
+def export_cli(args):
+    """`app.py export BUNDLE|SCAN_FOLDER [DEST] [--angle DEG]` - restore the folder layout (or one still)."""
+    angle = None
+    if "--angle" in args:
+        i = args.index("--angle")
+        angle, args = int(args[i + 1]), args[:i] + args[i + 2:]
+    if not args:
+        print("Usage: app.py export BUNDLE|SCAN_FOLDER [DEST] [--angle DEG]")
+        return 2
+    path = args[0]
+    if os.path.isdir(path):
+        path = os.path.join(path, CONFIG.BUNDLE_NAME)
+    try:
+        if angle is not None:
+            name, data = ScanBundle.read_angle(path, angle)
+            destination = args[1] if len(args) > 1 else "."
+            os.makedirs(destination, exist_ok=True)
+            target = os.path.join(destination, os.path.basename(name))
+            with open(target, 'wb') as f:
+                f.write(data)
+            print(f"  [BUNDLE] {target} ({len(data) / 1024:.0f} KB)")
+            return 0
+        destination = args[1] if len(args) > 1 else os.path.dirname(os.path.abspath(path))
+        count = ScanBundle.export(path, destination)
+    except (OSError, KeyError, ValueError, zipfile.BadZipFile) as e:
+        print(f"  [BUNDLE] Export failed: {e}")
+        return 1
+    print(f"  [BUNDLE] {count} files restored to {destination}")
+    return 0
+
+# =============================================================================
+# REVIEW EXPORT
+# =============================================================================
+class ReviewExporter:
+    """Builds the review bundle of a scan in <scan>/review/ while it is captured.
+    
+    Each angle gets a DeepZoom pyramid (tiles/<angle>.dzi plus <angle>_files/
+    <level>/<col>_<row>.jpeg), so a viewer fetches only the tiles it shows. A
+    small frame of each angle is kept for the spin sprite sheet, which finish()
+    writes together with review.json and a self-contained index.html viewer
+    (spin, plus a canvas tile viewer that zooms into any angle's pyramid).
+    add() runs on the storage executor and takes the developed frame when the
+    camera still has it, so the JPEG is not decoded again.
+    """
+    
+    DIRNAME = "review"
+    VIEWER_HTML = """<!doctype html>
+<meta charset="utf-8"><title>__TITLE__</title>
+<style>body{margin:0;background:#111;color:#ddd;font:14px sans-serif;text-align:center}
+#spin{cursor:ew-resize;margin:1em auto;touch-action:none}a{color:#8cf}
+#zoom{position:fixed;left:0;top:0;background:#111;cursor:move;touch-action:none}
+#close{position:fixed;right:1em;top:1em}</style>
+<div id="spin"></div><p><span id="label"></span> &middot; <a href="#" id="open">zoom</a></p>
+<canvas id="zoom" hidden></canvas><button id="close" hidden>close</button>
+<script>
+const r = __REVIEW__, s = r.sprite, el = document.getElementById("spin");
+let i = 0, x0 = null;
+el.style.width = s.frame_width + "px"; el.style.height = s.frame_height + "px";
+el.style.backgroundImage = "url(" + s.file + ")";
+function show(k) {
+  i = (k + r.angles.length) % r.angles.length;
+  el.style.backgroundPosition = (-(i % s.columns) * s.frame_width) + "px " + (-Math.floor(i / s.columns) * s.frame_height) + "px";
+  document.getElementById("label").textContent = r.angles[i] + "\u00b0";
+}
+el.onpointerdown = e => { x0 = e.clientX; };
+window.onpointerup = () => { x0 = null; };
+window.onpointermove = e => { if (x0 !== null && Math.abs(e.clientX - x0) > 8) { show(i + (e.clientX > x0 ? 1 : -1)); x0 = e.clientX; } };
+show(0);
+
+// DeepZoom tiles of one angle: the level matching the zoom, over the single-tile level while loading
+const z = document.getElementById("zoom"), ctx = z.getContext("2d"), close = document.getElementById("close");
+let d = null, pan = null, cache = new Map();
+function tile(level, col, row) {
+  const src = d.base + "_files/" + level + "/" + col + "_" + row + ".jpeg";
+  let img = cache.get(src);
+  if (!img) { img = new Image(); img.onload = draw; img.src = src; cache.set(src, img); }
+  return img.complete && img.naturalWidth ? img : null;
+}
+function drawLevel(level) {
+  const f = Math.pow(2, d.top - level), k = d.scale * f, t = r.tile_size, o = r.overlap;
+  const c1 = Math.min(Math.ceil(d.w / f / t), Math.ceil((z.width - d.x) / k / t));
+  const r1 = Math.min(Math.ceil(d.h / f / t), Math.ceil((z.height - d.y) / k / t));
+  for (let row = Math.max(0, Math.floor(-d.y / k / t)); row < r1; row++) {
+    for (let col = Math.max(0, Math.floor(-d.x / k / t)); col < c1; col++) {
+      const img = tile(level, col, row);
+      if (img) ctx.drawImage(img, d.x + Math.max(0, col * t - o) * k, d.y + Math.max(0, row * t - o) * k,
+                             img.naturalWidth * k, img.naturalHeight * k);
+    }
+  }
+}
+function draw() {
+  if (!d) return;
+  ctx.fillRect(0, 0, z.width, z.height);
+  const want = Math.max(0, Math.min(d.top, d.top + Math.ceil(Math.log2(d.scale))));
+  drawLevel(Math.min(want, d.coarse));
+  if (want > d.coarse) drawLevel(want);
+}
+function zoom(a) {
+  const [w, h] = r.sizes[a], top = Math.ceil(Math.log2(Math.max(w, h, 2)));
+  z.width = innerWidth; z.height = innerHeight; z.hidden = close.hidden = false;
+  const scale = Math.min(z.width / w, z.height / h);
+  d = {base: r.tiles[a].slice(0, -4), w: w, h: h, top: top, fit: scale, scale: scale,
+       coarse: Math.max(0, top - Math.ceil(Math.log2(Math.max(w, h) / r.tile_size))),
+       x: (z.width - w * scale) / 2, y: (z.height - h * scale) / 2};
+  cache = new Map(); ctx.fillStyle = "#111"; draw();
+}
+function unzoom() { z.hidden = close.hidden = true; d = null; }
+document.getElementById("open").onclick = e => { e.preventDefault(); zoom(r.angles[i]); };
+close.onclick = unzoom;
+window.onkeydown = e => { if (e.key === "Escape") unzoom(); };
+z.onwheel = e => {
+  e.preventDefault();
+  const f = Math.min(Math.max(Math.pow(2, -e.deltaY / 300), d.fit / 2 / d.scale), 4 / d.scale);
+  d.x = e.clientX - (e.clientX - d.x) * f; d.y = e.clientY - (e.clientY - d.y) * f; d.scale *= f; draw();
+};
+z.onpointerdown = e => { pan = [e.clientX, e.clientY]; z.setPointerCapture(e.pointerId); };
+z.onpointermove = e => { if (pan) { d.x += e.clientX - pan[0]; d.y += e.clientY - pan[1]; pan = [e.clientX, e.clientY]; draw(); } };
+z.onpointerup = () => { pan = null; };
+</script>
+"""
+    
+    def __init__(self, folder, piece_id=None):
+        self.folder = os.path.join(folder, self.DIRNAME)
+        self.tiles = os.path.join(self.folder, "tiles")
+        self.piece_id = piece_id
+        self.thumbnails = {}  # angle -> small BGR frame
+        self._lock = threading.Lock()
+        os.makedirs(self.tiles, exist_ok=True)
+    
+    def _name(self, angle):
+        return f"{int(angle):03d}"
+    
+    def add(self, angle, filepath, frame=None):
+        """Tile one angle (frame = the developed BGR still, if still in memory)."""
+        if frame is None:
+            frame = cv2.imread(filepath)
+            if frame is None:
+                return False
+        self.write_pyramid(frame, os.path.join(self.tiles, self._name(angle)))
+        self._thumbnail(angle, frame)
+        return True
+    
+    def _size(self, angle):
+        """[width, height] of an angle's pyramid, from its .dzi descriptor."""
+        size = ElementTree.parse(os.path.join(self.tiles, f"{self._name(angle)}.dzi")).getroot()[0]
+        return [int(size.get("Width")), int(size.get("Height"))]
+    
+    def _thumbnail(self, angle, frame):
+        h, w = frame.shape[:2]
+        width = CONFIG.REVIEW_SPRITE_WIDTH
+        small = cv2.resize(frame, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+        with self._lock:
+            self.thumbnails[angle] = small
+    
+    @staticmethod
+    def write_pyramid(image, base):
+        """Write a DeepZoom pyramid of image as base.dzi + base_files/ (descriptor last)."""
+        tile, overlap = CONFIG.REVIEW_TILE_SIZE, CONFIG.REVIEW_TILE_OVERLAP
+        params = [cv2.IMWRITE_JPEG_QUALITY, CONFIG.REVIEW_TILE_QUALITY]
+        height, width = image.shape[:2]
+        top = max(0, (max(width, height) - 1).bit_length())
+        level_image = image
+        for level in range(top, -1, -1):
+            h, w = level_image.shape[:2]
+            directory = os.path.join(f"{base}_files", str(level))
+            os.makedirs(directory, exist_ok=True)
+            for row in range((h + tile - 1) // tile):
+                y0 = max(0, row * tile - overlap)
+                y1 = min(h, (row + 1) * tile + overlap)
+                for col in range((w + tile - 1) // tile):
+                    x0 = max(0, col * tile - overlap)
+                    x1 = min(w, (col + 1) * tile + overlap)
+                    cv2.imwrite(os.path.join(directory, f"{col}_{row}.jpeg"), level_image[y0:y1, x0:x1], params)
+            if level:
+                level_image = cv2.resize(level_image, ((w + 1) // 2, (h + 1) // 2), interpolation=cv2.INTER_AREA)
+        with open(f"{base}.dzi", 'w') as f:
+            f.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" '
+                    f'Format="jpeg" Overlap="{overlap}" TileSize="{tile}">'
+                    f'<Size Width="{width}" Height="{height}"/></Image>\n')
+    
+    def finish(self, images):
+        """Complete missing angles (resumed scans), then write sprite, review.json and viewer."""
+        folder = os.path.dirname(self.folder)
+        for record in images:
+            angle = record['angle']
+            path = os.path.join(folder, record['file'])
+            if not os.path.exists(os.path.join(self.tiles, f"{self._name(angle)}.dzi")):
+                self.add(angle, path)
+            elif angle not in self.thumbnails:
+                # Tiled in an earlier run: a reduced decode is enough for the sprite
+                frame = cv2.imread(path, cv2.IMREAD_REDUCED_COLOR_4)
+                if frame is not None:
+                    self._thumbnail(angle, frame)
+        angles = sorted(self.thumbnails)
+        if not angles:
+            return None
+        frames = [self.thumbnails[angle] for angle in angles]
+        frame_h = max(frame.shape[0] for frame in frames)
+        frame_w = CONFIG.REVIEW_SPRITE_WIDTH
+        columns = min(CONFIG.REVIEW_SPRITE_COLUMNS, len(frames))
+        rows = (len(frames) + columns - 1) // columns
+        sprite = np.zeros((rows * frame_h, columns * frame_w, 3), np.uint8)
+        for i, frame in enumerate(frames):
+            y, x = (i // columns) * frame_h, (i % columns) * frame_w
+            sprite[y:y + frame.shape[0], x:x + frame.shape[1]] = frame
+        cv2.imwrite(os.path.join(self.folder, "sprite.jpg"), sprite,
+                    [cv2.IMWRITE_JPEG_QUALITY, CONFIG.REVIEW_TILE_QUALITY])
+        review = {
+            'piece_id': self.piece_id,
+            'angles': angles,
+            'sprite': {'file': "sprite.jpg", 'frame_width': frame_w, 'frame_height': frame_h,
+                       'columns': columns, 'rows': rows},
+            'tiles': {angle: f"tiles/{self._name(angle)}.dzi" for angle in angles},
+            'sizes': {angle: self._size(angle) for angle in angles},
+            'tile_size': CONFIG.REVIEW_TILE_SIZE,
+            'overlap': CONFIG.REVIEW_TILE_OVERLAP,
+        }
+        with open(os.path.join(self.folder, "review.json"), 'w') as f:
+            json.dump(review, f, indent=2)
+        html = self.VIEWER_HTML.replace("__TITLE__", str(self.piece_id or "scan"))
+        with open(os.path.join(self.folder, "index.html"), 'w') as f:
+            f.write(html.replace("__REVIEW__", json.dumps(review)))
+        return review
+
+# =============================================================================
+# FRAME SPOOL (spool capture: raw frames now, encoding when the station is idle)
+# =============================================================================
+class FrameSpool:
+    """Raw frames of one scan in a pre-allocated, memory-mapped file (<scan>/spool/).
+    
+    frames.raw holds the frames back to back exactly as the camera delivered
+    them. index.jsonl has one "frame" line per capture (file, angle, burst
+    mode, format, offset and shape of each frame) and one "done" line per
+    developed still, so a restarted process knows what is still waiting. The
+    latest capture of a file wins (re-shoots).
+    """
+    
+    DIRNAME = "spool"
+    DATA = "frames.raw"
+    INDEX = "index.jsonl"
+    
+    def __init__(self, folder, piece_id=None):
+        self.folder = folder
+        self.path = os.path.join(folder, self.DIRNAME)
+        self.piece_id = piece_id
+        self.frames = {}  # file -> latest "frame" record
+        self.results = {}  # file -> "done" record
+        self.used = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.path, exist_ok=True)
+        self._load()
+        self._fd = os.open(os.path.join(self.path, self.DATA), os.O_RDWR | os.O_CREAT, 0o644)
+        self.capacity = os.fstat(self._fd).st_size
+        self.map = mmap.mmap(self._fd, self.capacity) if self.capacity else None
+        if self.piece_id is not None and not os.path.getsize(os.path.join(self.path, self.INDEX)):
+            self._append({'type': "meta", 'piece_id': piece_id})
+    
+    @classmethod
+    def exists(cls, folder):
+        return os.path.isdir(os.path.join(folder, cls.DIRNAME))
+    
+    def _load(self):
+        index = os.path.join(self.path, self.INDEX)
+        if not os.path.exists(index):
+            open(index, 'w').close()
+            return
+        with open(index, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn last line from a crash mid-write
+                if record['type'] == "meta":
+                    self.piece_id = record['piece_id']
+                elif record['type'] == "frame":
+                    self.frames[record['file']] = record
+                    self.results.pop(record['file'], None)
+                    end = record['frames'][-1]
+                    self.used = max(self.used, end['offset'] + end['nbytes'])
+                elif record['type'] == "done":
+                    self.results[record['file']] = record
+    
+    def _append(self, record):
+        with open(os.path.join(self.path, self.INDEX), 'a') as f:
+            f.write(json.dumps(record) + "\n")
+    
+    def _grow(self, size):
+        """Make the data file at least size bytes, with its blocks allocated, and map it."""
+        if size <= self.capacity:
+            return
+        try:
+            # Allocated blocks: a full disk shows up here, not halfway through a scan
+            os.posix_fallocate(self._fd, 0, size)
+        except (AttributeError, OSError) as e:
+            if isinstance(e, OSError) and e.errno == errno.ENOSPC:
+                raise
+            os.ftruncate(self._fd, size)  # filesystem without fallocate
+        if self.map is not None:
+            self.map.close()
+        self.map = mmap.mmap(self._fd, size)
+        self.capacity = size
+    
+    def reserve(self, nbytes):
+        """Pre-allocate room for nbytes more of frames."""
+        with self._lock:
+            self._grow(self.used + nbytes)
+        return self.capacity
+    
+    def put(self, file, mode, main_format, frames, angle=None):
+        """Copy captured frames into the map and index them (camera thread; no encoding)."""
+        with self._lock:
+            offset = self.used
+            needed = offset + sum(frame.nbytes for frame in frames)
+            if needed > self.capacity:
+                self._grow(max(needed, self.capacity + self.capacity // 4))
+            parts = []
+            for frame in frames:
+                view = np.frombuffer(self.map, dtype=np.uint8, count=frame.nbytes, offset=offset)
+                view[:] = frame.reshape(-1).view(np.uint8)
+                del view  # an exported buffer would keep the map from being remapped
+                parts.append({'offset': offset, 'nbytes': frame.nbytes,
+                              'shape': list(frame.shape), 'dtype': str(frame.dtype)})
+                offset += frame.nbytes
+            self.used = offset
+            record = {'type': "frame", 'file': file, 'angle': angle, 'mode': mode,
+                      'format': main_format, 'frames': parts}
+            self._append(record)
+            self.frames[file] = record
+            self.results.pop(file, None)
+    
+    def holds(self, file):
+        """True while file has a captured frame that is not developed yet."""
+        with self._lock:
+            return file in self.frames and file not in self.results
+    
+    def sync(self):
+        """Flush the mapped frames and the index to disk (before the journal counts them)."""
+        with self._lock:
+            if self.map is not None:
+                self.map.flush()
+            with open(os.path.join(self.path, self.INDEX), 'a') as f:
+                os.fsync(f.fileno())
+    
+    def read(self, record):
+        """Copies of the frames of one "frame" record."""
+        with self._lock:
+            return [np.frombuffer(self.map, dtype=part['dtype'], count=int(np.prod(part['shape'])),
+                                  offset=part['offset']).reshape(part['shape']).copy()
+                    for part in record['frames']]
+    
+    def done(self, file, **result):
+        record = dict(result, type="done", file=file)
+        with self._lock:
+            self._append(record)
+            self.results[file] = record
+    
+    def pending(self):
+        """Frame records still to develop, in capture order."""
+        with self._lock:
+            records = [record for file, record in self.frames.items() if file not in self.results]
+        return sorted(records, key=lambda record: record['frames'][0]['offset'])
+    
+    def summary(self):
+        pending = self.pending()
+        return {'frames': len(self.frames), 'pending': len(pending),
+                'pending_bytes': sum(part['nbytes'] for record in pending for part in record['frames']),
+                'allocated': self.capacity}
+    
+    def close(self):
+        with self._lock:
+            if self.map is not None:
+                self.map.close()
+                self.map = None
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+    
+    def remove(self):
+        self.close()
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class SpoolManager:
+    """Frame spools under one station's storage root, developed one still at a time.
+    
+    ScanService calls step() on the storage executor while the station is idle.
+    Spools left by an earlier run are found again by discover(). Once a scan
+    is final (journal closed, not resumable) and all its frames are developed,
+    the manifest gets their sizes and checksums, the spin video, review export
+    and bundle are made and the spool is deleted. Until then the scan stays
+    out of the transfer backlog. Messages go to `log` (the service's "log"
+    event) and the last one is kept as `notice` for the main menu.
+    """
+    
+    def __init__(self, root, log=print):
+        self.root = root
+        self.log = log
+        self.notice = None
+        self.spools = {}  # scan folder -> FrameSpool
+        self.reviews = {}  # scan folder -> ReviewExporter fed while developing
+        self.active = None  # scan folder being developed
+        self.developed = 0
+        self._developer = None
+        self._lock = threading.Lock()
+    
+    def open(self, folder, piece_id=None):
+        """The spool of a scan folder (created, or the one already open)."""
+        with self._lock:
+            spool = self.spools.get(folder)
+            if spool is None:
+                spool = self.spools[folder] = FrameSpool(folder, piece_id)
+            return spool
+    
+    def discard(self, folder):
+        """Delete the spool of a scan that encoded as it went, unless an earlier run left frames in it."""
+        with self._lock:
+            spool = self.spools.get(folder)
+            if spool is None or spool.frames:
+                return False
+            del self.spools[folder]
+        spool.remove()
+        return True
+    
+    def discover(self):
+        """Reopen the spools left under the storage root; returns how many."""
+        try:
+            names = sorted(os.listdir(self.root))
+        except OSError:
+            return 0
+        for name in names:
+            folder = os.path.join(self.root, name)
+            if FrameSpool.exists(folder):
+                try:
+                    self.open(folder)
+                except (OSError, ValueError) as e:
+                    self.report(f"  [SPOOL] Cannot open the spool of {name}: {e}")
+        status = self.status()
+        if status['scans']:
+            self.report(f"  [SPOOL] {status['frames']} frame(s) of {status['scans']} scan(s) waiting to be developed")
+        return status['scans']
+    
+    def status(self):
+        with self._lock:
+            spools = list(self.spools.values())
+        summaries = [spool.summary() for spool in spools]
+        return {
+            'scans': len(spools),
+            'frames': sum(summary['pending'] for summary in summaries),
+            'bytes': sum(summary['pending_bytes'] for summary in summaries),
+            'developing': os.path.basename(self.active) if self.active else None,
+            'developed': self.developed,
+            'notice': self.notice,
+        }
+    
+    def report(self, message):
+        """Log a message and keep it as the notice shown by the main menu."""
+        self.notice = message
+        self.log(message)
+    
+    def describe(self):
+        """One-line backlog for the kiosk."""
+        status = self.status()
+        if not status['scans']:
+            return "empty"
+        text = f"{status['frames']} frame(s) in {status['scans']} scan(s), {status['bytes'] / 1024**3:.1f} GB"
+        return text + (f" - developing {status['developing']}" if status['developing'] else " - develops when idle")
+    
+    def developer(self):
+        """Camera-less CameraController used for its develop() and overlay code."""
+        if self._developer is None:
+            self._developer = CameraController(verbose=False, open_camera=False)
+        return self._developer
+    
+    def _review(self, spool):
+        if not (CONFIG.REVIEW_ENABLED and CV2_AVAILABLE and NUMPY_AVAILABLE):
+            return None
+        if spool.folder not in self.reviews:
+            self.reviews[spool.folder] = ReviewExporter(spool.folder, spool.piece_id)
+        return self.reviews[spool.folder]
+    
+    @staticmethod
+    def _final(folder):
+        if not os.path.exists(os.path.join(folder, ScanJournal.FILENAME)):
+            return True
+        return ScanJournal.load(folder)['status'] not in ScanJournal.RESUMABLE
+    
+    def step(self, busy=()):
+        """Develop one frame or finish one spool: "frame", "scan", or None when nothing can be done."""
+        with self._lock:
+            spools = sorted(self.spools.items())
+        try:
+            for folder, spool in spools:
+                if folder in busy:
+                    continue
+                pending = spool.pending()
+                if pending:
+                    self._develop(spool, pending[0])
+                    return "frame"
+                if self._final(folder):
+                    self._finish(spool)
+                    return "scan"
+            return None
+        finally:
+            self.active = None
+    
+    def _develop(self, spool, record):
+        """Encode one spooled still (merge, overlay, JPEG), checksum it and tile it for review."""
+        self.active = spool.folder
+        filepath = os.path.join(spool.folder, record['file'])
+        developer = self.developer()
+        start = time.monotonic()
+        try:
+            developer.main_format = record['format']
+            developer.pending_bursts[filepath] = (record['mode'], spool.read(record))
+            developed = []
+            if not developer.develop(filepath, record['angle'], on_frame=developed.append):
+                raise RuntimeError("JPEG encoding failed")
+            result = {'size': os.path.getsize(filepath), 'sha256': file_sha256(filepath)}
+        except Exception as e:
+            developer.pending_bursts.pop(filepath, None)
+            self.report(f"  [SPOOL] Developing {record['file']} failed: {e}")
+            result, developed = {'error': str(e)}, []
+        review = self._review(spool)
+        if review is not None and developed:
+            try:
+                review.add(record['angle'], filepath, developed[0])
+            except Exception as e:
+                self.report(f"  [REVIEW] Tiling {record['file']} failed: {e}")
+        spool.done(record['file'], elapsed=round(time.monotonic() - start, 3), **result)
+        self.developed += 1
+    
+    def _spin_video(self, storage, images):
+        """Turntable video from the developed stills (the live recording is skipped when spooling)."""
+        if not CV2_AVAILABLE or not images:
+            return None
+        path = storage.get_video_filepath()
+        developer = self.developer()
+        if not developer.start_video_recording(path):
+            return None
+        try:
+            for record in images:
+                frame = cv2.imread(os.path.join(storage.current_folder, record['file']), cv2.IMREAD_REDUCED_COLOR_4)
+                if frame is None:
+                    continue
+                frame = cv2.resize(frame, tuple(CONFIG.CAMERA_PREVIEW_SIZE))
+                for _ in range(CONFIG.SPOOL_VIDEO_HOLD):
+                    developer.video_writer.write(frame)
+                developer.video_frame_count += CONFIG.SPOOL_VIDEO_HOLD
+        finally:
+            developer.stop_video_recording()
+        return os.path.basename(path)
+    
+    def _finish(self, spool):
+        """Complete the manifest of a fully developed, final scan and drop its spool."""
+        folder = spool.folder
+        self.active = folder
+        storage = StorageManager(self.root)
+        storage.open_folder(folder, spool.piece_id)
+        manifest = None
+        if os.path.exists(storage.get_manifest_path()):
+            with open(storage.get_manifest_path(), 'r') as f:
+                manifest = json.load(f)
+        if manifest is not None:
+            images = sorted(manifest.get('images', []), key=lambda r: r['index'])
+            for record in images:
+                result = spool.results.get(record['file'])
+                if result is None:
+                    continue
+                record.pop('spooled', None)
+                if 'error' in result:
+                    record['spool_error'] = result['error']
+                else:
+                    record['size'], record['sha256'] = result['size'], result['sha256']
+            developed = [record for record in images if record.get('sha256')]
+            if not manifest.get('video'):
+                manifest['video'] = self._spin_video(storage, developed)
+            review = self._review(spool)
+            if review is not None and developed:
+                try:
+                    if review.finish(developed) is not None:
+                        manifest['review'] = f"{ReviewExporter.DIRNAME}/index.html"
+                except Exception as e:
+                    self.report(f"  [REVIEW] Export failed: {e}")
+            manifest['images'] = images
+            manifest['bundle'] = CONFIG.BUNDLE_NAME if CONFIG.BUNDLE_ENABLED else None
+            manifest['spool'] = {
+                'frames': len(spool.results),
+                'errors': sum(1 for result in spool.results.values() if 'error' in result),
+                'develop_s': round(sum(result.get('elapsed', 0) for result in spool.results.values()), 2),
+                'developed': datetime.now().isoformat(timespec="seconds"),
+            }
+            storage.write_manifest(manifest)
+        # Dropped before the bundle prunes the loose stills, so a restart never develops into a pruned folder
+        spool.remove()
+        with self._lock:
+            self.spools.pop(folder, None)
+        self.reviews.pop(folder, None)
+        if CONFIG.BUNDLE_ENABLED:
+            storage.open_bundle(self.log)
+            storage.close_bundle()
+        self.report(f"  [SPOOL] {os.path.basename(folder)} developed ({len(spool.results)} still(s))")
+
+# =============================================================================
+# FLEET INGESTION (station side)
+# =============================================================================
+class IngestClient:
+    """Publishes finished scan folders to the fleet collector (ingest.py).
+    
+    Drop directory: the folder is copied to <drop>/incoming/.<name>.partial and
+    renamed to <name> once complete, so the collector never sees half a bundle.
+    Socket: the offer / stream protocol of ingest.BundleReceiver.
+    Either way the collector's back-pressure is honoured: when it is busy (or
+    unreachable) send() returns without copying and the scan stays buffered.
+    """
+    
+    MARKER = "transferred.json"  # written into the scan folder once shipped
+    
+    CHUNK = 1024 * 1024  # bytes per write while a transfer rate is set
+    
+    def __init__(self, drop_dir=None, socket_path=None, rate=None):
+        self.socket_path = socket_path if socket_path is not None else CONFIG.INGEST_SOCKET
+        self.drop_dir = drop_dir or CONFIG.INGEST_DROP_DIR
+        self.target = self.socket_path or self.drop_dir
+        self.rate = rate  # callable -> bytes/s (0 = unlimited), re-read per chunk
+    
+    def _limit(self):
+        return self.rate() if self.rate is not None else 0
+    
+    def _pace(self, sent, started):
+        """Sleep until sent bytes fit the current transfer rate."""
+        rate = self._limit()
+        if rate:
+            delay = started + sent / rate - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    
+    def _copy(self, src, dst):
+        """shutil copy_function honouring the transfer rate."""
+        if not self._limit():
+            return shutil.copy2(src, dst)
+        started, sent = time.monotonic(), 0
+        with open(src, 'rb') as fin, open(dst, 'wb') as fout:
+            while chunk := fin.read(self.CHUNK):
+                fout.write(chunk)
+                sent += len(chunk)
+                self._pace(sent, started)
+        shutil.copystat(src, dst)
+        return dst
+    
+    def _stream(self, sock, f):
+        """Send one file over the socket, in paced chunks when a rate is set."""
+        if not self._limit():
+            sock.sendfile(f)
+            return
+        started, sent = time.monotonic(), 0
+        while True:
+            count = sock.sendfile(f, sent, self.CHUNK)
+            if not count:
+                return
+            sent += count
+            self._pace(sent, started)
+    
+    @classmethod
+    def bundle_files(cls, folder):
+        """Relative paths of the files that make up a scan bundle."""
+        files = []
+        for dirpath, _, filenames in os.walk(folder):
+            for filename in filenames:
+                if filename == cls.MARKER or filename.endswith(".tmp"):
+                    continue
+                files.append(os.path.relpath(os.path.join(dirpath, filename), folder))
+        return sorted(files)
+    
+    @classmethod
+    def transfer_files(cls, folder):
+        """bundle_files() to ship: with a scan.zip, the loose review/ copy (also in the zip) stays home."""
+        files = cls.bundle_files(folder)
+        if CONFIG.BUNDLE_NAME in files:
+            files = [name for name in files if name.split(os.sep)[0] not in ScanBundle.KEEP_LOOSE_DIRS]
+        return files
+    
+    def bundle_name(self, folder):
+        """Fleet-unique bundle name: <table>__<station>__<scan folder>."""
+        try:
+            with open(os.path.join(folder, "manifest.json"), 'r') as f:
+                station = json.load(f).get('station') or "A"
+        except (OSError, ValueError):
+            station = "A"
+        return f"{CONFIG.TABLE_ID}__{station}__{os.path.basename(folder)}"
+    
+    def send(self, folder, manifest_sha256):
+        """Ship one scan folder: "stored", "duplicate", "busy" or "offline"."""
+        try:
+            if self.socket_path:
+                return self._send_socket(folder, manifest_sha256)
+            return self._send_drop(folder)
+        except (OSError, ValueError):
+            return "offline"
+    
+    def _send_drop(self, folder):
+        with open(os.path.join(self.drop_dir, "status.json"), 'r') as f:
+            status = json.load(f)
+        if time.time() - status.get('updated', 0) > CONFIG.INGEST_STATUS_MAX_AGE:
+            return "offline"
+        incoming = os.path.join(self.drop_dir, "incoming")
+        # status.json is only refreshed per collector poll; count what is queued now
+        waiting = len([name for name in os.listdir(incoming) if not name.startswith(".")])
+        if not status.get('accepting') or waiting >= status.get('max_pending', float("inf")):
+            return "busy"
+        name = self.bundle_name(folder)
+        partial = os.path.join(incoming, f".{name}.partial")
+        if os.path.exists(partial):
+            shutil.rmtree(partial)  # left over from an interrupted copy
+        for file in self.transfer_files(folder):
+            os.makedirs(os.path.dirname(os.path.join(partial, file)), exist_ok=True)
+            self._copy(os.path.join(folder, file), os.path.join(partial, file))
+        os.rename(partial, os.path.join(incoming, name))
+        return "stored"
+    
+    def _send_socket(self, folder, manifest_sha256):
+        files = self.transfer_files(folder)
+        offer = {
+            'cmd': "offer",
+            'name': self.bundle_name(folder),
+            'manifest_sha256': manifest_sha256,
+            'files': [{'name': name, 'size': os.path.getsize(os.path.join(folder, name))} for name in files],
+        }
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(30.0)
+            sock.connect(self.socket_path)
+            sock.sendall((json.dumps(offer) + "\n").encode())
+            with sock.makefile("r") as replies:
+                reply = json.loads(replies.readline())
+                if reply.get('duplicate'):
+                    return "duplicate"
+                if not reply.get('accept'):
+                    return "busy" if reply.get('busy') else "offline"
+                for name in files:
+                    with open(os.path.join(folder, name), 'rb') as f:
+                        self._stream(sock, f)
+                reply = json.loads(replies.readline())
+        if reply.get('duplicate'):
+            return "duplicate"
+        return "stored" if reply.get('stored') else "offline"
+
+
+class ScanJournal:
+    """Append-only, fsync'd JSON-lines journal kept in each scan folder.
+    
+    Records, in order: one "header" (the scan plan), one "angle" per finished
+    image (target angle, step position, file, sha256), a "resume" each time the
+    scan is continued, and a final "closed" with status complete / aborted /
+    failed / abandoned. A journal with no "closed" record (crash, power loss)
+    or a "failed" one is offered for resume at startup.
+    """
+    
+    FILENAME = "scan_journal.jsonl"
+    RESUMABLE = (None, "failed")
+    
+    def __init__(self, folder):
+        self.path = os.path.join(folder, self.FILENAME)
+        self._lock = threading.Lock()
+    
+    def write(self, record_type, **data):
+        record = dict(data, type=record_type, time=datetime.now().isoformat(timespec="seconds"))
+        line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
+    
+    def close(self, status):
+        self.write("closed", status=status)
+    
+    @classmethod
+    def load(cls, folder):
+        """Replay a journal: header, finished angles (angle -> record), status, resume count."""
+        state = {'header': None, 'done': {}, 'status': None, 'resumes': 0}
+        with open(os.path.join(folder, cls.FILENAME), 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn last line from a crash mid-write
+                if record['type'] == "header":
+                    state['header'] = record
+                elif record['type'] == "angle":
+                    state['done'][record['angle']] = record
+                elif record['type'] == "resume":
+                    state['resumes'] += 1
+                    state['status'] = None
+                elif record['type'] == "closed":
+                    state['status'] = record['status']
+        return state
+    
+    @classmethod
+    def find_interrupted(cls, root):
+        """Scan folders under root whose journal can be resumed (oldest first)."""
+        found = []
+        try:
+            names = sorted(os.listdir(root))
+        except OSError:
+            return found
+        for name in names:
+            folder = os.path.join(root, name)
+            if not os.path.exists(os.path.join(folder, cls.FILENAME)):
+                continue
+            try:
+                state = cls.load(folder)
+            except OSError:
+                continue
+            if state['header'] is not None and state['status'] in cls.RESUMABLE:
+                found.append(folder)
+        return found
+
+# =============================================================================
+# ASYNC ORCHESTRATION
+# =============================================================================
+async def ainput(prompt=""):
+    """Read one line from stdin without blocking the event loop (cancellable)."""
+    if prompt:
+        print(prompt, end="", flush=True)
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    
+    def _on_readable():
+        if not future.done():
+            future.set_result(sys.stdin.readline())
+    
+    try:
+        fd = sys.stdin.fileno()
+        loop.add_reader(fd, _on_readable)
+    except (NotImplementedError, ValueError, OSError, AttributeError):
+        # No selectable stdin (e.g. Windows console) - fall back to a thread
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+    else:
+        try:
+            line = await future
+        finally:
+            loop.remove_reader(fd)
+    if not line:
+        raise EOFError("stdin closed")
+    return line.rstrip("\n")
+
+
+class FairExecutor:
+    """Worker pool shared by all stations, serving per-station lanes round-robin.
+    
+    Each lane is a FIFO queue (one per station); idle workers take the next job
+    from the next non-empty lane, so a burst of overlays from one station cannot
+    push back another station's frames. Workers lower their own OS priority by
+    PIPELINE_NICE and stay off the cores given in `avoid_cpus` (the motion
+    threads'), so CPU-heavy encoding never delays the motor pulses.
+    """
+    
+    def __init__(self, workers, nice=0, avoid_cpus=()):
+        self.nice = nice
+        self.avoid_cpus = set(avoid_cpus)
+        self.limit = workers
+        self._running = 0
+        self._lanes = collections.OrderedDict()
+        self._cond = threading.Condition()
+        self._shutdown = False
+        self._threads = []
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f"pipeline-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+    
+    def lane(self, key):
+        """concurrent.futures.Executor view that queues onto one lane."""
+        return _FairLane(self, key)
+    
+    def submit(self, key, fn, *args, **kwargs):
+        future = Future()
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._lanes.setdefault(key, collections.deque()).append((future, fn, args, kwargs))
+            self._cond.notify()
+        return future
+    
+    def backlog(self):
+        """Queued (not yet running) jobs per lane."""
+        with self._cond:
+            return {key: len(queue) for key, queue in self._lanes.items()}
+    
+    def resize(self, workers):
+        """Cap how many jobs run at once (1 .. the threads started); running jobs finish."""
+        with self._cond:
+            self.limit = max(1, min(workers, len(self._threads)))
+            self._cond.notify_all()
+    
+    def _next_job(self):
+        if self._running >= self.limit:
+            return None
+        # Rotate through the lanes so the one served last goes to the back
+        for _ in range(len(self._lanes)):
+            key, queue = next(iter(self._lanes.items()))
+            self._lanes.move_to_end(key)
+            if queue:
+                return queue.popleft()
+        return None
+    
+    def _worker(self):
+        if self.nice:
+            try:
+                # Linux applies nice values per thread
+                os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), self.nice)
+            except (AttributeError, OSError):
+                pass
+        if self.avoid_cpus and hasattr(os, "sched_setaffinity"):
+            try:
+                allowed = os.sched_getaffinity(0) - self.avoid_cpus
+                if allowed:
+                    os.sched_setaffinity(0, allowed)
+            except OSError:
+                pass
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    if self._shutdown:
+                        return
+                    self._cond.wait()
+                    job = self._next_job()
+                self._running += 1
+            future, fn, args, kwargs = job
+            try:
+                if future.set_running_or_notify_cancel():
+                    future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    self._cond.notify()
+    
+    def shutdown(self, wait=False):
+        with self._cond:
+            self._shutdown = True
+            for queue in self._lanes.values():
+                for future, *_ in queue:
+                    future.cancel()
+                queue.clear()
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+class _FairLane(Executor):
+    def __init__(self, pool, key):
+        self.pool = pool
+        self.key = key
+    
+    def submit(self, fn, /, *args, **kwargs):
+        return self.pool.submit(self.key, fn, *args, **kwargs)
+
+
+class SystemMonitor:
+    """Reads SoC temperature, throttle flags and CPU load from /sys and /proc.
+    
+    root replaces "/" so a directory of plain files can stand in for the
+    kernel interfaces; any file that is missing reads as None.
+    """
+    
+    TEMPERATURE = "sys/class/thermal/thermal_zone0/temp"  # millidegrees C
+    THROTTLED = "sys/devices/platform/soc/soc:firmware/get_throttled"  # hex flags (Raspberry Pi)
+    FREQUENCY = "sys/devices/system/cpu/cpu0/cpufreq/scaling_cur_freq"  # kHz
+    STAT = "proc/stat"
+    THROTTLED_NOW = 0xF  # under-voltage, frequency capped, throttled, soft temperature limit
+    
+    def __init__(self, root=None):
+        self.root = root or CONFIG.SCHEDULER_SYS_ROOT
+        self._cpu_times = None
+    
+    def _read(self, name):
+        try:
+            with open(os.path.join(self.root, name), 'r') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def _cpu_busy(self):
+        """Busy fraction of all CPUs since the previous call (None on the first)."""
+        text = self._read(self.STAT)
+        if not text:
+            return None
+        fields = [int(value) for value in text.split("\n", 1)[0].split()[1:]]
+        idle = sum(fields[3:5])  # idle + iowait
+        total = sum(fields)
+        previous, self._cpu_times = self._cpu_times, (idle, total)
+        if previous is None or total <= previous[1]:
+            return None
+        return 1.0 - (idle - previous[0]) / (total - previous[1])
+    
+    def sample(self):
+        temp = self._read(self.TEMPERATURE)
+        throttled = self._read(self.THROTTLED)
+        frequency = self._read(self.FREQUENCY)
+        busy = self._cpu_busy()
+        return {
+            'temp_c': round(int(temp) / 1000, 1) if temp and temp.strip() else None,
+            'throttled': int(throttled, 16) if throttled and throttled.strip() else None,
+            'cpu_busy': round(busy, 3) if busy is not None else None,
+            'freq_mhz': int(frequency) // 1000 if frequency and frequency.strip() else None,
+        }
+
+
+class LoadScheduler:
+    """Adapts background concurrency to the SoC's thermal state and load.
+    
+    Runs on the AsyncCore loop, sampling SystemMonitor every SCHEDULER_INTERVAL
+    and timing the capture phase of every scan. It moves between the levels
+    normal / warm / hot one step at a time (with hysteresis on the way back)
+    and applies each level's pipeline worker count, review deferral and ingest
+    transfer rate. Every change is kept as an adaptation record for the scan
+    manifests.
+    """
+    
+    LEVELS = ("normal", "warm", "hot")
+    
+    def __init__(self, pipeline, monitor=None):
+        self.pipeline = pipeline
+        self.monitor = monitor or SystemMonitor()
+        self.level = 0
+        self.last = {}
+        self.samples = collections.deque(maxlen=3600)
+        self.adaptations = collections.deque(maxlen=500)
+        self.captures = collections.deque(maxlen=5)
+        self.listeners = []
+        self.notice = None  # last level change or sampling error, shown by the main menu
+        self._seq = 0
+    
+    @property
+    def workers(self):
+        return CONFIG.SCHEDULER_PIPELINE_WORKERS[self.level]
+    
+    @property
+    def transfer_rate(self):
+        return CONFIG.SCHEDULER_TRANSFER_RATES[self.level]
+    
+    @property
+    def defer_review(self):
+        return self.level >= CONFIG.SCHEDULER_DEFER_REVIEW_LEVEL
+    
+    def observe_capture(self, elapsed):
+        """Record the latency of one capture phase (the path being protected)."""
+        self.captures.append(elapsed)
+    
+    def capture_latency(self):
+        return sum(self.captures) / len(self.captures) if self.captures else None
+    
+    def _target(self, sample):
+        """Level the sample calls for, and why."""
+        temp, throttled, busy = sample['temp_c'], sample['throttled'], sample['cpu_busy']
+        latency = self.capture_latency()
+        if throttled is not None and throttled & SystemMonitor.THROTTLED_NOW:
+            target, reason = 2, f"throttled 0x{throttled:x}"
+        elif temp is not None and temp >= CONFIG.SCHEDULER_TEMP_HOT:
+            target, reason = 2, f"{temp:.1f}C"
+        elif temp is not None and temp >= CONFIG.SCHEDULER_TEMP_WARM:
+            target, reason = 1, f"{temp:.1f}C"
+        elif busy is not None and busy >= CONFIG.SCHEDULER_CPU_HIGH:
+            target, reason = 1, f"CPU {busy:.0%}"
+        elif latency is not None and latency > CONFIG.SCHEDULER_CAPTURE_BUDGET:
+            target, reason = 1, f"capture {latency:.2f}s over budget"
+        else:
+            target, reason = 0, "cool"
+        # Step back only once clearly below the threshold of the current level
+        hysteresis = CONFIG.SCHEDULER_TEMP_HYSTERESIS
+        if self.level == 2 and target < 2 and temp is not None and temp > CONFIG.SCHEDULER_TEMP_HOT - hysteresis:
+            return 2, f"{temp:.1f}C"
+        if self.level >= 1 and target == 0:
+            if temp is not None and temp > CONFIG.SCHEDULER_TEMP_WARM - hysteresis:
+                return 1, f"{temp:.1f}C"
+            if busy is not None and busy > CONFIG.SCHEDULER_CPU_LOW:
+                return 1, f"CPU {busy:.0%}"
+        return target, reason
+    
+    def update(self, sample=None):
+        """Take one sample and move one level towards its target; returns the adaptation or None."""
+        sample = sample if sample is not None else self.monitor.sample()
+        sample['capture_s'] = round(self.capture_latency(), 3) if self.captures else None
+        self.last = sample
+        self.samples.append((time.time(), sample))
+        target, reason = self._target(sample)
+        if target == self.level:
+            return None
+        previous = self.level
+        self.level += 1 if target > self.level else -1
+        self.pipeline.resize(self.workers)
+        self._seq += 1
+        adaptation = {
+            'seq': self._seq,
+            'time': datetime.now().isoformat(timespec="seconds"),
+            'level': self.LEVELS[self.level],
+            'from': self.LEVELS[previous],
+            'reason': reason,
+            **sample,
+            'workers': self.workers,
+            'review_deferred': self.defer_review,
+            'transfer_rate': self.transfer_rate,
+        }
+        rate = f"{self.transfer_rate / 1024**2:.0f} MB/s" if self.transfer_rate else "unlimited"
+        adaptation['message'] = (f"  [SCHED] {adaptation['from']} -> {adaptation['level']} ({reason}): "
+                                 f"{self.workers} pipeline worker(s), "
+                                 f"review {'deferred' if self.defer_review else 'inline'}, transfer {rate}")
+        self.adaptations.append(adaptation)
+        # Runs on the core loop: never print over the menu or a scan's panel
+        self.notice = adaptation['message']
+        for listener in list(self.listeners):
+            try:
+                listener(adaptation)
+            except Exception:
+                pass
+        return adaptation
+    
+    def status(self):
+        return {'level': self.LEVELS[self.level], 'workers': self.workers,
+                'review_deferred': self.defer_review, 'transfer_rate': self.transfer_rate,
+                'notice': self.notice, **self.last}
+    
+    def telemetry(self, since_seq=0, since_time=0.0):
+        """Adaptations and peak readings since a scan started, for its manifest."""
+        window = [sample for when, sample in self.samples if when >= since_time]
+        
+        def peak(key):
+            values = [sample[key] for sample in window if sample.get(key) is not None]
+            return max(values) if values else None
+        
+        return {
+            'level': self.LEVELS[self.level],
+            'peak_temp_c': peak('temp_c'),
+            'peak_cpu_busy': peak('cpu_busy'),
+            'min_freq_mhz': min((s['freq_mhz'] for s in window if s.get('freq_mhz')), default=None),
+            'throttled': any((s.get('throttled') or 0) & SystemMonitor.THROTTLED_NOW for s in window),
+            'adaptations': [a for a in self.adaptations if a['seq'] > since_seq],
+        }
+    
+    async def run(self):
+        """Sampling loop on the core loop; cancel to stop."""
+        while True:
+            try:
+                self.update()
+            except Exception as e:
+                self.last = dict(self.last, error=str(e))
+                self.notice = f"  [SCHED] Sample failed: {e}"
+            await asyncio.sleep(CONFIG.SCHEDULER_INTERVAL)
+
+
+class AsyncCore:
+    """Event loop running in a background thread, hosting scans and services.
+    
+    Blocking hardware calls run on per-subsystem executors (one worker each for
+    motor and camera, so calls stay ordered) and are awaited as coroutines, so
+    motor moves, camera requests, storage writes and UI input run concurrently
+    and an abort is a task cancellation rather than a KeyboardInterrupt.
+    
+    Executor names may carry a station suffix ("motor.B"): every station gets
+    its own motor and camera worker, while "storage.*" jobs of all stations
+    share one FairExecutor pipeline, sized by the LoadScheduler.
+    """
+    
+    EXECUTORS = {"motor": 1, "camera": 1}
+    
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        motion_cpus = CONFIG.MOTION_CPUS[:len(STATIONS)] if CONFIG.MOTION_CPUS else ()
+        self.pipeline = FairExecutor(max(CONFIG.PIPELINE_WORKERS, *CONFIG.SCHEDULER_PIPELINE_WORKERS),
+                                     nice=CONFIG.PIPELINE_NICE, avoid_cpus=motion_cpus)
+        self.pipeline.resize(CONFIG.PIPELINE_WORKERS)
+        self.executors = {}
+        self.thread = threading.Thread(target=self._run_loop, name="async-core", daemon=True)
+        self.thread.start()
+        self.scheduler = None
+        if CONFIG.SCHEDULER_ENABLED:
+            self.scheduler = LoadScheduler(self.pipeline)
+            self.submit(self.scheduler.run())
+    
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+    
+    def executor(self, name):
+        """Executor for a name like "motor" or "camera.B", created on first use."""
+        if name not in self.executors:
+            subsystem = name.partition(".")[0]
+            if subsystem == "storage":
+                self.executors[name] = self.pipeline.lane(name)
+            else:
+                self.executors[name] = ThreadPoolExecutor(
+                    max_workers=self.EXECUTORS[subsystem], thread_name_prefix=name)
+        return self.executors[name]
+    
+    async def call(self, executor, func, *args, **kwargs):
+        """Run a blocking call on the named executor and await its result."""
+        return await self.loop.run_in_executor(
+            self.executor(executor), functools.partial(func, *args, **kwargs))
+    
+    async def drain(self, names=None):
+        """Wait until every job already queued on the executors has returned."""
+        names = list(self.executors) if names is None else names
+        await asyncio.gather(*(
+            self.loop.run_in_executor(self.executor(name), lambda: None)
+            for name in names
+        ))
+    
+    def submit(self, coro):
+        """Schedule a coroutine on the core loop from any thread."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+    
+    def run(self, coro, abortable=False):
+        """Run a coroutine from the menu thread and wait for it to finish.
+        
+        Ctrl+C (and ENTER when abortable) cancels the task; the call still
+        waits for the task's own cleanup. Returns None if it was cancelled.
+        """
+        if abortable:
+            coro = self._abortable(coro)
+        finished = threading.Event()
+        task = self.submit(self._create_task(coro, finished)).result()
+        while True:
+            try:
+                finished.wait()
+                break
+            except KeyboardInterrupt:
+                self.loop.call_soon_threadsafe(task.cancel)
+        if task.cancelled():
+            return None
+        return task.result()
+    
+    async def _create_task(self, coro, finished):
+        task = asyncio.ensure_future(coro)
+        task.add_done_callback(lambda _: finished.set())
+        return task
+    
+    async def _abortable(self, coro):
+        """Race a coroutine against an ENTER keypress on the console."""
+        task = asyncio.ensure_future(coro)
+        watcher = asyncio.ensure_future(ainput())
+        try:
+            await asyncio.wait({task, watcher}, return_when=asyncio.FIRST_COMPLETED)
+            if watcher.done() and watcher.exception() is not None:
+                # No console to read from (EOF) - only Ctrl+C/cancel can abort
+                await asyncio.wait({task})
+            if not task.done():
+                task.cancel()
+            return await task
+        finally:
+            watcher.cancel()
+            if not task.done():
+                task.cancel()
+                await asyncio.wait({task})
+    
+    async def _cancel_all(self):
+        tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+    
+    def shutdown(self):
+        """Cancel outstanding tasks, stop the loop and release executor threads."""
+        try:
+            self.submit(self._cancel_all()).result(timeout=5.0)
+        except Exception:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2.0)
+        for executor in self.executors.values():
+            executor.shutdown(wait=False)
+        self.pipeline.shutdown()
+
+
+class ScanRunner:
+    """One 360 degree scan as a coroutine on the AsyncCore.
+    
+    Capture runs on the camera executor, rotation on the motor executor and the
+    overlay for each still on the storage executor, so the overlay of one angle
+    overlaps the move to the next. Progress is reported to listeners as
+    (event, data) calls: "angle", "reshoot", "captured", "finished".
+    
+    Every angle has an absolute step target derived from start_steps, and each
+    finished image is appended to the ScanJournal, so a resumed scan (skip =
+    angles already done) re-homes to the recorded positions exactly.
+    
+    executors maps "motor"/"camera"/"storage" to the station's AsyncCore
+    executor names, so scans on different stations run side by side.
+    
+    With a spool (spool capture) the camera only copies raw frames into it and
+    the storage job just makes them durable; developing, review and video are
+    left to the SpoolManager.
+    """
+    
+    def __init__(self, core, motor, camera, storage, start_angle=0, clockwise=True,
+                 journal=None, start_steps=None, skip=(), increment=None, total=None,
+                 executors=None, crop=None, spool=None):
+        self.core = core
+        self.executors = executors or {name: name for name in ("motor", "camera", "storage")}
+        self.motor = motor
+        self.camera = camera
+        self.storage = storage
+        self.start_angle = start_angle
+        self.clockwise = clockwise
+        self.journal = journal
+        self.start_steps = start_steps
+        self.skip = set(skip)
+        self.increment = increment or CONFIG.ROTATION_INCREMENT
+        self.total = total or CONFIG.TOTAL_PHOTOS
+        self.resumed = start_steps is not None
+        self.crop = crop  # full-resolution (x, y, w, h) of a resumed scan's sensor crop
+        self.gate = QualityGate() if CONFIG.QUALITY_GATE_ENABLED else None
+        self.spool = spool if NUMPY_AVAILABLE else None
+        self.review = None
+        if CONFIG.REVIEW_ENABLED and CV2_AVAILABLE and NUMPY_AVAILABLE and self.spool is None:
+            self.review = ReviewExporter(storage.current_folder, storage.current_piece_id)
+        self.listeners = []
+        self.captured = 0
+        self.aborted = False
+        self.images = []
+        self.phase_timing = {}
+        self.started = None
+        self.finished = None
+        self._load_since = (0, 0.0)  # scheduler adaptation seq / sample time at scan start
+        self._moves_since = motor.move_count
+    
+    def emit(self, event, **data):
+        for listener in list(self.listeners):
+            try:
+                listener(event, data)
+            except Exception:
+                pass
+    
+    def log(self, message):
+        """A message for the operator: a "log" event, or the console when nobody listens."""
+        if self.listeners:
+            self.emit("log", message=message)
+        else:
+            print(message)
+    
+    async def _phase(self, name, executor, func, *args, **kwargs):
+        """Run one timed pipeline phase on an executor, reporting start/end."""
+        self.emit("phase", name=name)
+        start = time.monotonic()
+        try:
+            return await self.core.call(self.executors[executor], func, *args, **kwargs)
+        finally:
+            elapsed = time.monotonic() - start
+            self.phase_timing.setdefault(name, []).append(round(elapsed, 4))
+            if name == "capture" and self.core.scheduler is not None:
+                self.core.scheduler.observe_capture(elapsed)
+            self.emit("phase_done", name=name, elapsed=elapsed)
+    
+    async def _capture_checked(self, index, angle, filepath):
+        """Capture one angle, re-shooting (after a fresh AF) while the quality gate fails.
+        
+        Returns (success, quality) where quality lists every attempt's metrics
+        and the final decision, or None when the gate is disabled.
+        """
+        success = await self._phase("capture", "camera", self.camera.capture, filepath, angle, overlay=False)
+        if self.gate is None:
+            return success, None
+        attempts = []
+        while success:
+            metrics = await self._phase("gate", "camera", self.gate.check, self.camera.gate_frame)
+            attempts.append(metrics)
+            if metrics['passed'] or not self.gate.can_retry(len(attempts) - 1):
+                break
+            self.gate.retries_used += 1
+            self.emit("reshoot", index=index, angle=angle, reasons=metrics['reasons'],
+                      attempt=len(attempts))
+            await self._phase("refocus", "camera", self.camera.trigger_autofocus)
+            success = await self._phase("capture", "camera", self.camera.capture, filepath, angle, overlay=False)
+        passed = bool(attempts) and attempts[-1]['passed']
+        return success, {'passed': passed, 'reshoots': max(len(attempts) - 1, 0), 'attempts': attempts}
+    
+    def _finish_image(self, filepath, angle, record):
+        """Storage-executor job: merge a burst / burn the overlay, checksum the final file, then tile it."""
+        if self.spool is not None and self.spool.holds(record['file']):
+            # Raw frame in the spool: on disk before the journal counts the angle as done
+            self.spool.sync()
+            record['spooled'] = True
+            if self.journal is not None:
+                self.journal.write("angle", **record)
+            return record
+        developed = []
+        if self.camera.develop(filepath, angle, on_frame=developed.append):
+            frame = developed[0] if developed else None
+        else:
+            frame = self.camera.apply_overlay(filepath, angle)
+        record['size'] = os.path.getsize(filepath)
+        record['sha256'] = file_sha256(filepath)
+        if self.journal is not None:
+            self.journal.write("angle", **record)
+        if self.storage.bundle is not None:
+            self.storage.bundle.add(filepath)
+        # Under load the tiles wait for the end of the scan (ReviewExporter.finish)
+        scheduler = self.core.scheduler
+        if self.review is not None and not (scheduler is not None and scheduler.defer_review):
+            try:
+                self.review.add(angle, filepath, frame)
+            except Exception as e:
+                self.log(f"  [REVIEW] Tiling {os.path.basename(filepath)} failed: {e}")
+        return record
+    
+    def _finish_review(self):
+        """Storage-executor job: tile angles not seen this run and write sprite, index and viewer."""
+        try:
+            return self.review.finish(sorted(self.images, key=lambda r: r['index']))
+        except Exception as e:
+            self.log(f"  [REVIEW] Export failed: {e}")
+            return None
+    
+    def manifest(self):
+        """Describe the scan for storage, the control API and ingestion."""
+        video_path = self.storage.get_video_filepath()
+        return {
+            'piece_id': self.storage.current_piece_id,
+            'table': CONFIG.TABLE_ID,
+            'station': self.motor.station.name,
+            'folder': self.storage.current_folder,
+            'started': self.started,
+            'finished': self.finished,
+            'aborted': self.aborted,
+            'resumed': self.resumed,
+            'start_angle': self.start_angle,
+            'start_steps': self.start_steps,
+            'direction': "CW" if self.clockwise else "CCW",
+            'increment': self.increment,
+            'total': self.total,
+            'capture_mode': self.camera.capture_mode,
+            'main_format': self.camera.main_format,
+            'camera_pipeline': self.camera.pipeline,
+            'crop': self.camera.crop,
+            'quality_failed': [r['index'] for r in self.images if not r.get('quality', {}).get('passed', True)],
+            'calibration_factor': self.motor.station.calibration_factor,
+            'images': sorted(self.images, key=lambda r: r['index']),
+            'video': os.path.basename(video_path) if os.path.exists(video_path) else None,
+            'review': f"{ReviewExporter.DIRNAME}/index.html" if self.review is not None else None,
+            'bundle': CONFIG.BUNDLE_NAME if self.storage.bundle is not None else None,
+            'spool': self.spool.summary() if self.spool is not None else None,
+            'phase_timing': self.phase_timing,
+            'motion': self.motor.jitter_summary(self._moves_since),
+            'scheduler': self.core.scheduler.telemetry(*self._load_since) if self.core.scheduler else None,
+            'simulator': SIM.stats(self.motor.station) if SIM is not None else None,
+        }
+    
+    def angles(self):
+        """Target angles in visiting order."""
+        step = self.increment if self.clockwise else -self.increment
+        return [(self.start_angle + i * step) % 360 for i in range(self.total)]
+    
+    def target_steps(self, index):
+        """Absolute microstep position of the index-th angle of the plan."""
+        offset = index * self.increment if self.clockwise else -index * self.increment
+        return self.start_steps + round(offset * self.motor.steps_per_degree())
+    
+    def _journal_start(self):
+        if self.journal is None:
+            return
+        if self.resumed:
+            self.journal.write("resume", remaining=len(self.angles()) - len(self.skip))
+            return
+        self.journal.write(
+            "header",
+            piece_number=self.storage.current_piece_number,
+            piece_id=self.storage.current_piece_id,
+            folder=self.storage.current_folder,
+            start_angle=self.start_angle,
+            clockwise=self.clockwise,
+            start_steps=self.start_steps,
+            increment=self.increment,
+            total=self.total,
+            calibration_factor=self.motor.station.calibration_factor,
+            crop=self.camera.crop['rect'] if self.camera.crop else None,
+        )
+    
+    async def _auto_roi(self):
+        """Pre-rotation on the lores stream, then crop the sensor to the part for the whole scan."""
+        views = CONFIG.AUTO_ROI_VIEWS
+        frames = []
+        for k in range(views):
+            await self._phase("rotate", "motor", self.motor.move_to, (self.start_angle + k * 360 / views) % 360)
+            frame = await self._phase("roi", "camera", self.camera.lores_frame)
+            if frame is not None:
+                frames.append(frame)
+        await self._phase("rotate", "motor", self.motor.move_to, self.start_angle)
+        rect = part_crop(frames, CONFIG.CAMERA_RESOLUTION) if len(frames) >= 2 else None
+        if rect is None:
+            self.log("  [ROI] No part-sized crop from the pre-rotation - keeping the full frame")
+            return None
+        try:
+            return await self._phase("roi", "camera", self.camera.set_crop, rect)
+        except Exception as e:
+            self.log(f"  [ROI] Sensor crop failed ({e}) - keeping the full frame")
+            return None
+    
+    def _reserve_spool(self, captures):
+        """Storage-executor job: pre-allocate the spool for the captures left, or fall back to encoding."""
+        bursts = {"focus_stack": len(CONFIG.BURST_LENS_OFFSETS), "hdr": len(CONFIG.BURST_EV_STEPS)}
+        retries = CONFIG.QUALITY_SCAN_RETRY_BUDGET if self.gate is not None else 0
+        frames = (captures + retries) * bursts.get(self.camera.capture_mode, 1)
+        try:
+            allocated = self.spool.reserve(frames * self.camera.still_bytes())
+        except OSError as e:
+            self.log(f"  [SPOOL] Cannot allocate the spool ({e}) - encoding while scanning")
+            self.spool = None
+            if CONFIG.REVIEW_ENABLED and CV2_AVAILABLE:
+                self.review = ReviewExporter(self.storage.current_folder, self.storage.current_piece_id)
+            return None
+        self.camera.spool = self.spool
+        return allocated
+    
+    async def _encode_instead(self):
+        """After a spool fallback: record the video and bundle the stills like a normal scan."""
+        video_path = self.storage.get_video_filepath()
+        if await self._phase("spool", "camera", self.camera.start_video_recording, video_path):
+            self.log(f"  [VIDEO] Recording to: {os.path.basename(video_path)}")
+        await self._phase("spool", "storage", self.storage.open_bundle, self.log)
+    
+    async def run(self):
+        """Execute the scan; returns the number of images captured."""
+        self.motor.abort_event.clear()
+        self.started = datetime.now().isoformat(timespec="seconds")
+        pending = set()
+        angles = self.angles()
+        status = "failed"
+        scheduler = self.core.scheduler
+        if scheduler is not None:
+            scheduler.captures.clear()
+            self._load_since = (scheduler.adaptations[-1]['seq'] if scheduler.adaptations else 0, time.time())
+            scheduler.listeners.append(self._on_adapt)
+            self.emit("load", **scheduler.status())
+        try:
+            use_roi = CV2_AVAILABLE and NUMPY_AVAILABLE and self.camera.frame_hub is not None
+            if self.start_steps is None:
+                await self._phase("rotate", "motor", self.motor.move_to, self.start_angle)
+                if CONFIG.AUTO_ROI_ENABLED and use_roi:
+                    await self._auto_roi()
+                self.start_steps = self.motor.position_steps
+            elif self.crop and use_roi:
+                # Resumed stills must match the framing of the ones already taken
+                await self._phase("roi", "camera", self.camera.set_crop, self.crop)
+            if self.spool is not None:
+                await self._phase("spool", "storage", self._reserve_spool, len(angles) - len(self.skip))
+                if self.spool is None:
+                    await self._encode_instead()
+            self._journal_start()
+            for i, angle in enumerate(angles):
+                if angle in self.skip:
+                    continue
+                # Go to the absolute position of this angle (re-homes on resume)
+                if self.motor.position_steps != self.target_steps(i):
+                    await self._phase("rotate", "motor", self.motor.move_to_steps, self.target_steps(i))
+                
+                # Update angle for video overlay
+                self.camera.set_current_angle(angle)
+                camera_status = self.camera.get_status()
+                self.emit("angle", index=i, total=len(angles), angle=angle, status=camera_status)
+                if scheduler is not None:
+                    self.emit("load", **scheduler.status())
+                
+                await self._phase("settle", "camera", self.camera.wait_settled)
+                
+                filepath = self.storage.get_filepath(angle)
+                # Each undeveloped burst or YUV still holds full-resolution frames in RAM
+                while self.camera.pending_bursts and len(pending) >= CONFIG.BURST_MAX_PENDING:
+                    await asyncio.wait(set(pending), return_when=asyncio.FIRST_COMPLETED)
+                success, quality = await self._capture_checked(i, angle, filepath)
+                if success:
+                    self.captured += 1
+                    record_startup("first_capture")
+                    record = {
+                        'index': i,
+                        'angle': angle,
+                        'file': os.path.basename(filepath),
+                        'position_steps': self.motor.position_steps,
+                        'metadata': dict(self.camera.latest_metadata()),
+                    }
+                    if self.camera.last_burst is not None:
+                        record['burst'] = self.camera.last_burst
+                    if self.camera.last_switch is not None:
+                        record['mode_switch'] = self.camera.last_switch
+                    if quality is not None:
+                        record['quality'] = quality
+                    self.images.append(record)
+                    overlay = asyncio.ensure_future(
+                        self._phase("overlay", "storage", self._finish_image, filepath, angle, record))
+                    pending.add(overlay)
+                    overlay.add_done_callback(pending.discard)
+                # A burst or YUV still only exists once developed on the storage executor (size None)
+                size = os.path.getsize(filepath) if success and os.path.exists(filepath) else (None if success else 0)
+                self.emit("captured", index=i, total=len(angles), angle=angle,
+                          filepath=filepath, success=success, size=size,
+                          metadata=dict(self.camera.latest_metadata()))
+            status = "complete"
+        except asyncio.CancelledError:
+            self.aborted = True
+            status = "aborted"
+            self.motor.abort_event.set()
+            raise
+        finally:
+            # Let in-flight hardware calls and overlays land before cleanup
+            if pending:
+                await asyncio.wait(set(pending))
+            await self.core.drain(self.executors.values())
+            self.camera.spool = None
+            if self.review is not None and self.images:
+                await self._phase("review", "storage", self._finish_review)
+            if self.journal is not None:
+                await self.core.call(self.executors["storage"], self.journal.close, status)
+            if scheduler is not None:
+                scheduler.listeners.remove(self._on_adapt)
+            self.finished = datetime.now().isoformat(timespec="seconds")
+            self.emit("finished", captured=self.captured, aborted=self.aborted)
+        return self.captured
+    
+    def _on_adapt(self, adaptation):
+        self.emit("load", **adaptation)
+
+class ScanJob:
+    """A scan request queued against one station's hardware session."""
+    
+    _ids = itertools.count(1)
+    
+    def __init__(self, piece_number, origin, resume=None, station=None):
+        self.id = next(ScanJob._ids)
+        self.station = station
+        self.piece_number = piece_number
+        self.origin = origin
+        self.resume = resume  # scan folder to continue from its journal
+        self.state = "queued"  # queued | running | done | aborted | failed
+        self.created = datetime.now().isoformat(timespec="seconds")
+        self.piece_id = None
+        self.folder = None
+        self.index = 0
+        self.total = None  # angles in the scan plan (journal header on resume), once the runner has it
+        self.angle = None
+        self.manifest = None
+        self.error = None
+        self.motor = None
+        self.camera = None
+        self.task = None
+        self.done = asyncio.get_running_loop().create_future()
+    
+    def to_dict(self):
+        return {
+            'job': self.id,
+            'station': self.station,
+            'piece_number': self.piece_number,
+            'piece_id': self.piece_id,
+            'origin': self.origin,
+            'resume': self.resume,
+            'state': self.state,
+            'created': self.created,
+            'progress': [self.index, self.total],
+            'angle': self.angle,
+            'folder': self.folder,
+            'error': self.error,
+        }
+
+
+class ScanService:
+    """Owns one station's hardware and runs its scan jobs one at a time.
+    
+    The kiosk menu and the control API both enqueue ScanJobs here, so requests
+    are serialised against one hardware session. Manual tools (camera/motor
+    test) claim the hardware while no job is running or queued. Listeners get
+    every ScanRunner event plus "job", "log" and "init" as (event, data) with
+    data["job"] set to the job id (None for spool developing). Each station has its own service, motor and
+    camera executors, so two stations scan concurrently. Spooled frames are
+    developed by the station's SpoolManager while no scan is running or queued.
+    """
+    
+    def __init__(self, core, station=None):
+        self.core = core
+        self.station = station or STATIONS[0]
+        self.executors = {name: self.station.executor(name) for name in ("motor", "camera", "storage")}
+        self.listeners = []
+        self.current = None
+        self.manual = None
+        self.last_manifest = None
+        self.streamer = None
+        self._warm_camera = None
+        self._warm_timer = None
+        self.jobs = collections.deque(maxlen=50)
+        self._queue = None
+        self._hardware_free = None
+        self._worker = None
+        self._shipper = None
+        self._spooler = None
+        self.spool = SpoolManager(self.station.storage_path, log=self._spool_log)
+        self.ingest = {'backlog': None, 'shipped': 0, 'last_attempt': None, 'shipping': False}
+    
+    def start(self):
+        """Start the job worker on the core loop."""
+        self.core.submit(self._start()).result()
+    
+    async def _start(self):
+        self._queue = asyncio.Queue()
+        self._hardware_free = asyncio.Event()
+        self._hardware_free.set()
+        self._worker = asyncio.ensure_future(self._work())
+        if CONFIG.INGEST_ENABLED:
+            self._shipper = asyncio.ensure_future(self._ship_loop())
+        self._spooler = asyncio.ensure_future(self._spool_loop())
+    
+    def emit(self, event, job, /, **data):
+        data['job'] = job.id if job is not None else None
+        data['station'] = self.station.name
+        for listener in list(self.listeners):
+            try:
+                listener(event, data)
+            except Exception:
+                pass
+    
+    async def enqueue(self, piece_number, origin="kiosk", resume=None):
+        job = ScanJob(int(piece_number), origin, resume, station=self.station.name)
+        self.jobs.append(job)
+        await self._queue.put(job)
+        self.emit("job", job, **job.to_dict())
+        return job
+    
+    async def abort(self, job_id=None):
+        """Abort the running job (or a queued one by id). True if something was aborted."""
+        for job in self.jobs:
+            if job_id is not None and job.id != job_id:
+                continue
+            if job.state == "queued":
+                self._finish(job, "aborted")
+                return True
+            if job.state == "running" and job.task is not None:
+                job.task.cancel()
+                return True
+        return False
+    
+    async def claim(self, owner):
+        """Reserve the hardware for a manual tool; False while scans are active."""
+        if self.current is not None or any(job.state == "queued" for job in self.jobs) or self.manual:
+            return False
+        self.manual = owner
+        self._hardware_free.clear()
+        # The manual tool opens its own camera
+        await self.drop_prewarm()
+        return True
+    
+    async def prewarm(self):
+        """Open and stabilise the camera in the background ahead of a scan.
+        
+        Runs on the single-worker camera executor, so the next scan's camera
+        open (queued behind it) simply takes the warm instance.
+        """
+        if self.current is not None or self.manual or self._warm_timer is not None:
+            return
+        
+        def _open():
+            if self._warm_camera is None:
+                self._warm_camera = CameraController(verbose=False, camera_index=self.station.camera_index)
+        
+        self._warm_timer = self.core.loop.call_later(
+            CONFIG.PREWARM_IDLE_TIMEOUT, lambda: asyncio.ensure_future(self.drop_prewarm()))
+        await self.core.call(self.executors["camera"], _open)
+    
+    async def drop_prewarm(self):
+        """Release a pre-warmed camera nobody claimed."""
+        if self._warm_timer is not None:
+            self._warm_timer.cancel()
+            self._warm_timer = None
+        await self.core.call(self.executors["camera"], self._close_warm_camera)
+    
+    def _close_warm_camera(self):
+        if self._warm_camera is not None:
+            self._warm_camera.cleanup()
+            self._warm_camera = None
+    
+    def _take_camera(self):
+        """Camera-executor job: hand over the warm camera, or open a fresh one."""
+        camera, self._warm_camera = self._warm_camera, None
+        if camera is not None and camera.pipeline != CONFIG.CAMERA_PIPELINE:
+            # The operator switched pipelines since the camera was pre-warmed
+            camera.cleanup()
+            camera = None
+        if camera is not None and (camera.is_initialized or not CAMERA_AVAILABLE):
+            camera.verbose = True
+            return camera
+        if camera is not None:
+            camera.cleanup()
+        return CameraController(camera_index=self.station.camera_index)
+    
+    async def release(self):
+        self.manual = None
+        self._hardware_free.set()
+    
+    def status(self):
+        if self.current is not None:
+            state = "scanning"
+        elif self.manual:
+            state = "manual"
+        else:
+            state = "idle"
+        return {
+            'station': self.station.to_dict(),
+            'state': state,
+            'manual': self.manual,
+            'current': self.current.to_dict() if self.current else None,
+            'queued': [job.to_dict() for job in self.jobs if job.state == "queued"],
+            'position': load_position(self.station.position_file),
+            'ingest': self.ingest if CONFIG.INGEST_ENABLED else None,
+            'scheduler': self.core.scheduler.status() if self.core.scheduler is not None else None,
+            'spool': self.spool.status(),
+            'motion': (self.current.motor.jitter_summary() if self.current and self.current.motor
+                       else self.station.motion_stats),
+            'timings': {'imports': IMPORT_TIMINGS, 'init': INIT_TIMINGS, 'startup': STARTUP_TIMINGS},
+        }
+    
+    def _finish(self, job, state, error=None):
+        job.state = state
+        job.error = error
+        if not job.done.done():
+            job.done.set_result(job)
+        self.emit("job", job, **job.to_dict())
+    
+    async def _work(self):
+        while True:
+            job = await self._queue.get()
+            if job.state != "queued":
+                continue
+            await self._hardware_free.wait()
+            self.current = job
+            job.state = "running"
+            self.emit("job", job, **job.to_dict())
+            job.task = asyncio.ensure_future(self._execute(job))
+            try:
+                await job.task
+                self._finish(job, "done")
+            except asyncio.CancelledError:
+                if not job.task.cancelled():
+                    raise  # the worker itself is being shut down
+                self._finish(job, "aborted")
+            except Exception as e:
+                self._finish(job, "failed", error=str(e))
+            finally:
+                self.current = None
+            if CONFIG.INGEST_ENABLED:
+                asyncio.ensure_future(self.ship_backlog())
+    
+    async def ship_backlog(self):
+        """Send finished scans to the fleet collector; whatever it refuses stays buffered."""
+        if self.ingest['shipping']:
+            return 0
+        self.ingest['shipping'] = True
+        storage = StorageManager(self.station.storage_path)
+        storage_exec = self.executors["storage"]
+        try:
+            scheduler = self.core.scheduler
+            client = IngestClient(rate=(lambda: scheduler.transfer_rate) if scheduler is not None else None)
+            shipped = await self.core.call(storage_exec, storage.transfer_pending, client)
+            self.ingest['shipped'] += shipped
+            self.ingest['backlog'] = await self.core.call(storage_exec, storage.transfer_backlog)
+            self.ingest['last_attempt'] = datetime.now().isoformat(timespec="seconds")
+            return shipped
+        finally:
+            self.ingest['shipping'] = False
+    
+    async def _ship_loop(self):
+        """Retry the backlog periodically (collector was busy or offline)."""
+        while True:
+            if self.current is None:
+                try:
+                    await self.ship_backlog()
+                except Exception as e:
+                    print(f"  [INGEST] Transfer failed: {e}")
+            await asyncio.sleep(CONFIG.INGEST_RETRY_INTERVAL)
+    
+    def _spool_log(self, message):
+        """SpoolManager messages (mostly from the storage executor): a "log" event without a job."""
+        self.core.loop.call_soon_threadsafe(functools.partial(self.emit, "log", None, message=message))
+    
+    def _spool_idle(self):
+        """No scan running or queued, no manual tool, and the SoC not too hot for background work."""
+        if self.current is not None or self.manual or any(job.state == "queued" for job in self.jobs):
+            return False
+        scheduler = self.core.scheduler
+        return scheduler is None or scheduler.level < CONFIG.SPOOL_PAUSE_LEVEL
+    
+    async def _spool_loop(self):
+        """Develop spooled frames one at a time once the station has been idle for SPOOL_IDLE_DELAY."""
+        storage_exec = self.executors["storage"]
+        try:
+            await self.core.call(storage_exec, self.spool.discover)
+        except Exception as e:
+            self.spool.report(f"  [SPOOL] Looking for spooled scans failed: {e}")
+        idle_since = None
+        while True:
+            if not self._spool_idle():
+                idle_since = None
+            elif idle_since is None:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since >= CONFIG.SPOOL_IDLE_DELAY:
+                try:
+                    done = await self.core.call(storage_exec, self.spool.step)
+                except Exception as e:
+                    self.spool.report(f"  [SPOOL] Developing failed: {e}")
+                    done = None
+                if done == "scan" and CONFIG.INGEST_ENABLED:
+                    asyncio.ensure_future(self.ship_backlog())
+                if done is not None:
+                    continue  # next frame straight away, unless a scan came in meanwhile
+            await asyncio.sleep(1.0)
+    
+    def _on_runner_event(self, job, event, data):
+        if event == "angle":
+            job.index = data['index']
+            job.angle = data['angle']
+        elif event == "captured":
+            job.index = data['index'] + 1
+        self.emit(event, job, **data)
+    
+    async def _execute(self, job):
+        """Open hardware, run one scan, always release hardware and write the manifest."""
+        core = self.core
+        motor_exec, camera_exec, storage_exec = (self.executors[name] for name in ("motor", "camera", "storage"))
+        storage = StorageManager(self.station.storage_path)
+        runner = None
+        
+        def _open_motor():
+            job.motor = MotorController(self.station)
+        
+        def _open_camera():
+            job.camera = self._take_camera()
+        
+        try:
+            self.emit("log", job, message="Initializing hardware...")
+            self.emit("init", job, step=0, total=3)
+            await core.call(motor_exec, _open_motor)
+            self.emit("init", job, step=1, total=3)
+            if self._warm_timer is not None:
+                self._warm_timer.cancel()
+                self._warm_timer = None
+            await core.call(camera_exec, _open_camera)
+            self.emit("init", job, step=2, total=3)
+            journal_state = None
+            if job.resume:
+                journal_state = ScanJournal.load(job.resume)
+                job.piece_id = storage.open_folder(job.resume, journal_state['header']['piece_id'], job.piece_number)
+                storage.video_part = f"r{journal_state['resumes'] + 1}"
+            else:
+                job.piece_id = storage.set_piece_id(job.piece_number)
+            job.folder = storage.current_folder
+            self.emit("init", job, step=3, total=3)
+            motor, camera = job.motor, job.camera
+            log = camera.log = lambda message: self.emit("log", job, message=message)
+            
+            self.emit("log", job, message=f"\n  Piece ID: {job.piece_id}")
+            self.emit("log", job, message=f"  Output: {job.folder}")
+            
+            # Start live preview
+            self.emit("log", job, message="\n  Starting live preview...")
+            if await core.call(camera_exec, camera.start_preview):
+                if camera.preview_headless:
+                    self.emit("log", job, message="  [PREVIEW] No display - headless (recording/streaming only)")
+                else:
+                    self.emit("log", job, message="  [PREVIEW] Live video window opened")
+                if self.streamer is not None:
+                    self.streamer.attach(camera)
+            else:
+                self.emit("log", job, message="  [PREVIEW] Running without preview window")
+            
+            spool = None
+            if CONFIG.SPOOL_CAPTURE:
+                spool = await core.call(storage_exec, self.spool.open, storage.current_folder, job.piece_id)
+            
+            # Start video recording
+            video_path = storage.get_video_filepath()
+            if spool is not None:
+                self.emit("log", job, message="  [SPOOL] Raw capture: stills and video are made when the station is idle")
+            elif await core.call(camera_exec, camera.start_video_recording, video_path):
+                self.emit("log", job, message=f"  [VIDEO] Recording to: {os.path.basename(video_path)}")
+            else:
+                self.emit("log", job, message="  [VIDEO] Video recording not available")
+            
+            journal = ScanJournal(storage.current_folder)
+            if spool is None:
+                await core.call(storage_exec, storage.open_bundle, log)
+            if journal_state is not None:
+                # Continue the recorded plan; the runner re-homes to its step positions
+                header = journal_state['header']
+                done = journal_state['done']
+                start_angle, clockwise = header['start_angle'], header['clockwise']
+                runner_args = dict(journal=journal, start_steps=header['start_steps'], skip=done.keys(),
+                                   increment=header['increment'], total=header['total'],
+                                   crop=header.get('crop'))
+                self.emit("log", job, message=f"  Resuming: {len(done)}/{header['total']} angles already captured")
+                if motor.interrupted_move:
+                    self.emit("log", job, message="  [MOTOR] WARNING: power was lost mid-move - the recorded step "
+                                                  "positions may be off until the table is re-homed")
+            else:
+                # Start from wherever the table is (snapped to the increment grid) and,
+                # if enabled, run opposite to the last scan so no return trip is needed
+                increment = CONFIG.ROTATION_INCREMENT
+                start_angle = int(round(motor.current_angle / increment) * increment) % 360
+                clockwise = True
+                if CONFIG.ALTERNATE_SCAN_DIRECTION:
+                    clockwise = not motor.last_scan_clockwise
+                runner_args = dict(journal=journal)
+            motor.last_scan_clockwise = clockwise
+            self.emit("log", job, message=f"  Start: {start_angle:03d}deg | Direction: {'CW' if clockwise else 'CCW'}")
+            
+            await core.call(motor_exec, motor.enable)
+            camera.set_current_angle(start_angle)  # Initialize angle for overlay
+            
+            runner = ScanRunner(core, motor, camera, storage, start_angle, clockwise,
+                                executors=self.executors, spool=spool, **runner_args)
+            job.total = runner.total
+            if journal_state is not None:
+                runner.images = [{key: value for key, value in record.items() if key not in ("type", "time")}
+                                 for record in journal_state['done'].values()]
+                runner.captured = len(runner.images)
+            runner.listeners.append(functools.partial(self._on_runner_event, job))
+            self.emit("started", job, **job.to_dict())
+            await runner.run()
+        finally:
+            # Init may have been cancelled with a constructor still running
+            await core.drain(self.executors.values())
+            if self.streamer is not None:
+                self.streamer.detach()
+            if job.camera is not None:
+                await core.call(camera_exec, job.camera.stop_video_recording)
+                await core.call(camera_exec, job.camera.stop_preview)
+            if job.motor is not None:
+                await core.call(motor_exec, job.motor.cleanup)
+            if job.camera is not None:
+                await core.call(camera_exec, job.camera.cleanup)
+            job.motor = job.camera = None
+            if runner is not None:
+                job.manifest = runner.manifest()
+                job.manifest['job'] = job.id
+                job.manifest['origin'] = job.origin
+                await core.call(storage_exec, storage.write_manifest, job.manifest)
+                self.last_manifest = job.manifest
+            if storage.bundle is not None:
+                await core.call(storage_exec, storage.close_bundle)
+            if runner is not None and runner.spool is None and spool is not None:
+                # The runner fell back to encoding: nothing left for the SpoolManager to finish
+                await core.call(storage_exec, self.spool.discard, storage.current_folder)
+        
+        if CONFIG.NAS_ENABLED:
+            self.emit("log", job, message="  Transferring to NAS...")
+            await core.call(storage_exec, storage.transfer_to_nas)
+        return job.manifest
+
+
+class Dashboard:
+    """In-place ANSI scan panel: drawn once, then only changed lines are rewritten.
+    
+    Fed by ScanRunner events on the AsyncCore loop; run() redraws at most
+    DASHBOARD_MAX_FPS times per second and never shells out.
+    """
+    
+    ROWS = (
+        ("angle", "Angle"),
+        ("phase", "Phase"),
+        ("timing", "Timing"),
+        ("throughput", "Throughput"),
+        ("load", "SoC load"),
+        ("disk", "Disk free"),
+        ("transfer", "Transfer queue"),
+        ("spool", "Spool backlog"),
+        ("last", "Last image"),
+        ("log", "Messages"),
+    )
+    
+    def __init__(self, storage, out=None, spool=None):
+        self.storage = storage
+        self.spool = spool  # station's SpoolManager
+        self.out = out or sys.stdout
+        self.values = {key: "-" for key, _ in self.ROWS}
+        self._drawn = {}
+        self._dirty = None
+        self.active_phases = []
+        self.phase_stats = {}  # name -> [count, total_s, last_s]
+        self.started = time.monotonic()
+        self.images = 0
+        self.bytes = 0
+        self._disk_checked = 0.0
+        self._transfer_checked = float("-inf")
+    
+    def _line(self, key, label):
+        width = shutil.get_terminal_size((100, 24)).columns
+        return f"  {label:<15} {self.values[key]}"[:width - 1]
+    
+    def draw(self):
+        """Print the full panel once; later renders only touch changed rows."""
+        self._refresh_slow_fields()
+        lines = []
+        for key, label in self.ROWS:
+            line = self._line(key, label)
+            self._drawn[key] = line
+            lines.append(line)
+        self.out.write("\n".join(lines) + "\n")
+        self.out.flush()
+    
+    def render(self):
+        """Rewrite the rows whose text changed since the last render."""
+        self._refresh_slow_fields()
+        total = len(self.ROWS)
+        chunks = []
+        for row, (key, label) in enumerate(self.ROWS):
+            line = self._line(key, label)
+            if self._drawn.get(key) == line:
+                continue
+            self._drawn[key] = line
+            # Save cursor, jump up to the row, rewrite it, restore cursor
+            chunks.append(f"\0337\033[{total - row}A\r\033[2K{line}\0338")
+        if chunks:
+            self.out.write("".join(chunks))
+            self.out.flush()
+    
+    def _refresh_slow_fields(self):
+        now = time.monotonic()
+        if now - self._disk_checked < 1.0:
+            return
+        self._disk_checked = now
+        try:
+            usage = shutil.disk_usage(self.storage.local_path)
+            self.values["disk"] = f"{usage.free / 1024**3:.1f} GB free of {usage.total / 1024**3:.1f} GB"
+        except OSError:
+            self.values["disk"] = "N/A"
+        if CONFIG.INGEST_ENABLED or CONFIG.NAS_ENABLED:
+            # Walks the storage root, so refreshed far less often than disk space
+            if now - self._transfer_checked >= 30.0:
+                self._transfer_checked = now
+                self.values["transfer"] = f"{self.storage.transfer_backlog()} scan(s) pending"
+        else:
+            self.values["transfer"] = "Fleet ingestion disabled"
+        if self.spool is not None and (CONFIG.SPOOL_CAPTURE or self.spool.spools):
+            self.values["spool"] = self.spool.describe()
+        else:
+            self.values["spool"] = "Spool capture off"
+    
+    def handle(self, event, data):
+        """ScanRunner listener: update the model and request a redraw."""
+        if event == "angle":
+            self.values["angle"] = f"{data['angle']:03d}deg  [{data['index']+1}/{data['total']}]  {data['status']}"
+        elif event == "phase":
+            self.active_phases.append(data["name"])
+        elif event == "phase_done":
+            if data["name"] in self.active_phases:
+                self.active_phases.remove(data["name"])
+            stats = self.phase_stats.setdefault(data["name"], [0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += data["elapsed"]
+            stats[2] = data["elapsed"]
+            self.values["timing"] = "  ".join(
+                f"{name} {last*1000:.0f}ms (avg {total/count*1000:.0f})"
+                for name, (count, total, last) in self.phase_stats.items())
+        elif event == "reshoot":
+            self.values["last"] = (f"{data['angle']:03d}deg re-shoot {data['attempt']}: "
+                                   f"{', '.join(data['reasons'])}")
+        elif event == "captured":
+            if data["success"]:
+                self.images += 1
+                name = os.path.basename(data['filepath'])
+                if data["size"] is None:
+                    self.values["last"] = f"{name} (developing)"
+                else:
+                    self.bytes += data["size"]
+                    self.values["last"] = f"{name} ({data['size']/1024:.0f}KB)"
+            else:
+                self.values["last"] = f"{data['angle']:03d}deg FAILED"
+            elapsed = max(time.monotonic() - self.started, 1e-6)
+            self.values["throughput"] = (f"{self.images / elapsed * 60:.1f} img/min | "
+                                         f"{self.bytes / elapsed / 1024**2:.2f} MB/s")
+        elif event == "load":
+            readings = [f"{data['temp_c']:.1f}C" if data.get('temp_c') is not None else None,
+                        f"CPU {data['cpu_busy']:.0%}" if data.get('cpu_busy') is not None else None,
+                        f"{data['freq_mhz']} MHz" if data.get('freq_mhz') else None]
+            throttled = " THROTTLED" if (data.get('throttled') or 0) & SystemMonitor.THROTTLED_NOW else ""
+            self.values["load"] = (f"{data['level']}{throttled} ({data['workers']} worker(s)"
+                                   f"{', review deferred' if data['review_deferred'] else ''})  "
+                                   + " | ".join(r for r in readings if r))
+            if data.get('message'):
+                self.values["log"] = data['message'].strip()
+        elif event == "log":
+            # Printing would scroll the panel away from its cursor-relative rows
+            self.values["log"] = " ".join(data["message"].split())
+        elif event == "finished":
+            self.values["phase"] = "aborted" if data["aborted"] else "done"
+            self.active_phases = []
+        if self.active_phases:
+            self.values["phase"] = " + ".join(self.active_phases)
+        if self._dirty is not None:
+            self._dirty.set()
+    
+    async def run(self):
+        """Redraw loop; cancel to stop (a final render is done by the caller)."""
+        self._dirty = asyncio.Event()
+        interval = 1.0 / max(CONFIG.DASHBOARD_MAX_FPS, 1)
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            self.render()
+            await asyncio.sleep(interval)
+
+# =============================================================================
+# CONTROL API
+# =============================================================================
+class ControlServer:
+    """Local control API for line integration (MES / PLC gateway).
+    
+    JSON lines over a Unix socket, one request per line:
+        {"cmd": "start_scan", "piece": 123}   -> {"ok": true, "job": {...}}
+        {"cmd": "abort"} / {"cmd": "abort", "job": 4}
+        {"cmd": "status"}
+        {"cmd": "last_manifest"}
+        {"cmd": "subscribe"}                  -> stream of {"event": ..., ...} lines
+    Any command may name a station ({"station": "B"}); the default is the
+    first one. "status" also lists every station, and events carry "station".
+    With CONTROL_HTTP_PORT set, the same commands are served on 127.0.0.1:
+    GET /status, GET /manifest, GET /events (server-sent events),
+    POST /scan {"piece": 123}, POST /abort.
+    """
+    
+    EVENT_QUEUE_SIZE = 256  # per subscriber; slow subscribers lose events, never stall a scan
+    
+    def __init__(self, services, socket_path=None, http_port=None):
+        self.services = {service.station.name: service for service in services}
+        self.socket_path = socket_path or CONFIG.CONTROL_SOCKET
+        self.http_port = http_port if http_port is not None else CONFIG.CONTROL_HTTP_PORT
+        self._servers = []
+    
+    async def start(self):
+        if os.path.exists(self.socket_path):
+            # Another running instance answers: never steal its socket
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.socket_path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                os.unlink(self.socket_path)  # stale socket from a previous run
+            else:
+                raise OSError(errno.EADDRINUSE, f"another instance is serving {self.socket_path}")
+            finally:
+                probe.close()
+        server = await asyncio.start_unix_server(self._serve_json, path=self.socket_path)
+        os.chmod(self.socket_path, CONFIG.CONTROL_SOCKET_MODE)
+        self._servers.append(server)
+        if self.http_port:
+            self._servers.append(await asyncio.start_server(self._serve_http, "127.0.0.1", self.http_port))
+    
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        if self._servers and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._servers = []
+    
+    def service(self, request):
+        """ScanService addressed by the request (default: first station)."""
+        name = request.get("station")
+        if name is None:
+            return next(iter(self.services.values()))
+        if str(name) not in self.services:
+            raise ValueError(f"unknown station: {name}")
+        return self.services[str(name)]
+    
+    async def dispatch(self, request):
+        """Execute one command and return a JSON-serialisable reply."""
+        cmd = request.get("cmd")
+        try:
+            if cmd == "start_scan":
+                job = await self.service(request).enqueue(int(request["piece"]),
+                                                          origin=request.get("origin", "control"))
+                return {'ok': True, 'job': job.to_dict()}
+            if cmd == "abort":
+                if "station" in request:
+                    return {'ok': await self.service(request).abort(request.get("job"))}
+                aborted = False
+                for service in self.services.values():
+                    aborted = await service.abort(request.get("job")) or aborted
+                return {'ok': aborted}
+            if cmd == "status":
+                return {'ok': True, 'status': self.service(request).status(),
+                        'stations': {name: service.status() for name, service in self.services.items()}}
+            if cmd == "last_manifest":
+                service = self.service(request)
+                manifest = (service.last_manifest
+                            or StorageManager(service.station.storage_path).find_last_manifest())
+                return {'ok': manifest is not None, 'manifest': manifest}
+            return {'ok': False, 'error': f"unknown command: {cmd}"}
+        except (KeyError, ValueError, TypeError) as e:
+            return {'ok': False, 'error': f"bad request: {e}"}
+    
+    async def _events(self, writer, encode):
+        """Forward service events to one client until it disconnects."""
+        queue = asyncio.Queue(maxsize=self.EVENT_QUEUE_SIZE)
+        
+        def _listener(event, data):
+            if not queue.full():
+                queue.put_nowait(dict(data, event=event))
         
-        # Force garbage collection to release camera resources
-        import gc
-        gc.collect()
-        time.sleep(0.5)  # Brief pause to let hardware release
+        for service in self.services.values():
+            service.listeners.append(_listener)
+        try:
+            while True:
+                writer.write(encode(await queue.get()))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for service in self.services.values():
+                service.listeners.remove(_listener)
+    
+    async def _serve_json(self, reader, writer):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = {}
+                if request.get("cmd") == "subscribe":
+                    await self._events(writer, lambda ev: (json.dumps(ev, default=str) + "\n").encode())
+                    break
+                reply = await self.dispatch(request)
+                writer.write((json.dumps(reply, default=str) + "\n").encode())
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    
+    async def _serve_http(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+            if len(request_line) < 2:
+                return
+            method, path = request_line[0], request_line[1]
+            body = {}
+            length = int(headers.get("content-length", 0) or 0)
+            if length:
+                try:
+                    body = json.loads(await reader.readexactly(length))
+                except ValueError:
+                    body = {}
+            
+            if method == "GET" and path == "/events":
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                             b"Cache-Control: no-cache\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                await self._events(writer, lambda ev: f"data: {json.dumps(ev, default=str)}\n\n".encode())
+                return
+            
+            routes = {
+                ("GET", "/status"): {"cmd": "status"},
+                ("GET", "/manifest"): {"cmd": "last_manifest"},
+                ("POST", "/scan"): dict(body, cmd="start_scan"),
+                ("POST", "/abort"): dict(body, cmd="abort"),
+            }
+            if (method, path) in routes:
+                reply = await self.dispatch(routes[(method, path)])
+                status = "200 OK" if reply.get('ok') else "400 Bad Request"
+            else:
+                reply, status = {'ok': False, 'error': "not found"}, "404 Not Found"
+            payload = json.dumps(reply, default=str).encode()
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+def control_request(request, socket_path=None, timeout=5.0):
+    """Send one request to the local control socket and return the decoded reply."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(socket_path or CONFIG.CONTROL_SOCKET)
+        sock.sendall((json.dumps(request) + "\n").encode())
+        with sock.makefile("r") as reply:
+            return json.loads(reply.readline())
+
+
+def control_cli(args):
+    """`app.py ctl [--station NAME] <status|start PIECE|abort [JOB]|manifest|events>` - local control client."""
+    commands = {"status": "status", "start": "start_scan", "abort": "abort",
+                "manifest": "last_manifest", "events": "subscribe"}
+    station = None
+    if len(args) > 1 and args[0] == "--station":
+        station, args = args[1], args[2:]
+    if not args or args[0] not in commands:
+        print("Usage: app.py ctl [--station NAME] status | start PIECE | abort [JOB] | manifest | events")
+        return 2
+    request = {"cmd": commands[args[0]]}
+    if station is not None:
+        request["station"] = station
+    if args[0] == "start" and len(args) > 1:
+        request["piece"] = int(args[1])
+    if args[0] == "abort" and len(args) > 1:
+        request["job"] = int(args[1])
+    try:
+        if request["cmd"] == "subscribe":
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(CONFIG.CONTROL_SOCKET)
+                sock.sendall((json.dumps(request) + "\n").encode())
+                for line in sock.makefile("r"):
+                    print(line, end="", flush=True)
+            return 0
+        reply = control_request(request)
+    except (OSError, ValueError) as e:
+        print(f"Control socket error: {e}")
+        return 1
+    print(json.dumps(reply, indent=2))
+    return 0 if reply.get('ok') else 1
 
 # =============================================================================
-# STORAGE MANAGER
+# PREVIEW STREAMING
 # =============================================================================
-class StorageManager:
-    def __init__(self):
-        self.local_path = CONFIG.LOCAL_STORAGE_PATH
-        self.current_piece_id = None
-        self.current_folder = None
-        os.makedirs(self.local_path, exist_ok=True)
+class PreviewStreamer:
+    """Multi-client MJPEG preview server fed from the FrameHub lores stream.
     
-    def set_piece_id(self, piece_number):
-        self.current_piece_id = CONFIG.PIECE_ID_FORMAT.format(int(piece_number))
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        self.current_folder = os.path.join(self.local_path, f"{self.current_piece_id}_{timestamp}")
-        os.makedirs(self.current_folder, exist_ok=True)
-        return self.current_piece_id
+    One encoder thread turns each lores frame into a JPEG at most once, capped
+    at STREAM_MAX_FPS and only while someone is watching; every client is sent
+    that same buffer. A client that cannot keep up skips to the newest frame,
+    so a slow link never stalls the camera loop. Works without a display.
     
-    def get_filepath(self, angle):
-        if not self.current_piece_id:
-            raise ValueError("Piece ID not set")
-        filename = f"{CONFIG.FILE_PREFIX}_{self.current_piece_id}_{int(angle):03d}deg.{CONFIG.FILE_EXTENSION}"
-        return os.path.join(self.current_folder, filename)
+        GET /              minimal viewer page
+        GET /stream.mjpg   multipart/x-mixed-replace stream
+        GET /snapshot.jpg  latest frame (503 when the camera has none)
+    """
     
-    def get_video_filepath(self):
-        """Get filepath for scan video."""
-        if not self.current_piece_id:
-            raise ValueError("Piece ID not set")
-        filename = f"{CONFIG.FILE_PREFIX}_{self.current_piece_id}_scan.mp4"
-        return os.path.join(self.current_folder, filename)
+    BOUNDARY = b"frame"
     
-    def get_image_count(self):
-        if not self.current_folder or not os.path.exists(self.current_folder):
-            return 0
-        return len([f for f in os.listdir(self.current_folder) if f.endswith(f".{CONFIG.FILE_EXTENSION}")])
+    def __init__(self, core, host=None, port=None):
+        self.core = core
+        self.host = host or CONFIG.STREAM_HOST
+        self.port = port or CONFIG.STREAM_PORT
+        self.camera = None
+        self.clients = 0
+        self.frame_id = 0
+        self.latest_jpeg = None
+        self._new_frame = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._server = None
+        self._thread = None
     
-    def transfer_to_nas(self):
-        # TODO: Implement NAS transfer when configured
-        if CONFIG.NAS_ENABLED:
-            print("  [STORAGE] NAS transfer not yet implemented")
-        return False
+    async def start(self):
+        self._new_frame = asyncio.Event()
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._encode_loop, name="stream-encoder", daemon=True)
+        self._thread.start()
+    
+    async def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+    
+    def attach(self, camera):
+        """Stream from this camera's FrameHub (no-op without a frame loop)."""
+        self.camera = camera if camera.frame_hub is not None else None
+        self._wake.set()
+    
+    def detach(self):
+        self.camera = None
+        self._wake.set()
+    
+    def _encode_loop(self):
+        hub = None
+        last_seq = 0
+        interval = 1.0 / max(CONFIG.STREAM_MAX_FPS, 1)
+        while not self._stop.is_set():
+            camera = self.camera
+            wanted = camera.frame_hub if camera is not None and self.clients > 0 else None
+            if wanted is not hub:
+                # Only ask the hub for lores frames while clients are connected
+                if hub is not None:
+                    hub.remove_consumer()
+                if wanted is not None:
+                    wanted.add_consumer()
+                hub = wanted
+            if hub is None:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            
+            sample = hub.wait_for(lambda s: s.frame is not None, after_seq=last_seq, timeout=0.5)
+            if sample is None:
+                continue
+            last_seq = sample.seq
+            started = time.monotonic()
+            try:
+                frame = cv2.cvtColor(sample.frame, cv2.COLOR_RGB2BGR)
+                frame = camera.add_angle_overlay(frame, camera.current_angle, is_still=False)
+                ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, CONFIG.STREAM_QUALITY])
+            except Exception:
+                ok = False
+            if ok:
+                self.latest_jpeg = buffer.tobytes()
+                self.core.loop.call_soon_threadsafe(self._publish)
+            # Rate cap: the hub keeps running, we just skip frames in between
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
+        if hub is not None:
+            hub.remove_consumer()
+    
+    def _publish(self):
+        """Runs on the core loop: wake every client waiting for a frame."""
+        self.frame_id += 1
+        self._new_frame.set()
+        self._new_frame = asyncio.Event()
+    
+    async def _next_frame(self, sent_id):
+        """Wait for a frame newer than sent_id; returns (frame_id, jpeg)."""
+        while self.frame_id == sent_id or self.latest_jpeg is None:
+            await self._new_frame.wait()
+        return self.frame_id, self.latest_jpeg
+    
+    def _add_client(self, delta):
+        self.clients += delta
+        self._wake.set()
+    
+    async def _serve(self, reader, writer):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            while (await reader.readline()).strip():
+                pass  # headers are not needed
+            path = request_line[1] if len(request_line) > 1 else "/"
+            
+            if path == "/stream.mjpg":
+                writer.write(b"HTTP/1.1 200 OK\r\nCache-Control: no-cache\r\nConnection: close\r\n"
+                             b"Content-Type: multipart/x-mixed-replace; boundary=" + self.BOUNDARY + b"\r\n\r\n")
+                self._add_client(1)
+                try:
+                    sent_id = 0
+                    while True:
+                        sent_id, jpeg = await self._next_frame(sent_id)
+                        writer.write(b"--" + self.BOUNDARY + b"\r\nContent-Type: image/jpeg\r\n"
+                                     + f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n")
+                        await writer.drain()
+                finally:
+                    self._add_client(-1)
+            elif path == "/snapshot.jpg":
+                jpeg = self.latest_jpeg
+                if self.camera is not None:
+                    self._add_client(1)
+                    try:
+                        _, jpeg = await asyncio.wait_for(self._next_frame(0), timeout=5.0)
+                    except asyncio.TimeoutError:
+                        jpeg = None
+                    finally:
+                        self._add_client(-1)
+                if jpeg is None:
+                    body = b"No camera frame available\n"
+                    writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Type: text/plain\r\n"
+                                 b"Retry-After: 5\r\nConnection: close\r\n"
+                                 + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+                else:
+                    writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: image/jpeg\r\nConnection: close\r\n"
+                                 + f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg)
+                await writer.drain()
+            else:
+                page = (b"<html><head><title>Table Controle Carapace</title></head>"
+                        b"<body style='margin:0;background:#000'>"
+                        b"<img src='/stream.mjpg' style='width:100%'></body></html>")
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html\r\nConnection: close\r\n"
+                             + f"Content-Length: {len(page)}\r\n\r\n".encode() + page)
+                await writer.drain()
+        except (ConnectionError, asyncio.TimeoutError, IndexError):
+            pass
+        finally:
+            writer.close()
 
 # =============================================================================
 # MAIN APPLICATION
 # =============================================================================
 class Application:
+    MIN_BODY_ROWS = 30  # rows the menus and scan panel need below a pinned header
+    
     def __init__(self):
+        self._header_size = None  # terminal size the pinned header was drawn for
         self.motor = None
         self.camera = None
         self.storage = None
-        load_calibration()
+        self.core = AsyncCore()
+        self.station = STATIONS[0]  # station driven by the kiosk menu
+        self.services = {}
+        for station in STATIONS:
+            load_calibration(station)
+            load_motion_profile(station)
+            self.services[station.name] = ScanService(self.core, station)
+            self.services[station.name].start()
+        self.control = None
+        if CONFIG.CONTROL_ENABLED:
+            self.control = ControlServer(self.services.values())
+            try:
+                self.core.submit(self.control.start()).result()
+            except OSError as e:
+                print(f"  [CONTROL] API not available: {e}")
+                self.control = None
+        if CONFIG.STREAM_ENABLED and CV2_AVAILABLE:
+            # One MJPEG server per station, on consecutive ports
+            for i, service in enumerate(self.services.values()):
+                streamer = PreviewStreamer(self.core, port=CONFIG.STREAM_PORT + i)
+                try:
+                    self.core.submit(streamer.start()).result()
+                    service.streamer = streamer
+                except OSError as e:
+                    print(f"  [STREAM] Preview streaming not available ({service.station.name}): {e}")
+    
+    @property
+    def service(self):
+        """ScanService of the station selected in the kiosk menu."""
+        return self.services[self.station.name]
+    
+    @property
+    def streamer(self):
+        return self.service.streamer
     
     def show_header(self):
-        """Display the persistent header with project title and license."""
-        clear_screen()
+        """Display the persistent header with project title and license.
         
-        # Project title
-        print(PROJECT_TITLE)
-        
-        # License text
-        print(LICENSE_TEXT)
+        On a terminal tall enough, the header is drawn once and pinned above a
+        scroll region; later calls only clear the screen below it. It is
+        redrawn after a resize.
+        """
+        size = shutil.get_terminal_size((100, 24))
+        header_rows = HEADER_TEXT.count("\n") + 1
+        if not sys.stdout.isatty() or size.lines < header_rows + self.MIN_BODY_ROWS:
+            self._header_size = None
+            clear_screen()
+            print(HEADER_TEXT)
+            return
+        if self._header_size != size:
+            clear_screen()
+            # Project title and license, written in one go; rows below scroll on their own
+            sys.stdout.write(HEADER_TEXT + "\n" + f"\033[{header_rows + 1};{size.lines}r")
+            self._header_size = size
+        sys.stdout.write(f"\033[{header_rows + 1};1H\033[J")
+        sys.stdout.flush()
+    
+    def _release_header(self):
+        """Give the whole terminal back (reset the scroll region) on exit."""
+        if self._header_size is not None:
+            sys.stdout.write("\033[r")
+            sys.stdout.flush()
+            self._header_size = None
     
     def show_main_menu(self):
         """Display main menu options."""
@@ -733,33 +5653,72 @@ class Application:
         print("\n" + "=" * 100)
         print("                                      MAIN MENU")
         print("=" * 100)
-        print(f"\n  Current Settings: Increment={CONFIG.ROTATION_INCREMENT}deg | Photos={CONFIG.TOTAL_PHOTOS} | Calibration={CONFIG.CALIBRATION_FACTOR:.4f}")
-        print(f"  Storage: {CONFIG.LOCAL_STORAGE_PATH}")
+        print(f"\n  Current Settings: Increment={CONFIG.ROTATION_INCREMENT}deg | Photos={CONFIG.TOTAL_PHOTOS} | Calibration={self.station.calibration_factor:.4f}")
+        print(f"  Storage: {self.station.storage_path}")
+        if CONFIG.SPOOL_CAPTURE or self.service.spool.spools:
+            print(f"  Spool backlog: {self.service.spool.describe()}")
+        if self.service.spool.notice:
+            print(self.service.spool.notice)
+        if self.core.scheduler is not None and self.core.scheduler.notice:
+            print(self.core.scheduler.notice)
+        if len(STATIONS) > 1:
+            print(f"  Station: {self.station.name} (camera {self.station.camera_index})")
         print("\n" + "-" * 100)
         print("\n    [1] LAUNCH CAPTURE        Start 360 degree scan with live preview")
         print("    [2] TEST CAMERA           View continuous video feed (no saving)")
         print("    [3] TEST MOTOR            Motor control and calibration")
         print("    [4] INFORMATION           Wiring diagram and documentation")
+        if len(STATIONS) > 1:
+            print("    [5] SELECT STATION        Choose the turntable driven by this menu")
+        print(f"    [6] CAMERA PIPELINE       Smooth preview or single mode (current: {CONFIG.CAMERA_PIPELINE})")
         print("    [0] EXIT")
         print("\n" + "=" * 100)
     
+    def select_station(self):
+        """Pick the station used by capture and the test menus."""
+        print()
+        for station in STATIONS:
+            state = self.services[station.name].status()['state']
+            print(f"    [{station.name}] camera {station.camera_index} | "
+                  f"pins {station.gpio_pulse}/{station.gpio_direction}/{station.gpio_enable} | {state}")
+        choice = input("\n  Station: ").strip().upper()
+        if choice in self.services:
+            self.station = self.services[choice].station
+    
     def run(self):
         """Main application loop."""
-        while True:
-            self.show_main_menu()
-            choice = input("\n  Enter option: ").strip()
-            
-            if choice == "1":
-                self.launch_capture()
-            elif choice == "2":
-                self.test_camera()
-            elif choice == "3":
-                self.test_motor_menu()
-            elif choice == "4":
-                self.show_information()
-            elif choice == "0":
-                print("\n  Exiting. Goodbye.")
-                break
+        try:
+            self.offer_resume()
+            while True:
+                self.show_main_menu()
+                record_startup("menu_ready")
+                choice = input("\n  Enter option: ").strip()
+                
+                if choice == "1":
+                    self.launch_capture()
+                elif choice == "2":
+                    self.test_camera()
+                elif choice == "3":
+                    self.test_motor_menu()
+                elif choice == "4":
+                    self.show_information()
+                elif choice == "5" and len(STATIONS) > 1:
+                    self.select_station()
+                elif choice == "6":
+                    self.choose_pipeline()
+                elif choice == "0":
+                    print("\n  Exiting. Goodbye.")
+                    break
+        finally:
+            self._release_header()
+            if self.control is not None:
+                self.core.submit(self.control.stop()).result()
+            for service in self.services.values():
+                if service.streamer is not None:
+                    self.core.submit(service.streamer.stop()).result()
+            self.core.shutdown()
+            if SIM is not None:
+                SIM.close()
     
     def launch_capture(self):
         """Run full 360 degree capture with live preview."""
@@ -768,6 +5727,10 @@ class Application:
         print("                                   360 DEGREE CAPTURE")
         print("=" * 100)
         
+        # Open and stabilise the camera while the operator types the piece number
+        self.core.submit(self.service.prewarm())
+        
+        piece_number = None
         try:
             piece_input = input("\n  Enter piece number (or 'q' to cancel): ").strip()
             if piece_input.lower() == 'q':
@@ -777,99 +5740,156 @@ class Application:
             print("  Invalid number.")
             time.sleep(1)
             return
+        finally:
+            if piece_number is None:
+                # Cancelled at the prompt: don't hold the camera until the idle timeout
+                self.core.run(self.service.drop_prewarm())
         
-        print("\n  Initializing hardware...")
-        progress_bar(0, 3, "  Init")
-        
-        self.motor = MotorController()
-        progress_bar(1, 3, "  Init")
-        
-        self.camera = CameraController()
-        progress_bar(2, 3, "  Init")
-        
-        self.storage = StorageManager()
-        piece_id = self.storage.set_piece_id(piece_number)
-        progress_bar(3, 3, "  Init")
-        
-        print(f"\n  Piece ID: {piece_id}")
-        print(f"  Output: {self.storage.current_folder}")
+        job = self.core.run(self._kiosk_scan(piece_number), abortable=True)
+        self._show_scan_summary(job)
+    
+    def _show_scan_summary(self, job):
+        """Print the end-of-scan report and wait for the operator."""
+        if job is None or job.state == "aborted":
+            print("\n\n  Scan aborted by user.")
+        elif job.state == "failed":
+            print(f"\n\n  Scan failed: {job.error}")
         
-        # Start live preview
-        print("\n  Starting live preview...")
-        preview_ok = self.camera.start_preview()
-        if preview_ok:
-            print("  [PREVIEW] Live video window opened")
-        else:
-            print("  [PREVIEW] Running without preview window")
+        manifest = (job.manifest if job else None) or {}
+        captured = len(manifest.get('images', []))
+        # The scan's own plan: the increment may have changed since, or it resumed an older plan
+        total = manifest.get('total') or (job.total if job else None)
+        print("\n" + "=" * 100)
+        print(f"  SCAN COMPLETE: {captured}/{total if total else '-'} images")
+        if manifest.get('video'):
+            video_path = os.path.join(manifest['folder'], manifest['video'])
+            video_size = os.path.getsize(video_path) / (1024 * 1024)
+            print(f"  VIDEO: {manifest['video']} ({video_size:.1f}MB)")
+        if manifest.get('spool') and 'pending' in manifest['spool']:
+            print(f"  SPOOLED: {manifest['spool']['pending']} raw still(s), developed when the station is idle")
+        print(f"  Location: {manifest.get('folder') or (job.folder if job else '-')}")
+        print("=" * 100)
         
-        # Start video recording
-        video_path = self.storage.get_video_filepath()
-        video_ok = self.camera.start_video_recording(video_path)
-        if video_ok:
-            print(f"  [VIDEO] Recording to: {os.path.basename(video_path)}")
-        else:
-            print("  [VIDEO] Video recording not available")
+        input("\n  Press ENTER to continue...")
+    
+    async def _kiosk_scan(self, piece_number, resume=None, service=None):
+        """Queue a scan on a station's ScanService and follow it on the console.
         
-        print(f"\n  Starting scan... Press Ctrl+C to abort.\n")
+        Cancelling this coroutine (ENTER / Ctrl+C) aborts the job and waits for
+        the hardware to be released. Other stations keep scanning meanwhile.
+        """
+        service = service or self.service
+        job = await service.enqueue(piece_number, origin="kiosk", resume=resume)
+        view = {'dashboard': None, 'redraw': None}
         
-        self.motor.enable()
-        self.motor.reset_position()
-        self.camera.set_current_angle(0)  # Initialize angle for overlay
+        def _listener(event, data):
+            if data.get('job') != job.id:
+                return
+            if event == "log" and view['dashboard'] is None:
+                print(data['message'])
+            elif event == "init":
+                progress_bar(data['step'], data['total'], "  Init")
+            elif event == "started":
+                print(f"\n  Starting scan... Press ENTER or Ctrl+C to abort.\n")
+                if sys.stdout.isatty():
+                    view['dashboard'] = Dashboard(StorageManager(service.station.storage_path), spool=service.spool)
+                    view['dashboard'].draw()
+                    view['redraw'] = asyncio.ensure_future(view['dashboard'].run())
+            elif view['dashboard'] is not None:
+                view['dashboard'].handle(event, data)
+            else:
+                self._print_scan_event(event, data)
         
-        captured = 0
+        if service.current is not None:
+            print(f"\n  Station busy - queued behind job {service.current.id}...")
+        service.listeners.append(_listener)
         try:
-            for i in range(CONFIG.TOTAL_PHOTOS):
-                current_angle = i * CONFIG.ROTATION_INCREMENT
-                
-                # Update angle for video overlay
-                self.camera.set_current_angle(current_angle)
-                
-                # Status update
-                status = self.camera.get_status()
-                print(f"  [{i+1:2d}/{CONFIG.TOTAL_PHOTOS}] Angle: {current_angle:03d}deg | {status} | ", end="")
-                
-                time.sleep(CONFIG.CAPTURE_DELAY)
-                
-                # Capture and save with angle overlay
-                filepath = self.storage.get_filepath(current_angle)
-                success = self.camera.capture(filepath, angle=current_angle)
-                
-                if success:
-                    captured += 1
-                    size = os.path.getsize(filepath) if os.path.exists(filepath) else 0
-                    print(f"SAVED ({size/1024:.0f}KB)")
-                else:
-                    print("FAILED")
-                
-                progress_bar(i + 1, CONFIG.TOTAL_PHOTOS, "  Progress")
-                
-                # Rotate to next position
-                if i < CONFIG.TOTAL_PHOTOS - 1:
-                    self.motor.rotate_increment()
-        
-        except KeyboardInterrupt:
-            print("\n\n  Scan aborted by user.")
-        
+            await asyncio.shield(job.done)
+        except asyncio.CancelledError:
+            await service.abort(job.id)
+            await job.done
         finally:
-            self.camera.stop_video_recording()
-            self.camera.stop_preview()
-            self.motor.disable()
-            self.motor.cleanup()
-            self.camera.cleanup()
+            service.listeners.remove(_listener)
+            if view['redraw'] is not None:
+                view['redraw'].cancel()
+                view['dashboard'].render()
+        return job
+    
+    def offer_resume(self):
+        """Offer to finish scans that were interrupted by a crash or power loss."""
+        interrupted = [(service, folder) for service in self.services.values()
+                       for folder in ScanJournal.find_interrupted(service.station.storage_path)]
+        for service, folder in interrupted:
+            state = ScanJournal.load(folder)
+            header = state['header']
+            self.show_header()
+            print("\n" + "=" * 100)
+            print("                                   INTERRUPTED SCAN")
+            print("=" * 100)
+            if len(STATIONS) > 1:
+                print(f"\n  Station: {service.station.name}")
+            print(f"\n  Piece ID: {header['piece_id']}")
+            print(f"  Folder: {folder}")
+            print(f"  Captured: {len(state['done'])}/{header['total']} angles")
+            answer = input("\n  Resume this scan now (missing angles only)? [Y/n]: ").strip().lower()
+            if answer in ("", "y", "yes", "o", "oui"):
+                job = self.core.run(self._kiosk_scan(header['piece_number'], resume=folder, service=service),
+                                    abortable=True)
+                self._show_scan_summary(job)
+            else:
+                ScanJournal(folder).close("abandoned")
+                print("  Scan left as is (will not be offered again).")
+                time.sleep(1)
+    
+    def _claim_hardware(self, owner):
+        """Reserve the hardware for a manual tool; tell the operator if a scan has it."""
+        if self.core.run(self.service.claim(owner)):
+            return True
+        print("\n  Station busy: a scan is running or queued (control API).")
+        input("\n  Press ENTER to continue...")
+        return False
+    
+    def _release_hardware(self):
+        self.core.run(self.service.release())
+    
+    def _motor_call(self, func, *args):
+        """Run a manual motor job on the station's motor executor, like a scan's moves.
         
-        print("\n" + "=" * 100)
-        print(f"  SCAN COMPLETE: {captured}/{CONFIG.TOTAL_PHOTOS} images")
-        if video_ok and os.path.exists(video_path):
-            video_size = os.path.getsize(video_path) / (1024 * 1024)
-            print(f"  VIDEO: {os.path.basename(video_path)} ({video_size:.1f}MB)")
-        print(f"  Location: {self.storage.current_folder}")
-        print("=" * 100)
+        Only called while _claim_hardware() holds the station. Ctrl+C stops
+        the move between pulses, waits for it to return and is re-raised as
+        KeyboardInterrupt for the tool to handle.
+        """
+        executor = self.station.executor("motor")
         
-        if CONFIG.NAS_ENABLED:
-            print("  Transferring to NAS...")
-            self.storage.transfer_to_nas()
+        async def _call():
+            try:
+                return [await self.core.call(executor, func, *args)]
+            except asyncio.CancelledError:
+                self.motor.abort_event.set()
+                await self.core.drain([executor])
+                raise
+            finally:
+                self.motor.abort_event.clear()
         
-        input("\n  Press ENTER to continue...")
+        result = self.core.run(_call())
+        if result is None:
+            raise KeyboardInterrupt
+        return result[0]
+    
+    def _print_scan_event(self, event, data):
+        """Console progress listener for ScanRunner."""
+        if event == "angle":
+            print(f"  [{data['index']+1:2d}/{data['total']}] Angle: {data['angle']:03d}deg | {data['status']} | ", end="")
+        elif event == "captured":
+            if data['success'] and data['size'] is None:
+                print("CAPTURED (developing)")
+            elif data['success']:
+                print(f"SAVED ({data['size']/1024:.0f}KB)")
+            else:
+                print("FAILED")
+            progress_bar(data['index'] + 1, data['total'], "  Progress")
+        elif event == "load" and data.get('message'):
+            print(data['message'])
     
     def test_camera(self):
         """Test camera with live video preview only (no saving)."""
@@ -878,7 +5898,59 @@ class Application:
         print("                                CAMERA TEST - LIVE PREVIEW")
         print("=" * 100)
         
-        self.camera = CameraController()
+        if not self._claim_hardware("camera test"):
+            return
+        try:
+            self._test_camera()
+        finally:
+            self._release_hardware()
+    
+    def choose_pipeline(self):
+        """Measure both camera pipelines on this station and let the operator pick one."""
+        self.show_header()
+        print("\n" + "=" * 100)
+        print("                                   CAMERA PIPELINE")
+        print("=" * 100)
+        print("\n  single: preview and stills share the full-resolution mode (slow preview, fastest stills)")
+        print(f"  video:  binned {CONFIG.VIDEO_MODE_SIZE[0]}x{CONFIG.VIDEO_MODE_SIZE[1]} preview at up to "
+              f"{CONFIG.VIDEO_MODE_FPS} fps, mode switch for each still")
+        
+        results = []
+        if CAMERA_AVAILABLE:
+            if not self._claim_hardware("pipeline benchmark"):
+                return
+            try:
+                for pipeline in ("single", "video"):
+                    print(f"\n  Measuring {pipeline} pipeline...")
+                    camera = CameraController(verbose=False, camera_index=self.station.camera_index,
+                                              pipeline=pipeline)
+                    try:
+                        if camera.is_initialized:
+                            results.append(camera.benchmark())
+                        else:
+                            print("  Camera not initialized.")
+                    finally:
+                        camera.cleanup()
+            finally:
+                self._release_hardware()
+        else:
+            print("\n  Camera hardware not detected (mock mode) - nothing to measure.")
+        
+        if results:
+            print(f"\n  {'Pipeline':<10}{'Preview':>12}{'Still':>12}{'Switch':>12}")
+            for result in results:
+                switch = f"{result['mode_switch']:.3f} s" if result['mode_switch'] is not None else "-"
+                print(f"  {result['pipeline']:<10}{result['preview_fps']:>8.1f} fps"
+                      f"{result['still_latency']:>10.3f} s{switch:>12}")
+        
+        choice = input(f"\n  Use [1] single or [2] video (ENTER keeps {CONFIG.CAMERA_PIPELINE}): ").strip()
+        if choice in ("1", "2"):
+            CONFIG.CAMERA_PIPELINE = "single" if choice == "1" else "video"
+            print(f"  Camera pipeline set to {CONFIG.CAMERA_PIPELINE}")
+        input("\n  Press ENTER to continue...")
+    
+    def _test_camera(self):
+        self.camera = CameraController(camera_index=self.station.camera_index)
         
         if not self.camera.is_initialized and CAMERA_AVAILABLE:
             print("\n  Camera not initialized. Check connection.")
@@ -888,8 +5960,13 @@ class Application:
         # Start preview window
         preview_ok = self.camera.start_preview()
         
+        if preview_ok and self.streamer is not None:
+            self.streamer.attach(self.camera)
+        
         if preview_ok:
-            if CV2_AVAILABLE:
+            if CV2_AVAILABLE and self.camera.preview_headless:
+                print("\n  [PREVIEW] No display attached - headless preview")
+            elif CV2_AVAILABLE:
                 print("\n  [PREVIEW] Live video window opened (OpenCV)")
                 print("  [PREVIEW] Press 'Q' in the preview window OR Ctrl+C here to stop")
             else:
@@ -900,43 +5977,70 @@ class Application:
             if not CAMERA_AVAILABLE:
                 print("  [PREVIEW] Camera hardware not detected (mock mode).")
         
-        print("\n  Streaming live video...\n")
+        if self.streamer is not None:
+            print(f"  [STREAM] Remote view: http://{socket.gethostname()}:{self.streamer.port}/")
+        print("\n  Streaming live video... Press ENTER to stop.\n")
         
-        try:
-            frame = 0
-            while True:
-                # Check if OpenCV preview thread stopped (user pressed Q)
-                if CV2_AVAILABLE and self.camera.preview_thread:
-                    if not self.camera.preview_thread.is_alive():
-                        print("\n\n  Preview window closed.")
-                        break
-                
-                frame += 1
-                status = self.camera.get_status()
-                print(f"\r  [LIVE] Frame {frame:05d} | {status}          ", end="", flush=True)
-                time.sleep(0.1)
-        except KeyboardInterrupt:
-            pass
+        if self.core.run(self._camera_monitor(), abortable=True):
+            print("\n\n  Preview window closed.")
         
         print("\n\n  Stopping preview...")
+        if self.streamer is not None:
+            self.streamer.detach()
         self.camera.cleanup()
         
         input("\n  Press ENTER to continue...")
     
+    async def _camera_monitor(self):
+        """Show live camera status until the preview window closes (returns True)."""
+        loop = asyncio.get_running_loop()
+        preview_closed = None
+        # Check if OpenCV preview thread stopped (user pressed Q)
+        if CV2_AVAILABLE and self.camera.preview_thread:
+            preview_closed = loop.run_in_executor(None, self.camera.preview_thread.join)
+        
+        frame = 0
+        while True:
+            frame += 1
+            status = self.camera.get_status()
+            print(f"\r  [LIVE] Frame {frame:05d} | {status}          ", end="", flush=True)
+            if preview_closed is None:
+                await asyncio.sleep(0.1)
+                continue
+            done, _ = await asyncio.wait({preview_closed}, timeout=0.1)
+            if done:
+                return True
+    
     def test_motor_menu(self):
         """Motor test and calibration menu."""
+        if not self._claim_hardware("motor test"):
+            return
+        try:
+            self._test_motor_menu()
+        finally:
+            self._release_hardware()
+    
+    def _test_motor_menu(self):
         while True:
             self.show_header()
             print("\n" + "=" * 100)
             print("                                MOTOR TEST & CALIBRATION")
             print("=" * 100)
-            print(f"\n  Current: Increment={CONFIG.ROTATION_INCREMENT}deg | Calibration={CONFIG.CALIBRATION_FACTOR:.6f}")
-            print(f"  Speed: Pulse={CONFIG.PULSE_DELAY_US}us | Step={CONFIG.STEP_DELAY_MS}ms")
+            print(f"\n  Current: Increment={CONFIG.ROTATION_INCREMENT}deg | Calibration={self.station.calibration_factor:.6f}")
+            pulse, step = self.station.speed()
+            print(f"  Speed: Pulse={pulse}us | Step={step}ms")
+            if self.station.motion_stats:
+                stats = self.station.motion_stats
+                print(f"  Pulse thread: {stats['thread']}")
+                print(f"  Last session, {stats['moves']} move(s): pulse period expected {stats['expected_us']:.0f}us | "
+                      f"min {stats['min_us']:.0f} | mean {stats['mean_us']:.0f} | p99 {stats['p99_us']:.0f} | "
+                      f"max {stats['max_us']:.0f}")
             print("\n" + "-" * 100)
             print("\n    [1] ROTATE BY DEGREES     Enter custom rotation angle")
             print(f"    [2] MODIFY INCREMENT      Change rotation increment (current: {CONFIG.ROTATION_INCREMENT})")
             print("    [3] MODIFY SPEED          Change motor speed settings")
             print("    [4] CALIBRATION           Adjust calibration factor")
+            print("    [5] AUTO-TUNE SPEED       Find the fastest timings with no missed steps (camera)")
             print("    [0] BACK TO MAIN MENU")
             print("\n" + "=" * 100)
             
@@ -950,6 +6054,8 @@ class Application:
                 self.modify_speed()
             elif choice == "4":
                 self.motor_calibration()
+            elif choice == "5":
+                self.auto_tune_speed()
             elif choice == "0":
                 break
     
@@ -959,21 +6065,30 @@ class Application:
         print("\n" + "=" * 100)
         print("                                  MOTOR ROTATION TEST")
         print("=" * 100)
-        print("  Enter degrees to rotate. Type 'q' to quit, 'r' to reset position.\n")
+        print("  Enter degrees to rotate. Type 'q' to quit, 'r' to set home here, 'g' to go to an angle.\n")
         
-        self.motor = MotorController()
+        self.motor = MotorController(self.station)
         self.motor.enable()
         
         try:
             while True:
-                print(f"\n  Current angle: {self.motor.current_angle:.2f} degrees")
-                degrees_input = input("  Degrees (or 'q'/'r'): ").strip()
+                print(f"\n  Current angle: {self.motor.current_angle:.2f} degrees (step {self.motor.position_steps})")
+                degrees_input = input("  Degrees (or 'q'/'r'/'g'): ").strip()
                 
                 if degrees_input.lower() == 'q':
                     break
                 if degrees_input.lower() == 'r':
-                    self.motor.reset_position()
-                    print("  Position reset to 0 degrees")
+                    self._motor_call(self.motor.reset_position)
+                    print("  Home set: position reset to 0 degrees")
+                    continue
+                if degrees_input.lower() == 'g':
+                    try:
+                        target = float(input("  Target angle [0-360): ").strip()) % 360
+                        print(f"  Moving to {target:.2f} degrees (shortest path)...")
+                        self._motor_call(self.motor.move_to, target)
+                        print(f"  Done. New angle: {self.motor.current_angle:.2f} degrees")
+                    except ValueError:
+                        print("  Invalid input.")
                     continue
                 
                 try:
@@ -982,7 +6097,7 @@ class Application:
                     clockwise = direction != 'CCW'
                     
                     print(f"  Rotating {degrees} degrees {'CW' if clockwise else 'CCW'}...")
-                    self.motor.rotate_degrees(degrees, clockwise)
+                    self._motor_call(self.motor.rotate_degrees, degrees, clockwise)
                     print(f"  Done. New angle: {self.motor.current_angle:.2f} degrees")
                 except ValueError:
                     print("  Invalid input.")
@@ -1025,25 +6140,34 @@ class Application:
         print("\n" + "=" * 100)
         print("                                  MODIFY MOTOR SPEED")
         print("=" * 100)
-        print(f"\n  Current pulse delay: {CONFIG.PULSE_DELAY_US} microseconds")
-        print(f"  Current step delay: {CONFIG.STEP_DELAY_MS} milliseconds")
+        pulse, step = self.station.speed()
+        print(f"\n  Current pulse delay: {pulse} microseconds")
+        print(f"  Current step delay: {step} milliseconds")
         print("\n  Lower pulse delay = faster rotation (min recommended: 100us)")
         
         try:
-            pulse_input = input(f"\n  Pulse delay [100-5000] ({CONFIG.PULSE_DELAY_US}): ").strip()
+            pulse_input = input(f"\n  Pulse delay [100-5000] ({pulse}): ").strip()
             if pulse_input:
-                pulse = int(pulse_input)
-                CONFIG.PULSE_DELAY_US = max(100, min(5000, pulse))
-                print(f"  Pulse delay set to {CONFIG.PULSE_DELAY_US} microseconds")
+                pulse = max(100, min(5000, int(pulse_input)))
+                print(f"  Pulse delay set to {pulse} microseconds")
             
-            step_input = input(f"  Step delay [1-50] ({CONFIG.STEP_DELAY_MS}): ").strip()
+            step_input = input(f"  Step delay [1-50] ({step}): ").strip()
             if step_input:
-                step = int(step_input)
-                CONFIG.STEP_DELAY_MS = max(1, min(50, step))
-                print(f"  Step delay set to {CONFIG.STEP_DELAY_MS} milliseconds")
+                step = max(1, min(50, int(step_input)))
+                print(f"  Step delay set to {step} milliseconds")
         except ValueError:
             print("  Invalid input.")
         
+        if (pulse, step) != self.station.speed():
+            # Manual timings replace any tuned profile, so they survive a restart too
+            profile = {'pulse_delay_us': pulse, 'step_delay_ms': step,
+                       'manual': datetime.now().isoformat(timespec="seconds")}
+            if save_motion_profile(profile, self.station):
+                print(f"  Saved {self.station.profile_file}")
+            else:
+                print("  Could not save the motion profile (applies until restart).")
+                self.station.pulse_delay_us, self.station.step_delay_ms = pulse, step
+        
         input("\n  Press ENTER to continue...")
     
     def motor_calibration(self):
@@ -1052,13 +6176,14 @@ class Application:
         print("\n" + "=" * 100)
         print("                                  MOTOR CALIBRATION")
         print("=" * 100)
-        print(f"\n  Current calibration factor: {CONFIG.CALIBRATION_FACTOR:.6f}")
+        print(f"\n  Current calibration factor: {self.station.calibration_factor:.6f}")
         print("\n  Factor > 1.0 = motor rotates less than expected")
         print("  Factor < 1.0 = motor rotates more than expected")
         print("\n" + "-" * 100)
         print("\n    [1] Test 360 rotation (measure actual)")
         print("    [2] Enter calibration factor manually")
         print("    [3] Reset to 1.0")
+        print("    [4] Automatic (vision fiducial)")
         print("    [0] Back")
         print("\n" + "=" * 100)
         
@@ -1069,26 +6194,32 @@ class Application:
         elif choice == "2":
             self._calibration_manual()
         elif choice == "3":
-            save_calibration(1.0)
+            save_calibration(1.0, self.station)
             print("\n  Calibration reset to 1.0")
             input("  Press ENTER to continue...")
+        elif choice == "4":
+            self._calibration_vision()
     
     def _calibration_test(self):
         """Run 360 degree calibration test."""
-        self.motor = MotorController()
+        self.motor = MotorController(self.station)
         self.motor.enable()
-        self.motor.reset_position()
         
         print("\n  Rotating 360 degrees...")
         progress_bar(0, 360, "  Rotation")
         
         # Rotate in increments for progress display
-        for i in range(24):
-            self.motor.rotate_degrees(15, clockwise=True)
-            progress_bar((i + 1) * 15, 360, "  Rotation")
-        
-        self.motor.disable()
-        self.motor.cleanup()
+        try:
+            for i in range(24):
+                self._motor_call(self.motor.rotate_degrees, 15, True)
+                progress_bar((i + 1) * 15, 360, "  Rotation")
+        except KeyboardInterrupt:
+            print("\n  Interrupted.")
+            input("\n  Press ENTER to continue...")
+            return
+        finally:
+            self.motor.disable()
+            self.motor.cleanup()
         
         print("\n  Measure the actual rotation of your reference mark.")
         try:
@@ -1099,7 +6230,7 @@ class Application:
             if abs(error) > 0.1 and actual > 0:
                 suggested = 360.0 / actual
                 print(f"  Suggested calibration factor: {suggested:.6f}")
-                save_calibration(suggested)
+                save_calibration(suggested, self.station)
                 print(f"  Calibration saved: {suggested:.6f}")
             else:
                 print("  Rotation is accurate. No calibration needed.")
@@ -1108,12 +6239,68 @@ class Application:
         
         input("\n  Press ENTER to continue...")
     
+    def _vision_session(self, action):
+        """Open camera and motor for a RotationVerifier, run action(verifier), clean up."""
+        if not (CV2_AVAILABLE and NUMPY_AVAILABLE):
+            print("\n  OpenCV and NumPy are required for vision-based checks.")
+            input("\n  Press ENTER to continue...")
+            return None
+        self.camera = CameraController(camera_index=self.station.camera_index)
+        if self.camera.frame_hub is None:
+            print("\n  Camera not initialized. Check connection.")
+            self.camera.cleanup()
+            input("\n  Press ENTER to continue...")
+            return None
+        self.motor = MotorController(self.station)
+        self.motor.enable()
+        verifier = RotationVerifier(self.camera, self.motor)
+        try:
+            print("\n  Table must be at home with the fiducial inside FIDUCIAL_ROI.")
+            # Reference and measured turns run on the motor executor like a scan's moves
+            self._motor_call(verifier.reference)
+            return self._motor_call(action, verifier)
+        except RuntimeError as e:
+            print(f"\n  [VISION] {e}")
+        except KeyboardInterrupt:
+            print("\n  Interrupted.")
+        finally:
+            verifier.close()
+            self.motor.disable()
+            self.motor.cleanup()
+            self.camera.cleanup()
+        return None
+    
+    def _calibration_vision(self):
+        """Calibrate the steps-per-degree factor from fiducial measurements."""
+        result = self._vision_session(lambda verifier: verifier.calibrate())
+        if result:
+            factor, history = result
+            save_calibration(factor, self.station)
+            print(f"\n  Calibration saved: {factor:.6f} ({len(history)} turn(s))")
+        input("\n  Press ENTER to continue...")
+    
+    def auto_tune_speed(self):
+        """Search the fastest reliable pulse/step delays and save them as the motion profile."""
+        self.show_header()
+        print("\n" + "=" * 100)
+        print("                                  AUTO-TUNE MOTOR SPEED")
+        print("=" * 100)
+        print("\n  Runs verified full turns at decreasing delays; each turn takes a while.")
+        profile = self._vision_session(lambda verifier: verifier.tune_speed())
+        if profile:
+            if save_motion_profile(profile, self.station):
+                print(f"\n  Saved {self.station.profile_file}: pulse={profile['pulse_delay_us']}us "
+                      f"step={profile['step_delay_ms']}ms ({len(profile['trials'])} trials)")
+            else:
+                print("\n  Could not save the motion profile.")
+        input("\n  Press ENTER to continue...")
+    
     def _calibration_manual(self):
         """Manually enter calibration factor."""
         try:
             new_factor = float(input("\n  Enter new calibration factor: ").strip())
             if new_factor > 0:
-                save_calibration(new_factor)
+                save_calibration(new_factor, self.station)
                 print(f"  Calibration saved: {new_factor:.6f}")
             else:
                 print("  Factor must be positive.")
@@ -1174,13 +6361,23 @@ class Application:
   -------
     Contact: youssef.karim@safrangroup.com
 """)
-        print("=" * 100)
+        print("  STARTUP TIMINGS")
+        print("  ---------------")
+        print("\n".join(timing_report()))
+        print("\n" + "=" * 100)
         input("\n  Press ENTER to continue...")
 
 # =============================================================================
 # ENTRY POINT
 # =============================================================================
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "ctl":
+        try:
+            sys.exit(control_cli(sys.argv[2:]))
+        except KeyboardInterrupt:
+            sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "export":
+        sys.exit(export_cli(sys.argv[2:]))
     try:
         app = Application()
         app.run()
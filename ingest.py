@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Table Controle Carapace - Fleet ingestion collector
+Collects finished scan folders from every carapace table into one indexed store.
+"""
+
+import os
+import sys
+import time
+import json
+import asyncio
+import shutil
+import hashlib
+import zipfile
+import argparse
+import threading
+from datetime import datetime
+
+# =============================================================================
+# CONFIGURATION
+# =============================================================================
+class Config:
+    # COLLECTOR STORAGE
+    ROOT = os.path.join(os.path.expanduser("~"), "carapace_fleet")
+
+    # TRANSPORT - stations publish into ROOT/incoming (shared drop directory)
+    # and/or stream bundles over this Unix socket (stand-in for the network)
+    SOCKET = None  # e.g. "/tmp/carapace_ingest.sock"
+
+    # BACK-PRESSURE
+    MAX_PENDING = 8  # bundles waiting in incoming/ before stations are told to hold off
+    POLL_INTERVAL = 2.0  # seconds between scans of incoming/
+    VERIFY_IMAGES = True  # check every image against the sha256 in its manifest
+
+CONFIG = Config()
+
+# =============================================================================
+# UTILITIES
+# =============================================================================
+def file_sha256(filepath, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of a file, read in chunks."""
+    digest = hashlib.sha256()
+    with open(filepath, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def member_sha256(archive, name, chunk_size=1024 * 1024):
+    """SHA-256 hex digest of one member of an open zip (the last copy of a duplicated name)."""
+    digest = hashlib.sha256()
+    with archive.open(name) as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def safe_name(name):
+    """Path component from a bundle/table name (no separators, no dot files)."""
+    name = str(name).replace(os.sep, "_").replace("/", "_")
+    return name.lstrip(".") or "_"
+
+def safe_relpath(path):
+    """Relative file path inside a bundle, refusing absolute paths and '..'."""
+    parts = [part for part in path.replace("\\", "/").split("/") if part not in ("", ".")]
+    if not parts or ".." in parts:
+        raise ValueError(f"bad bundle path: {path}")
+    return os.path.join(*parts)
+
+# =============================================================================
+# COLLECTOR
+# =============================================================================
+class Collector:
+    """Ingests scan bundles dropped into ROOT/incoming into a deduplicated store.
+
+    A bundle is one scan folder exactly as StorageManager writes it on the
+    station (images, video, manifest.json, scan_journal.jsonl). Stations copy it
+    to incoming/.<name>.partial and rename it to incoming/<name> when complete,
+    so a half-copied bundle is never picked up. Each bundle is:
+      - de-duplicated by the sha256 of its manifest.json,
+      - verified against the per-image sha256 recorded in the manifest,
+      - moved to scans/<table>/<station>/<YYYY-MM-DD>/<folder>,
+      - appended to index.jsonl (fsync'd), keyed by piece ID, station and date.
+    Bundles that fail verification go to rejected/.
+
+    status.json tells stations whether to send more: while MAX_PENDING bundles
+    are waiting, "accepting" is false and stations keep buffering locally.
+    """
+
+    def __init__(self, root=None, max_pending=None):
+        self.root = root or CONFIG.ROOT
+        self.max_pending = max_pending or CONFIG.MAX_PENDING
+        self.incoming = os.path.join(self.root, "incoming")
+        self.store = os.path.join(self.root, "scans")
+        self.rejected = os.path.join(self.root, "rejected")
+        self.index_path = os.path.join(self.root, "index.jsonl")
+        self.status_path = os.path.join(self.root, "status.json")
+        for path in (self.incoming, self.store, self.rejected):
+            os.makedirs(path, exist_ok=True)
+        self.index = self.load_index()
+        self.by_checksum = {record['manifest_sha256']: record for record in self.index}
+        # The poll thread appends to the index while the socket receiver (event loop) reads it
+        self._index_lock = threading.Lock()
+        self.stats = {'ingested': 0, 'duplicates': 0, 'rejected': 0}
+
+    def load_index(self):
+        records = []
+        try:
+            with open(self.index_path, 'r') as f:
+                for line in f:
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        continue  # torn last line after a crash
+        except FileNotFoundError:
+            pass
+        return records
+
+    def _append_index(self, record):
+        with open(self.index_path, 'a') as f:
+            f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        with self._index_lock:
+            self.index.append(record)
+            self.by_checksum[record['manifest_sha256']] = record
+
+    def pending(self):
+        """Complete bundles waiting in incoming/, oldest first."""
+        names = [name for name in os.listdir(self.incoming) if not name.startswith(".")]
+        return sorted(names, key=lambda name: os.path.getmtime(os.path.join(self.incoming, name)))
+
+    def accepting(self):
+        return len(self.pending()) < self.max_pending
+
+    def is_duplicate(self, manifest_sha256):
+        with self._index_lock:
+            return manifest_sha256 in self.by_checksum
+
+    def write_status(self):
+        """Publish the back-pressure state read by the stations."""
+        pending = len(self.pending())
+        status = {
+            'accepting': pending < self.max_pending,
+            'pending': pending,
+            'max_pending': self.max_pending,
+            'updated': time.time(),
+            'stats': self.stats,
+        }
+        tmp_path = self.status_path + ".tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(status, f, indent=2)
+        os.replace(tmp_path, self.status_path)
+        return status
+
+    def _verify(self, bundle, manifest):
+        if not CONFIG.VERIFY_IMAGES:
+            return None
+        # Images may live only in the scan's single-file bundle (see app.py ScanBundle)
+        archive = None
+        archive_path = os.path.join(bundle, manifest['bundle']) if manifest.get('bundle') else None
+        try:
+            if archive_path and os.path.exists(archive_path):
+                archive = zipfile.ZipFile(archive_path)
+            for image in manifest.get('images', []):
+                path = os.path.join(bundle, image['file'])
+                if os.path.exists(path):
+                    digest = file_sha256(path) if image.get('sha256') else None
+                elif archive is not None and image['file'] in archive.NameToInfo:
+                    digest = member_sha256(archive, image['file']) if image.get('sha256') else None
+                else:
+                    return f"missing {image['file']}"
+                if digest is not None and digest != image['sha256']:
+                    return f"checksum mismatch on {image['file']}"
+        except zipfile.BadZipFile as e:
+            return f"unreadable bundle: {e}"
+        finally:
+            if archive is not None:
+                archive.close()
+        return None
+
+    def _reject(self, bundle, reason):
+        target = os.path.join(self.rejected, f"{os.path.basename(bundle)}_{int(time.time())}")
+        shutil.move(bundle, target)
+        with open(os.path.join(target, "rejected.txt"), 'w') as f:
+            f.write(reason + "\n")
+        self.stats['rejected'] += 1
+        print(f"  [INGEST] Rejected {os.path.basename(bundle)}: {reason}")
+        return "rejected"
+
+    def ingest(self, name):
+        """Process one bundle from incoming/: "ingested", "duplicate" or "rejected"."""
+        bundle = os.path.join(self.incoming, name)
+        manifest_path = os.path.join(bundle, "manifest.json")
+        if not os.path.exists(manifest_path):
+            return self._reject(bundle, "no manifest.json")
+        checksum = file_sha256(manifest_path)
+        if self.is_duplicate(checksum):
+            shutil.rmtree(bundle)
+            self.stats['duplicates'] += 1
+            print(f"  [INGEST] Duplicate {name} (already stored)")
+            return "duplicate"
+        try:
+            with open(manifest_path, 'r') as f:
+                manifest = json.load(f)
+        except ValueError as e:
+            return self._reject(bundle, f"unreadable manifest: {e}")
+        problem = self._verify(bundle, manifest)
+        if problem:
+            return self._reject(bundle, problem)
+
+        table = safe_name(manifest.get('table') or (name.split("__")[0] if "__" in name else "unknown"))
+        station = safe_name(manifest.get('station') or "A")
+        date = (manifest.get('started') or datetime.now().isoformat())[:10]
+        folder = safe_name(os.path.basename(manifest.get('folder') or name))
+        target = os.path.join(self.store, table, station, date, folder)
+        if os.path.exists(target):
+            target = f"{target}_{checksum[:8]}"  # same scan, newer manifest (e.g. resumed)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.move(bundle, target)
+        self._append_index({
+            'manifest_sha256': checksum,
+            'piece_id': manifest.get('piece_id'),
+            'table': table,
+            'station': f"{table}/{station}",
+            'date': date,
+            'started': manifest.get('started'),
+            'images': len(manifest.get('images', [])),
+            'aborted': manifest.get('aborted', False),
+            'path': os.path.relpath(target, self.root),
+            'received': datetime.now().isoformat(timespec="seconds"),
+        })
+        self.stats['ingested'] += 1
+        print(f"  [INGEST] Stored {manifest.get('piece_id')} from {table}/{station} -> {os.path.relpath(target, self.root)}")
+        return "ingested"
+
+    def poll_once(self):
+        """Ingest every complete bundle currently waiting; returns how many were handled."""
+        handled = 0
+        for name in self.pending():
+            try:
+                self.ingest(name)
+            except OSError as e:
+                print(f"  [INGEST] {name}: {e}")
+                continue
+            handled += 1
+        self.write_status()
+        return handled
+
+    def query(self, piece=None, station=None, date=None):
+        """Index records matching a piece ID, a station ("table" or "table/A") and/or a date prefix."""
+        results = []
+        with self._index_lock:
+            records = list(self.index)
+        for record in records:
+            if piece is not None and record['piece_id'] != piece:
+                continue
+            if station is not None and station not in (record['table'], record['station']):
+                continue
+            if date is not None and not record['date'].startswith(date):
+                continue
+            results.append(record)
+        return results
+
+# =============================================================================
+# SOCKET RECEIVER
+# =============================================================================
+class BundleReceiver:
+    """Unix-socket endpoint that receives bundles into incoming/.
+
+    One bundle per connection:
+        station -> {"cmd": "offer", "name": ..., "manifest_sha256": ...,
+                    "files": [{"name": ..., "size": ...}, ...]}
+        collector -> {"ok": true, "accept": true}
+                   | {"ok": true, "duplicate": true}
+                   | {"ok": false, "busy": true}          (back-pressure)
+        station -> the file contents, concatenated in "files" order
+        collector -> {"ok": true, "stored": true}
+                   | {"ok": true, "duplicate": true}      (same bundle already waiting)
+                   | {"ok": false, "error": ...}
+    {"cmd": "status"} returns the back-pressure state without sending anything.
+    """
+
+    def __init__(self, collector, socket_path):
+        self.collector = collector
+        self.socket_path = socket_path
+        self.server = None
+        self._lock = asyncio.Lock()  # one upload at a time keeps the pending count honest
+
+    async def start(self):
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # stale socket from a previous run
+        self.server = await asyncio.start_unix_server(self._serve, path=self.socket_path)
+
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+    async def _reply(self, writer, reply):
+        writer.write((json.dumps(reply) + "\n").encode())
+        await writer.drain()
+
+    async def _serve(self, reader, writer):
+        partial = None
+        try:
+            request = json.loads(await reader.readline() or b"{}")
+            if request.get("cmd") == "status":
+                await self._reply(writer, {'ok': True, 'accepting': self.collector.accepting()})
+                return
+            if request.get("cmd") != "offer":
+                await self._reply(writer, {'ok': False, 'error': "expected offer"})
+                return
+            async with self._lock:
+                if self.collector.is_duplicate(request['manifest_sha256']):
+                    await self._reply(writer, {'ok': True, 'duplicate': True})
+                    return
+                if not self.collector.accepting():
+                    await self._reply(writer, {'ok': False, 'busy': True})
+                    return
+                await self._reply(writer, {'ok': True, 'accept': True})
+                name = safe_name(request['name'])
+                partial = os.path.join(self.collector.incoming, f".{name}.partial")
+                os.makedirs(partial, exist_ok=True)
+                for entry in request['files']:
+                    remaining = int(entry['size'])
+                    path = os.path.join(partial, safe_relpath(entry['name']))
+                    os.makedirs(os.path.dirname(path), exist_ok=True)
+                    with open(path, 'wb') as f:
+                        while remaining:
+                            chunk = await reader.read(min(remaining, 1024 * 1024))
+                            if not chunk:
+                                raise ConnectionError("bundle truncated")
+                            f.write(chunk)
+                            remaining -= len(chunk)
+                target = os.path.join(self.collector.incoming, name)
+                if os.path.exists(target):
+                    # Same scan folder still waiting, e.g. a resumed scan's newer manifest
+                    target = f"{target}_{request['manifest_sha256'][:8]}"
+                if os.path.exists(target):
+                    await self._reply(writer, {'ok': True, 'duplicate': True})
+                    return
+                try:
+                    os.rename(partial, target)
+                except OSError as e:
+                    await self._reply(writer, {'ok': False, 'error': str(e)})
+                    return
+                partial = None
+                await self._reply(writer, {'ok': True, 'stored': True})
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, KeyError):
+            pass
+        finally:
+            if partial is not None and os.path.exists(partial):
+                shutil.rmtree(partial, ignore_errors=True)
+            writer.close()
+
+# =============================================================================
+# MAIN
+# =============================================================================
+async def serve(collector, socket_path=None, poll_interval=None):
+    """Poll incoming/ forever (and accept socket uploads when configured)."""
+    loop = asyncio.get_running_loop()
+    receiver = None
+    if socket_path:
+        receiver = BundleReceiver(collector, socket_path)
+        await receiver.start()
+        print(f"  [INGEST] Receiving bundles on {socket_path}")
+    print(f"  [INGEST] Watching {collector.incoming}")
+    try:
+        while True:
+            await loop.run_in_executor(None, collector.poll_once)
+            await asyncio.sleep(poll_interval or CONFIG.POLL_INTERVAL)
+    finally:
+        if receiver is not None:
+            await receiver.stop()
+
+def main():
+    parser = argparse.ArgumentParser(description="Carapace fleet ingestion collector")
+    parser.add_argument("--root", default=CONFIG.ROOT, help="collector storage root")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve_cmd = sub.add_parser("serve", help="collect bundles until interrupted")
+    serve_cmd.add_argument("--socket", default=CONFIG.SOCKET, help="also receive bundles on this Unix socket")
+    serve_cmd.add_argument("--max-pending", type=int, default=CONFIG.MAX_PENDING)
+    query_cmd = sub.add_parser("query", help="search the index")
+    query_cmd.add_argument("--piece")
+    query_cmd.add_argument("--station", help="table name or table/station")
+    query_cmd.add_argument("--date", help="YYYY, YYYY-MM or YYYY-MM-DD")
+    args = parser.parse_args()
+
+    collector = Collector(args.root, getattr(args, "max_pending", None))
+    if args.command == "query":
+        for record in collector.query(args.piece, args.station, args.date):
+            print(json.dumps(record))
+        return 0
+    try:
+        asyncio.run(serve(collector, args.socket))
+    except KeyboardInterrupt:
+        print("\n  [INGEST] Stopped.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
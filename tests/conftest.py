@@ -0,0 +1,70 @@
+"""Shared fixtures: the app in mock-hardware mode, writing only under tmp_path."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.pop("TABLE_SIMULATOR", None)  # mock mode: no simulator, no Pi libraries
+
+import app  # noqa: E402
+
+
+@pytest.fixture
+def table(tmp_path, monkeypatch):
+    """The app module configured for fast mock-hardware scans under tmp_path."""
+    settings = {
+        "LOCAL_STORAGE_PATH": str(tmp_path / "scans"),
+        "CONTROL_SOCKET": str(tmp_path / "control.sock"),
+        "CONTROL_HTTP_PORT": None,
+        "ROTATION_INCREMENT": 90,
+        "TOTAL_PHOTOS": 4,
+        "PULSE_DELAY_US": 0,
+        "STEP_DELAY_MS": 0,
+        "CAPTURE_DELAY": 0.01,
+        "SCHEDULER_ENABLED": False,
+        "INGEST_ENABLED": False,
+        "REVIEW_ENABLED": False,
+        "BUNDLE_ENABLED": False,
+        "SPOOL_CAPTURE": False,
+    }
+    for key, value in settings.items():
+        monkeypatch.setattr(app.CONFIG, key, value)
+    station = app.STATIONS[0]
+    monkeypatch.setattr(station, "storage_path", str(tmp_path / "scans"))
+    monkeypatch.setattr(station, "position_file", str(tmp_path / "position.json"))
+    monkeypatch.setattr(station, "calibration_factor", 1.0)
+    return app
+
+
+@pytest.fixture
+def core(table):
+    core = table.AsyncCore()
+    yield core
+    core.shutdown()
+
+
+@pytest.fixture
+def application(table, monkeypatch):
+    """The kiosk Application without control API or preview streaming."""
+    monkeypatch.setattr(table.CONFIG, "CONTROL_ENABLED", False)
+    monkeypatch.setattr(table.CONFIG, "STREAM_ENABLED", False)
+    application = table.Application()
+    yield application
+    application.core.shutdown()
+
+
+@pytest.fixture
+def sim(table, monkeypatch):
+    """The app on the hardware simulator, with a small sensor so frames render quickly."""
+    pytest.importorskip("cv2")
+    pytest.importorskip("numpy")
+    monkeypatch.setattr(table.CONFIG, "CAMERA_RESOLUTION", (1536, 864))
+    monkeypatch.setattr(table.CONFIG, "VIDEO_MODE_SIZE", (768, 432))
+    hardware = table.SimHardware()
+    for name, value in (("SIM", hardware), ("OutputDevice", table.SimOutputDevice),
+                        ("Picamera2", table.SimPicamera2), ("controls", table.SimControls),
+                        ("GPIO_AVAILABLE", True), ("CAMERA_AVAILABLE", True)):
+        monkeypatch.setattr(table, name, value)
+    yield table
+    hardware.close()
@@ -0,0 +1,40 @@
+"""AsyncCore executors and the hardware claim of the kiosk's manual tools, with mock hardware."""
+import asyncio
+import threading
+
+import pytest
+
+
+def test_claim_holds_queued_scans_and_is_refused_while_one_waits(table, core):
+    service = table.ScanService(core)
+    service.start()
+
+    async def scenario():
+        assert await service.claim("motor test")
+        job = await service.enqueue(1, origin="test")
+        await asyncio.sleep(0.2)
+        held = job.state
+        await service.release()
+        assert not await service.claim("camera test")  # the queued scan goes first
+        await job.done
+        return held, job.state
+
+    assert core.submit(scenario()).result(timeout=30) == ("queued", "done")
+
+
+def test_manual_moves_run_on_the_station_motor_executor(table, application):
+    assert application._claim_hardware("motor test")
+    application.motor = table.MotorController(application.station)
+    threads = []
+
+    def move(angle):
+        threads.append(threading.current_thread().name)
+        return application.motor.move_to(angle)
+
+    try:
+        assert application._motor_call(move, 90) == pytest.approx(90, abs=table.CONFIG.DEGREES_PER_STEP)
+    finally:
+        application.motor.cleanup()
+        application._release_hardware()
+    assert threads[0].startswith(application.station.executor("motor"))
+    assert application.service.status()['state'] == "idle"
@@ -0,0 +1,38 @@
+"""Auto ROI crop geometry from synthetic pre-rotation views."""
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+FULL = (4608, 2592)
+
+
+def views(box, count=4):
+    """Lores views of a grey backdrop with a red part, striped differently per view, filling box = (x, y, w, h)."""
+    x, y, w, h = box
+    frames = []
+    for k in range(count):
+        frame = np.full((600, 800, 3), 90, np.uint8)
+        frame[y:y + h, x:x + w] = (40, 40, 200)
+        frame[y:y + h, x + k * 3:x + w:12] = (40, 200, 40)
+        frames.append(frame)
+    return frames
+
+
+@pytest.mark.parametrize("box", [(300, 120, 200, 360), (180, 250, 440, 100), (385, 285, 30, 30)])
+def test_crop_has_the_lores_aspect_and_holds_the_part(table, box):
+    x, y, w, h = table.part_crop(views(box), FULL)
+    pw, ph = table.CONFIG.CAMERA_PREVIEW_SIZE
+    ax, ay = table.CONFIG.AUTO_ROI_ALIGN
+    assert w * ph == h * pw
+    assert w % ax == 0 and h % ay == 0
+    assert w >= pw and h >= ph
+    assert 0 <= x and 0 <= y and x + w <= FULL[0] and y + h <= FULL[1]
+    sx, sy = FULL[0] / 800, FULL[1] / 600
+    bx, by, bw, bh = box
+    assert x <= bx * sx and y <= by * sy
+    assert x + w >= (bx + bw) * sx and y + h >= (by + bh) * sy
+
+
+def test_part_wider_than_any_preview_shaped_crop_keeps_full_frame(table):
+    assert table.part_crop(views((40, 250, 720, 100)), FULL) is None
@@ -0,0 +1,58 @@
+"""Burst fusion on synthetic frames, and bracketed bursts on the simulator."""
+import os
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+
+def textured(seed=0, shape=(240, 320, 3)):
+    rng = np.random.default_rng(seed)
+    return (rng.random(shape) * 200 + 28).astype(np.uint8)
+
+
+def test_focus_stack_keeps_the_sharp_half_of_each_frame(table):
+    sharp = textured()
+    blurred = cv2.GaussianBlur(sharp, (0, 0), 4)
+    left, right = sharp.copy(), blurred.copy()
+    left[:, 160:], right[:, 160:] = blurred[:, 160:], sharp[:, 160:]
+    fused = table.focus_stack([left, right]).astype(np.int16)
+    # Away from the seam, where the weight tiles are blended
+    error = np.abs(fused - sharp)
+    assert error[:, :120].mean() < 6 and error[:, 200:].mean() < 6
+    assert np.abs(blurred.astype(np.int16) - sharp)[:, :120].mean() > 20
+
+
+def test_exposure_fusion_favours_the_well_exposed_frame(table):
+    dark, mid, bright = (np.full((64, 96, 3), value, np.uint8) for value in (15, 128, 245))
+    fused = table.exposure_fusion([dark, mid, bright])
+    assert abs(int(fused.mean()) - 128) < 10
+
+
+def test_fusion_does_not_depend_on_the_band_size(table):
+    frames = [textured(seed) for seed in range(3)]
+    whole = table.fuse_frames(frames, table.sharpness_score, band=1024)
+    assert np.array_equal(whole, table.fuse_frames(frames, table.sharpness_score, band=7))
+    assert whole.shape == frames[0].shape and whole.dtype == np.uint8
+
+
+@pytest.mark.parametrize("mode", ["focus_stack", "hdr"])
+def test_burst_brackets_run_in_ascending_order_and_develop(sim, tmp_path, mode):
+    camera = sim.CameraController(verbose=False)
+    camera.capture_mode = mode
+    filepath = str(tmp_path / f"{mode}.jpg")
+    try:
+        assert camera.capture(filepath, angle=0, overlay=False)
+        frames = camera.last_burst['frames']
+        assert len(frames) == 3
+        assert [frame['target'] for frame in frames] == sorted(frame['target'] for frame in frames)
+        key = 'lens_position' if mode == "focus_stack" else 'exposure_time'
+        assert frames[0][key] < frames[-1][key]
+        assert camera.gate_frame is not None
+        assert camera.develop(filepath, angle=0)
+        assert cv2.imread(filepath).shape[:2] == sim.CONFIG.CAMERA_RESOLUTION[::-1]
+        assert not camera.pending_bursts
+    finally:
+        camera.cleanup()
+    assert os.path.getsize(filepath) > 0
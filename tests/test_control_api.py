@@ -0,0 +1,116 @@
+"""Control API over its Unix socket, with mock hardware."""
+import asyncio
+import os
+import socket
+import stat
+import time
+
+import pytest
+
+
+@pytest.fixture
+def api(table, core):
+    service = table.ScanService(core)
+    service.start()
+    server = table.ControlServer([service])
+    core.submit(server.start()).result()
+    yield service
+    core.submit(server.stop()).result()
+
+
+def wait_for(predicate, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(0.05)
+    raise AssertionError("timed out")
+
+
+def test_start_status_and_manifest(table, api):
+    reply = table.control_request({"cmd": "start_scan", "piece": 42})
+    assert reply['ok'] and reply['job']['piece_number'] == 42
+    job_id = reply['job']['job']
+
+    status = table.control_request({"cmd": "status"})['status']
+    assert status['state'] in ("scanning", "idle")
+
+    wait_for(lambda: table.control_request({"cmd": "status"})['status']['state'] == "idle"
+             and api.jobs[-1].state == "done")
+    manifest = table.control_request({"cmd": "last_manifest"})['manifest']
+    assert manifest['job'] == job_id
+    assert manifest['piece_id'] == table.CONFIG.PIECE_ID_FORMAT.format(42)
+    assert len(manifest['images']) == table.CONFIG.TOTAL_PHOTOS
+    assert all(record['sha256'] for record in manifest['images'])
+
+
+def test_abort_running_scan(table, api, monkeypatch):
+    monkeypatch.setattr(table.CONFIG, "TOTAL_PHOTOS", 24)
+    monkeypatch.setattr(table.CONFIG, "ROTATION_INCREMENT", 15)
+    monkeypatch.setattr(table.CONFIG, "CAPTURE_DELAY", 0.2)
+    table.control_request({"cmd": "start_scan", "piece": 7})
+    wait_for(lambda: api.current is not None and api.current.index >= 1)
+    assert table.control_request({"cmd": "abort"})['ok']
+    job = wait_for(lambda: api.jobs[-1] if api.jobs[-1].state not in ("queued", "running") else None)
+    assert job.state == "aborted"
+    manifest = table.control_request({"cmd": "last_manifest"})['manifest']
+    assert manifest['aborted'] and len(manifest['images']) < 24
+
+
+def test_queued_scan_can_be_aborted_by_id(table, api):
+    first = table.control_request({"cmd": "start_scan", "piece": 1})['job']
+    second = table.control_request({"cmd": "start_scan", "piece": 2})['job']
+    assert table.control_request({"cmd": "abort", "job": second['job']})['ok']
+    wait_for(lambda: all(job.state not in ("queued", "running") for job in api.jobs))
+    states = {job.id: job.state for job in api.jobs}
+    assert states[first['job']] == "done" and states[second['job']] == "aborted"
+
+
+def test_socket_is_private(table, api):
+    mode = stat.S_IMODE(os.stat(table.CONFIG.CONTROL_SOCKET).st_mode)
+    assert mode == table.CONFIG.CONTROL_SOCKET_MODE == 0o600
+
+
+def test_second_instance_does_not_take_over(table, api, core):
+    intruder = table.ControlServer([api])
+    with pytest.raises(OSError):
+        core.submit(intruder.start()).result()
+    core.submit(intruder.stop()).result()
+    # The first instance still owns and serves the socket
+    assert table.control_request({"cmd": "status"})['ok']
+
+
+def test_stale_socket_is_replaced(table, core):
+    import socket
+    stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stale.bind(table.CONFIG.CONTROL_SOCKET)
+    stale.close()  # file left behind, nobody listening
+    service = table.ScanService(core)
+    service.start()
+    server = table.ControlServer([service])
+    core.submit(server.start()).result()
+    try:
+        assert table.control_request({"cmd": "status"})['ok']
+    finally:
+        core.submit(server.stop()).result()
+
+
+def test_cancelled_subscriber_unsubscribes_and_propagates(table, core, api):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(table.CONFIG.CONTROL_SOCKET)
+    sock.sendall(b'{"cmd": "subscribe"}\n')
+    wait_for(lambda: api.listeners)
+
+    async def cancel_handlers():
+        tasks = [task for task in asyncio.all_tasks()
+                 if task is not asyncio.current_task() and "_serve_json" in repr(task.get_coro())]
+        for task in tasks:
+            task.cancel()
+        await asyncio.wait(tasks)
+        return tasks
+
+    tasks = core.submit(cancel_handlers()).result()
+    sock.close()
+    assert tasks and all(task.cancelled() for task in tasks)
+    assert not api.listeners
@@ -0,0 +1,94 @@
+"""FrameHub publishing, history and settle detection, driven without a sensor."""
+import threading
+import time
+
+import numpy as np
+
+
+class FakeRequest:
+    def __init__(self, seq):
+        self.seq = seq
+
+    def get_metadata(self):
+        return {"FocusFoM": 1000, "SensorTimestamp": self.seq}
+
+    def make_array(self, stream):
+        return np.full((4, 4), self.seq, np.uint8) if stream == "lores" else np.full((8, 8), self.seq, np.uint8)
+
+    def release(self):
+        pass
+
+
+class FakeCamera:
+    def __init__(self):
+        self.seq = 0
+
+    def capture_request(self):
+        time.sleep(0.002)
+        self.seq += 1
+        return FakeRequest(self.seq)
+
+
+def feed(hub, values, interval=0.005):
+    """Publish one FocusFoM value per frame from a background thread."""
+    def _run():
+        for value in values:
+            time.sleep(interval)
+            hub.publish({"FocusFoM": value})
+
+    thread = threading.Thread(target=_run, daemon=True)
+    thread.start()
+    return thread
+
+
+def test_history_ring_never_shorter_than_settle_window(table):
+    hub = table.FrameHub(None, history=1)
+    assert hub.history.maxlen == table.CONFIG.SETTLE_FRAMES
+    for value in range(5):
+        hub.publish({"FocusFoM": value}, frame=np.zeros((2, 2), np.uint8))
+    recent = hub.recent(table.CONFIG.SETTLE_FRAMES)
+    assert [sample.seq for sample in recent] == [3, 4, 5]
+    assert all(sample.frame is None for sample in recent)  # only latest keeps the frame
+    assert hub.latest.frame is not None
+
+
+def test_wait_for_returns_only_newer_matching_samples(table):
+    hub = table.FrameHub(None)
+    hub.publish({"FocusFoM": 1})
+    assert hub.wait_for(after_seq=1, timeout=0.05) is None
+    feed(hub, [5, 50, 500])
+    sample = hub.wait_for(lambda s: s.metadata["FocusFoM"] > 10, after_seq=1, timeout=2.0)
+    assert sample.metadata["FocusFoM"] == 50
+
+
+def test_wait_settled_waits_for_stable_focus_after_the_move(table):
+    camera = table.CameraController(verbose=False, open_camera=False)
+    camera.frame_hub = table.FrameHub(None)
+    camera.frame_hub.publish({"FocusFoM": 1000})
+    # Motion blur first, then a steady FocusFoM within SETTLE_FOM_TOLERANCE
+    feed(camera.frame_hub, [200, 600, 300, 900, 1000, 1010, 1005, 1000, 1008])
+    assert camera.wait_settled(timeout=2.0)
+    assert camera.frame_hub.latest.seq >= 5 + table.CONFIG.SETTLE_FRAMES - 1
+
+
+def test_wait_settled_times_out_while_focus_keeps_changing(table):
+    camera = table.CameraController(verbose=False, open_camera=False)
+    camera.frame_hub = table.FrameHub(None)
+    feed(camera.frame_hub, [100, 900] * 20)
+    assert not camera.wait_settled(timeout=0.1)
+
+
+def test_loop_copies_lores_only_for_consumers_and_serves_grabs(table):
+    hub = table.FrameHub(FakeCamera())
+    hub.start()
+    try:
+        first = hub.wait_for(timeout=1.0)
+        assert first.frame is None
+        hub.add_consumer()
+        sample = hub.wait_for(lambda s: s.frame is not None, after_seq=first.seq, timeout=1.0)
+        assert sample.frame.shape == (4, 4)
+        metadata, main = hub.grab(lambda m: m["SensorTimestamp"] > sample.seq, timeout=1.0)
+        assert main.shape == (8, 8) and main[0, 0] == metadata["SensorTimestamp"] % 256
+        assert hub.fps() > 0
+    finally:
+        hub.stop()
@@ -0,0 +1,43 @@
+"""Socket uploads into the fleet collector."""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ingest  # noqa: E402
+
+
+def make_scan(folder, piece_id):
+    os.makedirs(folder)
+    with open(os.path.join(folder, "manifest.json"), 'w') as f:
+        json.dump({'piece_id': piece_id, 'station': "A", 'images': []}, f)
+    return ingest.file_sha256(os.path.join(folder, "manifest.json"))
+
+
+@pytest.fixture
+def receiver(table, core, tmp_path):
+    collector = ingest.Collector(str(tmp_path / "fleet"))
+    receiver = ingest.BundleReceiver(collector, str(tmp_path / "ingest.sock"))
+    core.submit(receiver.start()).result()
+    yield receiver
+    core.submit(receiver.stop()).result()
+
+
+def test_same_folder_name_with_new_manifest_is_kept(table, receiver, tmp_path):
+    client = table.IngestClient(socket_path=receiver.socket_path)
+    folder = str(tmp_path / "scan" / "P00001_scan")
+    first = make_scan(folder, "P00001")
+    assert client.send(folder, first) == "stored"
+
+    with open(os.path.join(folder, "manifest.json"), 'w') as f:
+        json.dump({'piece_id': "P00001", 'station': "A", 'images': [], 'resumed': True}, f)
+    second = ingest.file_sha256(os.path.join(folder, "manifest.json"))
+    assert client.send(folder, second) == "stored"
+    assert client.send(folder, second) == "duplicate"  # still waiting in incoming/
+
+    assert len(receiver.collector.pending()) == 2
+    assert receiver.collector.poll_once() == 2
+    assert len(receiver.collector.query(piece="P00001")) == 2
+    assert client.send(folder, second) == "duplicate"
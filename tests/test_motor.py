@@ -0,0 +1,94 @@
+"""Absolute step tracking, shortest-path moves, the in-flight 'moving' record and pulse timing, with mock GPIO."""
+import json
+import sys
+
+import pytest
+
+
+@pytest.fixture
+def motor(table):
+    motor = table.MotorController()
+    yield motor
+    motor.cleanup()
+
+
+def saved(table):
+    with open(table.STATIONS[0].position_file) as f:
+        return json.load(f)
+
+
+def test_increments_add_up_to_exactly_one_revolution(table, motor):
+    # 10 degrees is 22.2 microsteps: per-move rounding must not accumulate
+    for _ in range(36):
+        motor.rotate_degrees(10)
+    assert motor.position_steps == table.CONFIG.STEPS_PER_REVOLUTION
+    assert motor.current_angle == pytest.approx(0.0)
+    assert saved(table)['position_steps'] == table.CONFIG.STEPS_PER_REVOLUTION
+
+
+def test_move_to_takes_the_shortest_direction(table, motor):
+    motor.move_to(350)
+    assert motor.position_steps == round(-10 * motor.steps_per_degree())
+    motor.move_to(20)
+    assert motor.position_steps == round(20 * motor.steps_per_degree())
+    assert motor.current_angle == pytest.approx(20, abs=table.CONFIG.DEGREES_PER_STEP)
+
+
+def test_move_is_recorded_as_moving_until_it_finishes(table, motor, monkeypatch):
+    in_flight = []
+    step = motor.step
+
+    def recording_step(*args, **kwargs):
+        in_flight.append(saved(table).get('moving'))
+        return step(*args, **kwargs)
+
+    monkeypatch.setattr(motor, "step", recording_step)
+    motor.move_to_steps(100)
+    assert in_flight == [[0, 100]]
+    assert 'moving' not in saved(table)
+    assert motor.position_steps == 100
+
+
+def test_interrupted_move_survives_restart_until_rehomed(table):
+    table.save_position({'position_steps': 40, 'last_scan_clockwise': True, 'moving': [40, 200]},
+                        table.STATIONS[0].position_file)
+    motor = table.MotorController()
+    try:
+        assert motor.interrupted_move == [40, 200]
+        assert motor.position_steps == 40 and motor.last_scan_clockwise
+        motor.move_to_steps(60)
+        assert saved(table)['moving'] == [40, 200]  # still untrusted after an ordinary move
+        motor.reset_position()
+        assert motor.interrupted_move is None
+        assert saved(table) == {'position_steps': 0, 'last_scan_clockwise': True}
+    finally:
+        motor.cleanup()
+
+
+def test_torn_position_file_falls_back_to_home(table):
+    with open(table.STATIONS[0].position_file, 'w') as f:
+        f.write('{"position_steps": 12')
+    assert table.load_position(table.STATIONS[0].position_file) == {
+        'position_steps': 0, 'last_scan_clockwise': False, 'moving': None}
+
+
+def test_moves_record_pulse_period_jitter(table, motor, monkeypatch):
+    monkeypatch.setattr(table.CONFIG, "PULSE_DELAY_US", 100)
+    motor.move_to_steps(200)
+    motor.move_to_steps(100)
+    summary = motor.jitter_summary()
+    assert summary['moves'] == 2 and summary['expected_us'] == 200
+    # Each pulse is paced from the previous actual edge, so no period is short
+    assert summary['expected_us'] <= summary['min_us'] <= summary['mean_us'] <= summary['p99_us'] <= summary['max_us']
+    assert summary['thread'] == motor.motion.describe()
+    assert motor.jitter_summary(since=1)['last'] == summary['last'] == motor.jitter[-1]
+    assert motor.jitter_summary(since=2) is None
+
+
+@pytest.mark.parametrize("interval", [0.0005, None])
+def test_switch_interval_is_shortened_only_while_a_move_runs(table, motor, monkeypatch, interval):
+    monkeypatch.setattr(table.CONFIG, "MOTION_SWITCH_INTERVAL", interval)
+    default = sys.getswitchinterval()
+    during = motor.motion.call(sys.getswitchinterval)  # a job on the pulse thread, like a move
+    assert during == pytest.approx(interval if interval is not None else default)
+    assert sys.getswitchinterval() == default
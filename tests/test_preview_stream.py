@@ -0,0 +1,24 @@
+"""MJPEG preview server without a camera attached."""
+import socket
+import urllib.error
+import urllib.request
+
+import pytest
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_snapshot_without_camera_is_503(table, core):
+    streamer = table.PreviewStreamer(core, port=free_port())
+    core.submit(streamer.start()).result()
+    try:
+        assert streamer.host == "127.0.0.1"
+        with pytest.raises(urllib.error.HTTPError) as error:
+            urllib.request.urlopen(f"http://127.0.0.1:{streamer.port}/snapshot.jpg", timeout=10)
+        assert error.value.code == 503
+    finally:
+        core.submit(streamer.stop()).result()
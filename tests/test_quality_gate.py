@@ -0,0 +1,85 @@
+"""Quality gate decisions on the frames the camera really hands over, on the simulator."""
+import time
+
+import numpy as np
+import pytest
+
+ANGLES = (0, 90, 200)
+
+
+@pytest.fixture
+def full_sensor(sim, monkeypatch):
+    """The simulator at the real sensor size, where QUALITY_MIN_SHARPNESS was measured."""
+    for name in ("CAMERA_RESOLUTION", "VIDEO_MODE_SIZE"):
+        monkeypatch.setattr(sim.CONFIG, name, getattr(sim.Config, name))
+    monkeypatch.setattr(sim.CONFIG, "PULSE_DELAY_US", 200)  # fast enough, but no stalled steps
+    motor = sim.MotorController()
+    yield sim, motor
+    motor.cleanup()
+
+
+def gate_frames(table, motor, tmp_path, mode, defocus=0.0):
+    """Capture one still per angle and return the camera's gate frames."""
+    camera = table.CameraController(verbose=False)
+    camera.capture_mode = mode
+    if defocus:
+        camera.trigger_autofocus = lambda: True
+    frames = []
+    try:
+        for angle in ANGLES:
+            motor.move_to(angle)
+            if defocus:
+                focus = 2.0 + 0.3 * np.sin(np.radians(angle))  # SimPicamera2._focus
+                camera.camera.set_controls({"AfMode": table.SimControls.AfModeEnum.Manual,
+                                            "LensPosition": focus + defocus})
+                time.sleep(0.5)  # let the lens travel
+            camera.wait_settled(timeout=1.0)
+            camera.capture(str(tmp_path / f"{angle}.jpg"), angle=angle, overlay=False)
+            camera.pending_bursts.clear()
+            frames.append(camera.gate_frame)
+    finally:
+        camera.cleanup()
+    return frames
+
+
+def test_flat_frame_fails_as_first_frame(table):
+    metrics = table.QualityGate().check(np.full((600, 800, 3), 120, np.uint8))
+    assert not metrics['passed']
+    assert "blurred" in metrics['reasons']
+
+
+@pytest.mark.parametrize("main_format", ["BGR888", "YUV420"])
+def test_burst_scores_like_the_lores_frame(full_sensor, tmp_path, monkeypatch, main_format):
+    table, motor = full_sensor
+    monkeypatch.setattr(table.CONFIG, "CAMERA_MAIN_FORMAT", main_format)
+    gate = table.QualityGate()
+    reference = [gate.measure(frame)['sharpness']
+                 for frame in gate_frames(table, motor, tmp_path, "single")]
+    scores = [gate.check(frame)['sharpness'] for frame in gate_frames(table, motor, tmp_path, "focus_stack")]
+    assert all(score > 2 * table.CONFIG.QUALITY_MIN_SHARPNESS for score in scores)
+    assert np.median(scores) == pytest.approx(np.median(reference), rel=0.15)
+    assert gate.passed_sharpness == scores
+
+
+def test_defocused_frame_fails_without_reference(full_sensor, tmp_path, monkeypatch):
+    table, motor = full_sensor
+    monkeypatch.setattr(table.CONFIG, "CAMERA_MAIN_FORMAT", "BGR888")
+    gate = table.QualityGate()
+    frame = gate_frames(table, motor, tmp_path, "single", defocus=1.0)[0]
+    metrics = gate.check(frame)
+    assert not metrics['passed']
+    assert "blurred" in metrics['reasons']
+    assert not gate.passed_sharpness
+
+
+def test_sharp_frames_pass_and_soft_one_is_caught(full_sensor, tmp_path, monkeypatch):
+    table, motor = full_sensor
+    monkeypatch.setattr(table.CONFIG, "CAMERA_MAIN_FORMAT", "BGR888")
+    monkeypatch.setattr(table.CONFIG, "QUALITY_RELATIVE_SHARPNESS", 0.7)
+    gate = table.QualityGate()
+    for frame in gate_frames(table, motor, tmp_path, "single"):
+        assert gate.check(frame)['passed']
+    metrics = gate.check(gate_frames(table, motor, tmp_path, "single", defocus=0.6)[0])
+    assert metrics['sharpness'] >= table.CONFIG.QUALITY_MIN_SHARPNESS
+    assert not metrics['passed']
+    assert "softer than scan" in metrics['reasons']
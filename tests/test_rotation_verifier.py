@@ -0,0 +1,52 @@
+"""Fiducial tracking, recovery after missed steps and speed tuning, on the simulator."""
+import pytest
+
+
+@pytest.fixture
+def verifier(sim, monkeypatch):
+    monkeypatch.setattr(sim.CONFIG, "PULSE_DELAY_US", 200)  # 400 us pulse period: no stalls
+    camera = sim.CameraController(verbose=False)
+    motor = sim.MotorController()
+    verifier = sim.RotationVerifier(camera, motor, log=lambda message: None)
+    try:
+        verifier.reference()
+        yield verifier
+    finally:
+        verifier.close()
+        camera.cleanup()
+        motor.cleanup()
+
+
+def test_reference_tracks_the_rim_fiducial(verifier):
+    assert abs(verifier.direction[1]) < 0.1  # the rim moves sideways in the frame
+    assert verifier.error_degrees() == pytest.approx(0, abs=0.1)
+    verifier.motor.rotate_degrees(10, clockwise=False)
+    assert verifier.error_degrees() == pytest.approx(-10, abs=1.0)
+
+
+def test_recover_finds_a_table_left_behind(sim, verifier):
+    motor = verifier.motor
+    logical = motor.position_steps
+    # Missed steps: the table is 120 degrees behind where the controller thinks it is
+    motor.rotate_degrees(120, clockwise=False)
+    motor.set_position_steps(logical)
+    assert verifier.error_degrees() is None  # fiducial on the far side
+    verifier.recover()
+    assert verifier.error_degrees() == pytest.approx(0, abs=sim.CONFIG.FIDUCIAL_TOLERANCE / 2)
+    assert motor.position_steps == logical
+    physical = sim.SIM.tables["A"].angle
+    assert min(physical, 360 - physical) <= sim.CONFIG.FIDUCIAL_TOLERANCE
+
+
+def test_tune_speed_stops_above_the_stall_limit(sim, verifier, monkeypatch):
+    monkeypatch.setattr(sim.CONFIG, "TUNE_RESOLUTION_US", 20)
+    monkeypatch.setattr(sim.CONFIG, "TUNE_CONFIRM_TURNS", 1)
+    profile = verifier.tune_speed(90)
+    assert profile['confirmed']
+    # The simulated motor stalls on pulses closer than SIM_MIN_STEP_INTERVAL_US (two pulse delays)
+    assert sim.CONFIG.SIM_MIN_STEP_INTERVAL_US / 2 <= profile['pulse_delay_us'] <= 200
+    failed = [trial for trial in profile['trials'] if not trial['ok']]
+    assert failed and all(trial['failed_move'] == 1 for trial in failed)
+    assert sim.SIM.tables["A"].missed_steps > 0
+    assert verifier.station.speed() == (200, 0)  # trials never leave the station at a trial speed
+    assert verifier.error_degrees() == pytest.approx(0, abs=sim.CONFIG.FIDUCIAL_TOLERANCE)
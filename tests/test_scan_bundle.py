@@ -0,0 +1,78 @@
+"""ScanBundle packing, pruning and what ships to the collector."""
+import os
+import zipfile
+
+
+def make_folder(root, files):
+    for name, data in files.items():
+        path = os.path.join(root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+    return str(root)
+
+
+def test_prune_keeps_review_loose_and_it_ships_only_in_the_zip(table, tmp_path):
+    folder = make_folder(tmp_path / "scan", {
+        "P_000deg.jpg": b"jpeg",
+        "manifest.json": b"{}",
+        "review/index.html": b"<html>",
+        "review/tiles/000_files/0/0_0.jpeg": b"tile",
+    })
+    bundle = table.ScanBundle(folder)
+    bundle.add(os.path.join(folder, "P_000deg.jpg"))
+    bundle.close(prune=True)
+
+    assert sorted(os.listdir(folder)) == ["manifest.json", "review", table.CONFIG.BUNDLE_NAME]
+    assert os.path.exists(os.path.join(folder, "review", "index.html"))
+    with zipfile.ZipFile(os.path.join(folder, table.CONFIG.BUNDLE_NAME)) as archive:
+        assert "review/tiles/000_files/0/0_0.jpeg" in archive.NameToInfo
+    assert sorted(table.IngestClient.transfer_files(folder)) == sorted([table.CONFIG.BUNDLE_NAME, "manifest.json"])
+
+
+def test_torn_bundle_is_rebuilt_from_the_loose_files(table, tmp_path):
+    folder = make_folder(tmp_path / "scan", {"P_000deg.jpg": b"first", "P_090deg.jpg": b"second"})
+    bundle = table.ScanBundle(folder)
+    bundle.add(os.path.join(folder, "P_000deg.jpg"))
+    bundle._zip.fp.flush()
+    path = bundle.path
+    with open(path, 'rb') as f:
+        torn = f.read()  # members written, central directory not yet (crash before close)
+    bundle.close()
+    with open(path, 'wb') as f:
+        f.write(torn)
+    assert not zipfile.is_zipfile(path)
+
+    messages = []
+    table.ScanBundle(folder, log=messages.append).close()
+    assert "rebuilding" in messages[0]
+    with zipfile.ZipFile(path) as archive:
+        assert archive.testzip() is None
+        assert sorted(archive.namelist()) == ["P_000deg.jpg", "P_090deg.jpg"]
+        assert archive.read("P_000deg.jpg") == b"first"
+        assert archive.infolist()[0].header_offset == 0  # no orphaned members in front
+
+
+def test_same_size_rewrite_is_appended_again(table, tmp_path):
+    folder = make_folder(tmp_path / "scan", {"manifest.json": b'{"images": 1}'})
+    path = os.path.join(folder, "manifest.json")
+    bundle = table.ScanBundle(folder)
+    assert bundle.add(path)
+    assert not bundle.add(path)  # unchanged: not stored twice
+    # Rewritten like write_manifest() does, within the same mtime tick
+    stat = os.stat(path)
+    with open(path + ".tmp", 'wb') as f:
+        f.write(b'{"images": 2}')
+    os.utime(path + ".tmp", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    os.replace(path + ".tmp", path)
+    assert bundle.add(path)
+    bundle.close()
+    assert table.ScanBundle.read(bundle.path, "manifest.json") == b'{"images": 2}'
+
+    # A resumed scan reopens the bundle: identical files are recognised by CRC
+    reopened = table.ScanBundle(folder)
+    assert not reopened.add(path)
+    make_folder(folder, {"manifest.json": b'{"images": 3}'})
+    assert reopened.add(path)
+    reopened.close()
+    assert table.ScanBundle.read(bundle.path, "manifest.json") == b'{"images": 3}'
@@ -0,0 +1,63 @@
+"""Scan journal status when a scan stops early, with mock hardware."""
+
+
+def run_scan(table, core, piece_number):
+    service = table.ScanService(core)
+    service.start()
+
+    async def scan():
+        job = await service.enqueue(piece_number, origin="test")
+        await job.done
+        return job
+
+    return core.submit(scan()).result(timeout=30)
+
+
+def fail_second_capture(table, monkeypatch):
+    capture = table.CameraController.capture
+    calls = []
+
+    def flaky_capture(self, filepath, angle=None, overlay=True):
+        calls.append(angle)
+        if len(calls) == 2:
+            raise RuntimeError("sensor timeout")
+        return capture(self, filepath, angle, overlay)
+
+    monkeypatch.setattr(table.CameraController, "capture", flaky_capture)
+
+
+def test_capture_error_closes_journal_failed_and_resumable(table, core, monkeypatch):
+    fail_second_capture(table, monkeypatch)
+    job = run_scan(table, core, 5)
+
+    assert job.state == "failed"
+    state = table.ScanJournal.load(job.folder)
+    assert state['status'] == "failed"
+    assert len(state['done']) == 1
+    assert table.ScanJournal.find_interrupted(table.CONFIG.LOCAL_STORAGE_PATH) == [job.folder]
+
+
+def test_complete_scan_closes_journal_complete(table, core):
+    job = run_scan(table, core, 6)
+    assert job.state == "done"
+    assert table.ScanJournal.load(job.folder)['status'] == "complete"
+
+
+def test_resumed_job_reports_progress_against_its_journal_plan(table, core, monkeypatch):
+    fail_second_capture(table, monkeypatch)
+    failed = run_scan(table, core, 7)
+    # The operator changes the increment before resuming the 4-angle scan
+    monkeypatch.setattr(table.CONFIG, "ROTATION_INCREMENT", 45)
+    monkeypatch.setattr(table.CONFIG, "TOTAL_PHOTOS", 8)
+    service = table.ScanService(core)
+    service.start()
+
+    async def resume():
+        job = await service.enqueue(7, origin="test", resume=failed.folder)
+        await job.done
+        return job
+
+    job = core.submit(resume()).result(timeout=30)
+    assert job.state == "done"
+    assert job.to_dict()['progress'] == [4, 4]
+    assert job.manifest['total'] == 4
@@ -0,0 +1,113 @@
+"""LoadScheduler levels driven by a fake /sys + /proc tree (SystemMonitor root)."""
+import os
+
+import pytest
+
+
+class FakeSys:
+    """Plain files standing in for the kernel interfaces SystemMonitor reads."""
+
+    def __init__(self, root, monitor_class):
+        self.root = str(root)
+        self.monitor_class = monitor_class
+        self.idle = self.total = 0
+        self.write("proc/stat", self._stat())
+
+    def write(self, name, text):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+    def _stat(self):
+        busy = self.total - self.idle
+        return f"cpu  {busy} 0 0 {self.idle} 0 0 0 0 0 0\ncpu0 {busy} 0 0 {self.idle} 0 0 0 0 0 0\n"
+
+    def set(self, temp_c=50.0, throttled=0x0, cpu_busy=0.1):
+        self.write(self.monitor_class.TEMPERATURE, f"{int(temp_c * 1000)}\n")
+        self.write(self.monitor_class.THROTTLED, f"{throttled:x}\n")
+        self.total += 1000
+        self.idle += int(round((1 - cpu_busy) * 1000))
+        self.write("proc/stat", self._stat())
+
+
+@pytest.fixture
+def sched(table, tmp_path):
+    fake = FakeSys(tmp_path / "sys_root", table.SystemMonitor)
+    pipeline = table.FairExecutor(max(table.CONFIG.SCHEDULER_PIPELINE_WORKERS))
+    scheduler = table.LoadScheduler(pipeline, table.SystemMonitor(fake.root))
+    scheduler.monitor.sample()  # first CPU reading only sets the baseline
+    yield fake, scheduler
+    pipeline.shutdown()
+
+
+def step(fake, scheduler, **state):
+    fake.set(**state)
+    scheduler.update()
+    return scheduler.LEVELS[scheduler.level]
+
+
+def test_heat_steps_up_one_level_at_a_time(table, sched):
+    fake, scheduler = sched
+    hot = table.CONFIG.SCHEDULER_TEMP_HOT + 1
+    assert step(fake, scheduler, temp_c=50) == "normal"
+    assert step(fake, scheduler, temp_c=hot) == "warm"
+    assert scheduler.pipeline.limit == table.CONFIG.SCHEDULER_PIPELINE_WORKERS[1]
+    assert scheduler.defer_review
+    assert step(fake, scheduler, temp_c=hot) == "hot"
+    assert scheduler.transfer_rate == table.CONFIG.SCHEDULER_TRANSFER_RATES[2]
+    assert [a['level'] for a in scheduler.adaptations] == ["warm", "hot"]
+    assert scheduler.last['temp_c'] == pytest.approx(hot)
+
+
+def test_cooling_steps_back_with_hysteresis(table, sched):
+    fake, scheduler = sched
+    config = table.CONFIG
+    margin = config.SCHEDULER_TEMP_HYSTERESIS
+    for _ in range(2):
+        step(fake, scheduler, temp_c=config.SCHEDULER_TEMP_HOT + 1)
+    assert scheduler.LEVELS[scheduler.level] == "hot"
+    # Below the hot threshold but within the hysteresis band: stay hot
+    assert step(fake, scheduler, temp_c=config.SCHEDULER_TEMP_HOT - margin / 2) == "hot"
+    assert step(fake, scheduler, temp_c=config.SCHEDULER_TEMP_HOT - margin - 0.5) == "warm"
+    assert step(fake, scheduler, temp_c=config.SCHEDULER_TEMP_WARM - margin / 2) == "warm"
+    assert step(fake, scheduler, temp_c=config.SCHEDULER_TEMP_WARM - margin - 0.5) == "normal"
+    assert scheduler.pipeline.limit == config.SCHEDULER_PIPELINE_WORKERS[0]
+    assert not scheduler.defer_review
+    assert [a['level'] for a in scheduler.adaptations] == ["warm", "hot", "warm", "normal"]
+
+
+def test_throttle_flags_force_hot_while_cool(table, sched):
+    fake, scheduler = sched
+    assert step(fake, scheduler, temp_c=50, throttled=0x4) == "warm"
+    assert step(fake, scheduler, temp_c=50, throttled=0x4) == "hot"
+    assert "throttled" in scheduler.adaptations[-1]['reason']
+    # Sticky history bits only (0x40000 = throttling has occurred): cool down
+    assert step(fake, scheduler, temp_c=50, throttled=0x40000) == "warm"
+    assert step(fake, scheduler, temp_c=50, throttled=0x40000) == "normal"
+
+
+def test_cpu_load_hysteresis(table, sched):
+    fake, scheduler = sched
+    config = table.CONFIG
+    assert step(fake, scheduler, cpu_busy=config.SCHEDULER_CPU_HIGH + 0.05) == "warm"
+    between = (config.SCHEDULER_CPU_HIGH + config.SCHEDULER_CPU_LOW) / 2
+    assert step(fake, scheduler, cpu_busy=between) == "warm"
+    assert step(fake, scheduler, cpu_busy=config.SCHEDULER_CPU_LOW - 0.1) == "normal"
+
+
+def test_missing_kernel_files_read_as_none(table, tmp_path):
+    monitor = table.SystemMonitor(str(tmp_path / "empty"))
+    assert monitor.sample() == {'temp_c': None, 'throttled': None, 'cpu_busy': None, 'freq_mhz': None}
+
+
+def test_level_changes_are_kept_for_the_menu_not_printed(table, sched, application, capsys, monkeypatch):
+    fake, scheduler = sched
+    step(fake, scheduler, temp_c=table.CONFIG.SCHEDULER_TEMP_HOT + 1)
+    assert capsys.readouterr().out == ""  # the core loop never prints
+    assert scheduler.notice.startswith("  [SCHED] normal -> warm")
+    assert scheduler.status()['notice'] == scheduler.notice
+    monkeypatch.setattr(application.core, "scheduler", scheduler)
+    monkeypatch.setattr(application, "show_header", lambda: None)
+    application.show_main_menu()
+    assert scheduler.notice in capsys.readouterr().out
@@ -0,0 +1,74 @@
+"""Spool capture: developing raw stills, and the fallback when the spool cannot be reserved."""
+import asyncio
+import errno
+import os
+
+import numpy as np
+import pytest
+
+
+def test_spooled_bgr888_frame_is_developed_in_bgr_order(table, tmp_path):
+    cv2 = pytest.importorskip("cv2")
+    developer = table.CameraController(verbose=False, open_camera=False)
+    developer.main_format = "BGR888"
+    frame = np.zeros((64, 96, 3), np.uint8)
+    frame[..., 0] = 255  # red, in the R,G,B order Picamera2 delivers for "BGR888"
+    filepath = str(tmp_path / "still.jpg")
+    developed = []
+    developer.pending_bursts[filepath] = ("frame", [frame])
+    assert developer.develop(filepath, on_frame=developed.append)
+    b, g, r = cv2.imread(filepath)[32, 48]
+    assert r > 200 and b < 50 and g < 50
+    assert tuple(developed[0][32, 48]) == (0, 0, 255)
+
+
+def test_failed_reservation_records_and_bundles_like_a_normal_scan(table, core, monkeypatch):
+    monkeypatch.setattr(table.CONFIG, "SPOOL_CAPTURE", True)
+    monkeypatch.setattr(table.CONFIG, "BUNDLE_ENABLED", True)
+
+    def no_room(self, nbytes):
+        raise OSError(errno.ENOSPC, "No space left on device")
+
+    recordings = []
+
+    def start_video_recording(self, filepath):
+        recordings.append(filepath)
+        return False  # no camera in mock mode
+
+    monkeypatch.setattr(table.FrameSpool, "reserve", no_room)
+    monkeypatch.setattr(table.CameraController, "start_video_recording", start_video_recording)
+    service = table.ScanService(core)
+    service.start()
+
+    async def scan():
+        job = await service.enqueue(3, origin="test")
+        await job.done
+        return job
+
+    job = core.submit(scan()).result(timeout=30)
+    assert job.state == "done"
+    assert job.manifest['spool'] is None
+    assert job.manifest['bundle'] == table.CONFIG.BUNDLE_NAME
+    assert os.path.exists(os.path.join(job.folder, table.CONFIG.BUNDLE_NAME))
+    assert len(recordings) == 1 and recordings[0].startswith(job.folder)
+    assert not table.FrameSpool.exists(job.folder)
+    assert job.folder not in service.spool.spools
+
+
+def test_spool_messages_are_log_events_not_prints(table, core, capsys):
+    folder = os.path.join(table.STATIONS[0].storage_path, "P0001_20260101_000000")
+    table.FrameSpool(folder, "P0001")  # left behind by an earlier run
+    service = table.ScanService(core)
+    events = []
+    service.listeners.append(lambda event, data: events.append((event, data)))
+    service.start()
+
+    async def settle():
+        await service.core.drain([service.executors["storage"]])
+        await asyncio.sleep(0.05)
+
+    core.submit(settle()).result(timeout=10)
+    logs = [data for event, data in events if event == "log"]
+    assert logs and logs[0]['job'] is None and "waiting to be developed" in logs[0]['message']
+    assert service.status()['spool']['notice'] == logs[-1]['message']
+    assert capsys.readouterr().out == ""
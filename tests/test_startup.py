@@ -0,0 +1,72 @@
+"""Deferred hardware imports and the pre-warmed camera, with mock hardware."""
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_import_loads_no_heavy_library():
+    env = dict(os.environ)
+    env.pop("TABLE_SIMULATOR", None)
+    code = ("import sys, app; "
+            "print(','.join(m for m in ('cv2', 'PIL', 'picamera2', 'libcamera', 'gpiozero') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == ""
+
+
+def test_lazy_module_imports_on_first_use_and_times_it(table, monkeypatch):
+    monkeypatch.delitem(sys.modules, "tabnanny", raising=False)
+    monkeypatch.setattr(table, "IMPORT_TIMINGS", {})
+    check = table.LazyModule("tabnanny", "check")
+    assert "tabnanny" not in sys.modules
+    assert callable(check._load())
+    assert "tabnanny" in sys.modules
+    assert set(table.IMPORT_TIMINGS) == {"tabnanny"}
+
+
+def test_scan_takes_the_prewarmed_camera(table, core):
+    service = table.ScanService(core)
+    service.start()
+
+    async def scenario():
+        await service.prewarm()
+        warm = service._warm_camera
+        assert warm is not None and service._warm_timer is not None
+        taken = await core.call(service.executors["camera"], service._take_camera)
+        taken.cleanup()
+        return warm, taken
+
+    warm, taken = core.submit(scenario()).result(timeout=10)
+    assert taken is warm
+    assert service._warm_camera is None
+
+
+def test_claim_and_drop_release_the_prewarmed_camera(table, core):
+    service = table.ScanService(core)
+    service.start()
+
+    async def scenario():
+        await service.prewarm()
+        assert await service.claim("camera test")
+        claimed = service._warm_camera, service._warm_timer
+        await service.prewarm()  # refused while a manual tool holds the station
+        refused = service._warm_camera
+        await service.release()
+        await service.prewarm()
+        await service.drop_prewarm()
+        return claimed, refused, service._warm_camera
+
+    claimed, refused, dropped = core.submit(scenario()).result(timeout=10)
+    assert claimed == (None, None)
+    assert refused is None
+    assert dropped is None
+
+
+def test_leaving_the_capture_prompt_releases_the_prewarmed_camera(application, monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda prompt="": "q")
+    application.launch_capture()
+    service = application.service
+    assert service._warm_camera is None and service._warm_timer is None
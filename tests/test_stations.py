@@ -0,0 +1,62 @@
+"""Several stations on one Pi: station setup, the shared fair pipeline and concurrent scans."""
+import asyncio
+import threading
+
+
+def test_extra_stations_get_their_own_files(table, monkeypatch):
+    monkeypatch.setattr(table.CONFIG, "STATIONS", [
+        {"gpio_pulse": 17, "gpio_direction": 27, "gpio_enable": 22},
+        {"name": "B", "gpio_pulse": 5, "gpio_direction": 6, "gpio_enable": 13},
+    ])
+    first, second = table.build_stations()
+    assert (first.name, first.camera_index, first.position_file) == ("A", 0, table.POSITION_FILE)
+    assert (second.name, second.camera_index) == ("B", 1)
+    assert second.storage_path == f"{table.CONFIG.LOCAL_STORAGE_PATH}_B"
+    assert second.position_file.endswith("position_B.json")
+    assert second.executor("motor") == "motor.B"
+
+
+def test_fair_executor_serves_lanes_round_robin(table):
+    pool = table.FairExecutor(1)
+    started, gate = threading.Event(), threading.Event()
+    order = []
+
+    def block():
+        started.set()
+        gate.wait()
+
+    try:
+        blocker = pool.submit("storage.A", block)
+        started.wait(5)
+        # A burst from station A queued ahead of station B's frames
+        futures = [pool.submit("storage.A", order.append, f"A{i}") for i in range(1, 4)]
+        futures += [pool.submit("storage.B", order.append, f"B{i}") for i in range(1, 3)]
+        assert pool.backlog() == {"storage.A": 3, "storage.B": 2}
+        gate.set()
+        for future in [blocker] + futures:
+            future.result(timeout=5)
+    finally:
+        pool.shutdown()
+    assert order == ["A1", "B1", "A2", "B2", "A3"]  # B is not queued behind the whole burst
+
+
+def test_two_stations_scan_at_the_same_time(table, core, tmp_path, monkeypatch):
+    station_b = table.Station("B", 5, 6, 13, camera_index=1, storage_path=str(tmp_path / "scans_B"),
+                              position_file=str(tmp_path / "position_B.json"))
+    monkeypatch.setattr(table, "STATIONS", [table.STATIONS[0], station_b])
+    services = [table.ScanService(core, station) for station in table.STATIONS]
+    for service in services:
+        service.start()
+
+    async def scan_both():
+        jobs = [await service.enqueue(10 + i, origin="test") for i, service in enumerate(services)]
+        await asyncio.gather(*(job.done for job in jobs))
+        return jobs
+
+    jobs = core.submit(scan_both()).result(timeout=60)
+    assert [job.state for job in jobs] == ["done", "done"]
+    assert [job.station for job in jobs] == ["A", "B"]
+    assert jobs[1].folder.startswith(str(tmp_path / "scans_B"))
+    for station in table.STATIONS:
+        steps = table.load_position(station.position_file)['position_steps']
+        assert steps % round(90 / table.CONFIG.DEGREES_PER_STEP) == 0  # back on the 90 degree grid
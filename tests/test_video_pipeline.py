@@ -0,0 +1,73 @@
+"""The "video" camera pipeline: binned preview mode, one timed mode switch per still."""
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+
+def image_size(path):
+    height, width = cv2.imread(str(path)).shape[:2]
+    return width, height
+
+
+@pytest.fixture
+def video(sim, monkeypatch):
+    monkeypatch.setattr(sim.CONFIG, "SIM_SWITCH_TIME", 0.05)
+    camera = sim.CameraController(verbose=False, pipeline="video")
+    yield camera
+    camera.cleanup()
+
+
+def test_preview_runs_binned_and_stills_use_the_full_mode(sim, video):
+    assert video.video_config['kind'] == "video"
+    assert video.video_config['main'] == {"size": sim.CONFIG.VIDEO_MODE_SIZE, "format": "YUV420"}
+    assert video.still_config['main']['size'] == sim.CONFIG.CAMERA_RESOLUTION
+    assert video.still_config['lores'] == video.video_config['lores']  # the FrameHub sees one stream
+
+
+def test_each_still_switches_modes_once_and_back(sim, video, tmp_path):
+    for i in range(2):
+        assert video.capture(str(tmp_path / f"{i}.jpg"), angle=0, overlay=False)
+        assert video.last_switch >= 2 * sim.CONFIG.SIM_SWITCH_TIME  # there and back
+    assert len(video.switch_times) == 2
+    assert video.camera.config is video.video_config
+    assert image_size(tmp_path / "0.jpg") == sim.CONFIG.CAMERA_RESOLUTION
+
+
+def test_burst_is_shot_in_one_switch(sim, video, tmp_path):
+    video.capture_mode = "focus_stack"
+    path = str(tmp_path / "stack.jpg")
+    assert video.capture(path, angle=0, overlay=False)
+    assert len(video.switch_times) == 1
+    assert video.camera.config is video.video_config
+    assert video.develop(path)
+    assert image_size(path) == sim.CONFIG.CAMERA_RESOLUTION
+
+
+def test_single_pipeline_never_switches(sim, tmp_path):
+    camera = sim.CameraController(verbose=False, pipeline="single")
+    try:
+        assert camera.still_config is None and camera.video_config is None
+        assert camera.capture(str(tmp_path / "still.jpg"), angle=0, overlay=False)
+        assert camera.last_switch is None and not camera.switch_times
+        assert camera.benchmark(stills=1, window=0.2)['mode_switch'] is None
+    finally:
+        camera.cleanup()
+
+
+def test_benchmark_reports_the_switch_time(sim, video):
+    result = video.benchmark(stills=2, window=0.2)
+    assert result['pipeline'] == "video"
+    assert result['mode_switch'] >= 2 * sim.CONFIG.SIM_SWITCH_TIME
+    assert result['preview_fps'] > sim.CONFIG.SIM_STILL_FPS  # the binned mode is faster
+
+
+def test_warm_camera_of_the_other_pipeline_is_replaced(table, core, monkeypatch):
+    service = table.ScanService(core)
+    service._warm_camera = table.CameraController(verbose=False, pipeline="single")
+    monkeypatch.setattr(table.CONFIG, "CAMERA_PIPELINE", "video")
+    camera = service._take_camera()
+    try:
+        assert camera.pipeline == "video"
+        assert service._warm_camera is None
+    finally:
+        camera.cleanup()
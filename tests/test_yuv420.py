@@ -0,0 +1,63 @@
+"""YUV420 main stream: JPEG encoding from the planes, the corner overlay and deferred develop."""
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+
+def test_planes_encode_to_the_same_image(table, tmp_path, monkeypatch):
+    bgr = cv2.GaussianBlur(np.random.default_rng(0).integers(0, 255, (96, 128, 3), np.uint8), (0, 0), 2)
+    frame = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420)
+    y, u, v = table.yuv420_planes(frame)
+    assert (y.shape, u.shape, v.shape) == ((96, 128), (48, 64), (48, 64))
+    encoders = [False, True] if table.SIMPLEJPEG_AVAILABLE else [False]
+    for available in encoders:
+        monkeypatch.setattr(table, "SIMPLEJPEG_AVAILABLE", available)
+        path = str(tmp_path / f"still_{available}.jpg")
+        assert table.write_still_yuv420(path, frame)
+        decoded = cv2.imread(path)
+        assert decoded.shape == bgr.shape
+        assert np.abs(decoded.astype(int) - bgr).mean() < 4
+
+
+def test_overlay_touches_only_the_text_corner(table):
+    camera = table.CameraController(verbose=False, open_camera=False)
+    bgr = np.full((1080, 1920, 3), 90, np.uint8)
+    frame = cv2.cvtColor(bgr, cv2.COLOR_BGR2YUV_I420)
+    before = frame.copy()
+    camera._overlay_yuv420(frame, 45)
+    y_before, y_after = table.yuv420_planes(before)[0], table.yuv420_planes(frame)[0]
+    rows, cols = np.nonzero(y_after != y_before)
+    assert rows.size and rows.max() < 540 and cols.min() > 960  # the top-right corner only
+    # Same text as the BGR overlay on the whole frame
+    expected = cv2.cvtColor(camera.add_angle_overlay(bgr.copy(), 45, is_still=True), cv2.COLOR_BGR2GRAY)
+    overlaid = cv2.cvtColor(table.yuv420_to_bgr(frame), cv2.COLOR_BGR2GRAY)
+    corner = (slice(0, rows.max() + 1), slice(cols.min(), None))
+    assert np.abs(overlaid[corner].astype(int) - expected[corner]).mean() < 1
+
+
+def test_yuv_still_is_held_until_developed(sim, tmp_path, monkeypatch):
+    monkeypatch.setattr(sim.CONFIG, "CAMERA_MAIN_FORMAT", "YUV420")
+    camera = sim.CameraController(verbose=False)
+    path = str(tmp_path / "still.jpg")
+    try:
+        assert camera.capture(path, angle=30, overlay=False)
+        mode, frames = camera.pending_bursts[path]
+        assert mode == "yuv420" and frames[0].shape == (864 * 3 // 2, 1536)
+        assert not (tmp_path / "still.jpg").exists()
+        developed = []
+        assert camera.develop(path, angle=30, on_frame=developed.append)
+    finally:
+        camera.cleanup()
+    assert path not in camera.pending_bursts
+    assert cv2.imread(path).shape == (864, 1536, 3) == developed[0].shape
+
+
+def test_undeveloped_still_is_reported_as_developing(table, capsys):
+    dashboard = table.Dashboard(storage=None)
+    data = {'success': True, 'size': None, 'filepath': "/scans/x/img_030deg.jpg", 'index': 1, 'total': 4,
+            'angle': 30}
+    dashboard.handle("captured", data)
+    assert dashboard.values["last"] == "img_030deg.jpg (developing)"
+    table.Application._print_scan_event(None, "captured", data)
+    assert "CAPTURED (developing)" in capsys.readouterr().out